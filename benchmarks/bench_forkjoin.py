@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+# Micro-benchmark of the forkjoin benchmark generator: the time per task should
+# stay roughly constant as the number of tasks grows
+
+import os
+import sys
+import time
+import pathlib
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from synthetic_workflows import create_forkjoin_workflow
+
+
+def time_forkjoin_generation(num_tasks, compact):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        create_forkjoin_workflow(desired_num_tasks=num_tasks,
+                                 cpu_fraction=1.0,
+                                 cpu_work=100,
+                                 data_footprint=0,
+                                 lock_files_folder=pathlib.Path(tmp_dir),
+                                 work_dir=pathlib.Path(tmp_dir),
+                                 compact=compact)
+        return time.perf_counter() - start
+
+
+def main():
+    print("#tasks    \tcompact\ttime (s)\tus/task")
+    for num_tasks in [10, 1000, 100000]:
+        for compact in [False, True]:
+            elapsed = time_forkjoin_generation(num_tasks, compact)
+            print(f"{num_tasks:<10}\t{compact}\t{elapsed:.4f}  \t{elapsed * 1e6 / num_tasks:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+# Benchmark suite of the harness's own code paths (benchmark generation, workflow size
+# search, archiving, sanity analysis, startup). It runs offline: WfCommons is replaced by the
+# stand-ins in ./stand_ins, and Pegasus submit dirs and result dirs are synthesized.
+# Results are written as JSON, and can be compared against those of another commit
+# with --compare.
+
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import itertools
+import shutil
+import pathlib
+import platform
+import tempfile
+import contextlib
+import subprocess
+from argparse import ArgumentParser
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "scripts"))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "stand_ins"))
+
+from synthetic_workflows import synthetic_workflow_generators, get_layered_dag, get_tree_dag, get_mapreduce_dag
+from archive import create_archive, get_compressor_command
+import run_experiments
+import results_catalog
+import sanity
+
+# Parameters of each benchmark, as (full, --quick) values
+generation_num_tasks = ([10, 1000, 10000, 100000], [10, 1000])
+generation_data_footprints = ([0, 100 * 1000 * 1000], [0, 10 * 1000 * 1000])
+dag_num_tasks = ([1000, 100000, 1000000], [1000, 100000])
+archive_num_files = ([100, 1000, 10000], [100, 1000])
+sanity_num_files = ([1000, 10000, 100000], [1000])
+
+
+def measure(function, setup=None, repeats=3, teardown=None):
+    # Best of repeats (the least disturbed run), each run from a fresh setup (and cleaned up by teardown,
+    # which is not timed either)
+    best = None
+    for _ in range(repeats):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        function(state)
+        elapsed = time.perf_counter() - start
+        if teardown:
+            teardown(state)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_generation(quick, repeats):
+    for kind in ["chain", "forkjoin", "layered"]:
+        for num_tasks in generation_num_tasks[quick]:
+            for data_footprint in generation_data_footprints[quick]:
+                if num_tasks >= 100000 and data_footprint > 0:
+                    continue
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    def setup():
+                        work_dir = pathlib.Path(tempfile.mkdtemp(dir=tmp_dir))
+                        return work_dir
+
+                    def generate(work_dir):
+                        synthetic_workflow_generators[kind](desired_num_tasks=num_tasks,
+                                                            cpu_fraction=0.5,
+                                                            cpu_work=100,
+                                                            data_footprint=data_footprint,
+                                                            lock_files_folder=work_dir,
+                                                            work_dir=work_dir)
+
+                    yield {"kind": kind, "num_tasks": num_tasks, "data_footprint": data_footprint}, \
+                        measure(generate, setup, repeats, teardown=shutil.rmtree)
+
+
+def bench_dags(quick, repeats):
+    # DAG shapes alone (with the default width and edge density), without writing the benchmark JSON
+    dag_functions = {"layered": lambda num_tasks: get_layered_dag(num_tasks, math.isqrt(num_tasks), None, 0),
+                     "tree": lambda num_tasks: get_tree_dag(num_tasks),
+                     "mapreduce": lambda num_tasks: get_mapreduce_dag(num_tasks, math.isqrt(num_tasks), None, 0)}
+    for kind, dag_function in dag_functions.items():
+        for num_tasks in dag_num_tasks[quick]:
+            yield {"kind": kind, "num_tasks": num_tasks}, measure(lambda _: dag_function(num_tasks), None, repeats)
+
+
+def bench_workflow_sizes(quick, repeats):
+    for workflow in ["seismology", "montage", "genome"]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "sizes.json")
+
+            def setup():
+                if os.path.exists(cache_path):
+                    os.remove(cache_path)
+
+            def compute(_):
+                run_experiments.compute_workflow_sizes(workflow, [1, 2, 5, 10], cache_path)
+
+            yield {"workflow": workflow, "cache": "cold"}, measure(compute, setup, repeats)
+            yield {"workflow": workflow, "cache": "warm"}, measure(compute, None, repeats)
+
+
+def create_submit_dir(path, num_files):
+    # Pegasus-like submit dir: job files spread over a few sub-directories, with log-like contents
+    rng = random.Random(0)
+    for i in range(num_files):
+        sub_dir = path.joinpath(f"{i % 10:02d}", f"{i % 100:03d}")
+        sub_dir.mkdir(parents=True, exist_ok=True)
+        lines = [f"{rng.randint(0, 10 ** 9)} job_{i} state=RUNNING host=node-{rng.randint(0, 9)}\n"
+                 for _ in range(rng.randint(10, 50))]
+        sub_dir.joinpath(f"job_{i:06d}.out").write_text("".join(lines))
+
+
+def bench_archiving(quick, repeats):
+    formats = ["gz"] + (["zst"] if shutil.which("zstd") else [])
+    for num_files in archive_num_files[quick]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            submit_dir = pathlib.Path(tmp_dir).joinpath("run0001")
+            create_submit_dir(submit_dir, num_files)
+            for archive_format in formats:
+                compressor = get_compressor_command(archive_format, None, 1)
+
+                def archive(_):
+                    path = create_archive(submit_dir, pathlib.Path(tmp_dir).joinpath("archive"),
+                                          archive_format=archive_format, threads=os.cpu_count())
+                    os.remove(path)
+
+                yield {"num_files": num_files, "format": archive_format,
+                       "compressor": compressor[0] if compressor else "python"}, measure(archive, None, repeats)
+
+
+def create_result_dir(path, num_files):
+    # Result files of a parameter sweep (20 trials per cell), with a few task runtimes each
+    rng = random.Random(0)
+    cells = itertools.product(["chain", "forkjoin", "layered", "tree", "mapreduce"], [10, 100, 1000, 10000],
+                              [0, 100, 500, 1000, 5000], [0.2, 0.5, 0.8, 1.0], [0, 10 ** 6, 10 ** 8, 10 ** 9, 10 ** 10],
+                              [1, 2, 4, 8], range(20))
+    for index, (workflow, num_tasks, cpu_work, cpu_fraction, data_footprint, num_compute_nodes, trial) in \
+            enumerate(itertools.islice(cells, num_files)):
+        name = f"{workflow}-{num_tasks}-{cpu_work}-{cpu_fraction}-{data_footprint}-haswell-{num_compute_nodes}-" \
+               f"{trial}-{1700000000 + index}.json"
+        tasks = [{"id": f"{i:08d}", "runtimeInSeconds": rng.uniform(1, 100)} for i in range(5)]
+        with open(path.joinpath(name), 'w') as f:
+            json.dump({"workflow": {"execution": {"makespanInSeconds": rng.uniform(10, 1000), "tasks": tasks}}}, f)
+
+
+def run_sanity(args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sys.argv = ["sanity.py"] + args
+        sanity.main()
+
+
+def bench_sanity(quick, repeats):
+    for num_files in sanity_num_files[quick]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result_dir = pathlib.Path(tmp_dir)
+            create_result_dir(result_dir, num_files)
+
+            def remove_indexes():
+                shutil.rmtree(result_dir.joinpath(results_catalog.CATALOG_DIR_NAME), ignore_errors=True)
+                if result_dir.joinpath(".sanity-cache.pickle").exists():
+                    os.remove(result_dir.joinpath(".sanity-cache.pickle"))
+
+            yield {"num_files": num_files, "mode": "full"}, \
+                measure(lambda _: run_sanity([str(result_dir)]), remove_indexes, repeats)
+            run_sanity(["-i", str(result_dir)])
+            yield {"num_files": num_files, "mode": "incremental (unchanged)"}, \
+                measure(lambda _: run_sanity(["-i", str(result_dir)]), None, repeats)
+            yield {"num_files": num_files, "mode": "statistical"}, \
+                measure(lambda _: run_sanity(["-s", "--num_resamples", "200", str(result_dir)]), None, repeats)
+
+
+def bench_startup(quick, repeats):
+    # Cold start of run_experiments.py in a fresh interpreter, with whatever WfCommons is installed
+    # (not the stand-ins): argument errors and size listings should not pay for importing WfCommons
+    scripts_dir = os.path.join(BENCHMARKS_DIR, "..", "scripts")
+    commands = {"help": ["--help"],
+                "argument error": ["-a", "haswell"],
+                "print sizes": ["-a", "haswell", "-w", "chain", "-n", "1", "-t", "1", "-c", "0", "-f", "1.0",
+                                "-d", "0", "-o", ".", "-S", "10", "-p"]}
+    wfcommons_installed = subprocess.run([sys.executable, "-c", "import wfcommons"],
+                                         capture_output=True).returncode == 0
+    for name, args in commands.items():
+        def start(_):
+            subprocess.run([sys.executable, "run_experiments.py"] + args, cwd=scripts_dir, capture_output=True)
+
+        yield {"command": name, "wfcommons_installed": wfcommons_installed}, measure(start, None, repeats)
+
+
+benchmarks = {"generation": bench_generation,
+              "dags": bench_dags,
+              "workflow_sizes": bench_workflow_sizes,
+              "archiving": bench_archiving,
+              "sanity": bench_sanity,
+              "startup": bench_startup}
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    baseline_seconds = {(result["benchmark"], json.dumps(result["parameters"], sort_keys=True)): result["seconds"]
+                        for result in baseline["results"]}
+    sys.stderr.write(f"\nCompared to {baseline.get('commit')} (time ratio, > 1 is slower):\n")
+    for result in results:
+        key = (result["benchmark"], json.dumps(result["parameters"], sort_keys=True))
+        if key in baseline_seconds:
+            ratio = result["seconds"] / baseline_seconds[key] if baseline_seconds[key] else float("inf")
+            sys.stderr.write(f"  {result['benchmark']:<15}{key[1]:<70}{ratio:>6.2f}" +
+                             ("  SLOWER\n" if ratio > 1.1 else "\n"))
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the harness's generators and post-processing paths")
+    parser.add_argument("benchmark", nargs='*',
+                        help="<" + "|".join(benchmarks.keys()) + "> (default: all)")
+    parser.add_argument("-o", "--output", help="<JSON file to write results to> (default: stdout)")
+    parser.add_argument("--quick", action='store_true', help="<only run the smaller sizes>")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="<# of runs of each measurement (best kept)>")
+    parser.add_argument("--compare", help="<JSON results of an earlier run to compare with>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if parsed_args.repeats < 1:
+        sys.stderr.write("Error: invalid -r/--repeats value\n")
+        sys.exit(1)
+
+    for name in parsed_args.benchmark:
+        if name not in benchmarks:
+            sys.stderr.write("Error: unknown benchmark '" + name + "'\n")
+            sys.exit(1)
+
+    results = []
+    for name in parsed_args.benchmark or benchmarks.keys():
+        for parameters, seconds in benchmarks[name](int(parsed_args.quick), parsed_args.repeats):
+            sys.stderr.write(f"{name:<15}{json.dumps(parameters):<70}{seconds:>10.4f}s\n")
+            results.append({"benchmark": name, "parameters": parameters, "seconds": seconds})
+
+    output = {"commit": get_commit(),
+              "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "cpuCount": os.cpu_count(),
+              "repeats": parsed_args.repeats,
+              "results": results}
+    if parsed_args.output:
+        with open(parsed_args.output, 'w') as f:
+            json.dump(output, f, indent=4)
+    else:
+        print(json.dumps(output, indent=4))
+
+    if parsed_args.compare:
+        compare(results, parsed_args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Offline stand-ins for the parts of WfCommons used by run_experiments.py, so that the
+# harness's own code can be benchmarked without WfCommons (or Pegasus) installed.
+# Recipes only know their minimum #tasks and how many tasks they actually generate.
+
+__version__ = "stand-in"
+
+
+class StandInRecipe:
+    min_num_tasks = 1
+    task_granularity = 1
+
+    @classmethod
+    def get_num_tasks(cls, num_tasks):
+        if num_tasks < cls.min_num_tasks:
+            raise ValueError(f"{cls.__name__} needs at least {cls.min_num_tasks} tasks")
+        return -(-num_tasks // cls.task_granularity) * cls.task_granularity
+
+
+class SeismologyRecipe(StandInRecipe):
+    min_num_tasks = 3
+
+
+class MontageRecipe(StandInRecipe):
+    min_num_tasks = 60
+    task_granularity = 7
+
+
+class GenomeRecipe(StandInRecipe):
+    min_num_tasks = 50
+    task_granularity = 4
+
+
+class SoykbRecipe(StandInRecipe):
+    min_num_tasks = 98
+    task_granularity = 3
+
+
+class CyclesRecipe(StandInRecipe):
+    min_num_tasks = 67
+    task_granularity = 9
+
+
+class EpigenomicsRecipe(StandInRecipe):
+    min_num_tasks = 41
+    task_granularity = 5
+
+
+class BwaRecipe(StandInRecipe):
+    min_num_tasks = 8
+    task_granularity = 2
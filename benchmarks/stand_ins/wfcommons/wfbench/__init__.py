@@ -0,0 +1,23 @@
+import json
+import pathlib
+
+
+class WorkflowBenchmark:
+    """Writes a benchmark JSON with as many tasks as the recipe would generate (no dependencies)."""
+
+    def __init__(self, recipe, num_tasks):
+        self.recipe = recipe
+        self.num_tasks = num_tasks
+
+    def create_benchmark(self, save_dir, cpu_work=0, data=0, percent_cpu=1.0, lock_files_folder=None):
+        num_tasks = self.recipe.get_num_tasks(self.num_tasks)
+        tasks = [{"name": f"task_{i:08d}", "id": f"{i:08d}", "type": "compute",
+                  "command": {"program": "wfbench",
+                              "arguments": [f"task_{i:08d}", f"--percent-cpu {percent_cpu}",
+                                            f"--cpu-work {cpu_work}"]},
+                  "parents": [], "children": [], "files": [], "cores": 1}
+                 for i in range(num_tasks)]
+        path = pathlib.Path(save_dir).joinpath(f"{self.recipe.__name__}-{num_tasks}.json")
+        with open(path, 'w') as f:
+            json.dump({"name": self.recipe.__name__, "workflow": {"tasks": tasks}}, f, indent=4)
+        return path
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import json
+import math
+import statistics
+
+
+def get_t_quantile(p, degrees_of_freedom):
+    # Quantile of Student's t distribution: exact for 1 and 2 degrees of freedom, Cornish-Fisher
+    # expansion around the normal quantile otherwise (within 1% from 3 degrees of freedom on)
+    if degrees_of_freedom == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if degrees_of_freedom == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    v = degrees_of_freedom
+    return (z + (z ** 3 + z) / (4 * v) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2) +
+            (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3) +
+            (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4))
+
+
+def get_relative_ci(makespans, confidence):
+    """Returns the half-width of the confidence interval of the mean makespan, relative to the mean
+    (infinite when there are fewer than 2 makespans)."""
+    if len(makespans) < 2:
+        return math.inf
+    mean = statistics.mean(makespans)
+    if mean <= 0:
+        return math.inf
+    half_width = get_t_quantile(1.0 - (1.0 - confidence) / 2.0, len(makespans) - 1) * \
+        statistics.stdev(makespans) / math.sqrt(len(makespans))
+    return half_width / mean
+
+
+def read_makespan(result_path):
+    with open(result_path) as f:
+        return json.load(f)["workflow"]["execution"]["makespanInSeconds"]
+
+
+def pick_next_trial(cells, ci_target, min_trials, max_trials):
+    """Returns the cell that should run the next trial, or None if all cells are done.
+
+    cells are dicts with the cell's 'makespans' so far, 'num_trials' (including trials still
+    running) and 'num_pending' (trials still running). Cells first get min_trials trials, in
+    order; then the cell with the widest relative confidence interval gets the next trial, until
+    every cell either is below ci_target or has max_trials trials. Cells with trials still
+    running come last, since their interval is about to change."""
+    best_cell, best_key = None, None
+    for index, cell in enumerate(cells):
+        if cell["num_trials"] >= max_trials:
+            continue
+        if cell["num_trials"] < min_trials:
+            key = (0, index)
+        else:
+            if len(cell["makespans"]) >= min_trials and cell["relative_ci"] <= ci_target:
+                continue
+            key = (1 if cell["num_pending"] == 0 else 2, -cell["relative_ci"], index)
+        if best_key is None or key < best_key:
+            best_cell, best_key = cell, key
+    return best_cell
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import fnmatch
+import hashlib
+import tarfile
+import subprocess
+
+archive_formats = {"gz": ".tar.gz", "zst": ".tar.zst"}
+
+# Files smaller than this are not worth hashing for deduplication
+DEDUPE_MIN_SIZE_IN_BYTES = 64 * 1024
+# Level of Python's gzip compressor when pigz is not installed (that of gzip and pigz)
+DEFAULT_GZIP_LEVEL = 6
+
+
+def get_compressor_command(archive_format, level, threads):
+    if archive_format == "gz":
+        if shutil.which("pigz"):
+            return ["pigz", "-c", "-p", str(threads)] + ([f"-{level}"] if level is not None else [])
+        return None
+    if archive_format == "zst":
+        if shutil.which("zstd"):
+            return ["zstd", "-q", "-c", f"-T{threads}"] + ([f"-{level}"] if level is not None else [])
+        raise Exception("Cannot create .tar.zst archives: zstd is not installed")
+    raise Exception(f"Unknown archive format {archive_format}")
+
+
+def get_file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def add_directory(tar, source_dir, arcname, exclude, dedupe):
+    # Walks the directory in a deterministic order, skipping excluded files and storing
+    # files whose contents were already archived (in this archive) as hard links to their
+    # first copy. Symbolic links to directories are stored as links, as tar.add() does
+    first_arcnames = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        relative_root = os.path.relpath(root, source_dir)
+        root_arcname = arcname if relative_root == "." else os.path.join(arcname, relative_root)
+        tar.add(root, arcname=root_arcname, recursive=False)
+        linked_dirs = [dir_name for dir_name in dirs if os.path.islink(os.path.join(root, dir_name))]
+        for file_name in sorted(files + linked_dirs):
+            if any(fnmatch.fnmatch(file_name, pattern) for pattern in exclude):
+                continue
+            path = os.path.join(root, file_name)
+            file_arcname = os.path.join(root_arcname, file_name)
+            tar_info = tar.gettarinfo(path, arcname=file_arcname)
+            if dedupe and tar_info.isfile() and tar_info.size >= DEDUPE_MIN_SIZE_IN_BYTES:
+                key = (tar_info.size, get_file_digest(path))
+                if key in first_arcnames:
+                    tar_info.type = tarfile.LNKTYPE
+                    tar_info.linkname = first_arcnames[key]
+                    tar_info.size = 0
+                    tar.addfile(tar_info)
+                    continue
+                first_arcnames[key] = file_arcname
+            if tar_info.isfile():
+                with open(path, 'rb') as f:
+                    tar.addfile(tar_info, f)
+            else:
+                tar.addfile(tar_info)
+
+
+def create_archive(source_dir, archive_path_without_extension, archive_format="gz", level=None, threads=1,
+                   exclude=(), dedupe=False):
+    """Archives source_dir (as a top-level directory of the same name) and returns the archive's path.
+
+    Compression runs in a separate pigz/zstd process using the given number of threads when the
+    tool is available; gzip falls back to Python's single-threaded compressor otherwise."""
+    archive_path = str(archive_path_without_extension) + archive_formats[archive_format]
+    arcname = os.path.basename(os.path.normpath(str(source_dir)))
+
+    command = get_compressor_command(archive_format, level, threads)
+    if command is None:
+        with tarfile.open(archive_path, "w:gz", compresslevel=DEFAULT_GZIP_LEVEL if level is None else level) as tar:
+            add_directory(tar, str(source_dir), arcname, exclude, dedupe)
+        return archive_path
+
+    with open(archive_path, 'wb') as fout:
+        proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=fout)
+        try:
+            with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+                add_directory(tar, str(source_dir), arcname, exclude, dedupe)
+        finally:
+            proc.stdin.close()
+            proc.wait()
+    if proc.returncode != 0:
+        raise Exception(f"Could not create archive {archive_path}: {command[0]} failed")
+    return archive_path
+
+
+def get_decompressor_command(archive_path):
+    if str(archive_path).endswith(archive_formats["zst"]):
+        if shutil.which("zstd"):
+            return ["zstd", "-q", "-d", "-c"]
+        raise Exception(f"Cannot read {archive_path}: zstd is not installed")
+    if shutil.which("pigz"):
+        return ["pigz", "-d", "-c"]
+    return None
+
+
+def iter_archive_members(archive_path):
+    """Yields the (tar_info, file object or None) of each member of an archive, as it is decompressed
+    (in a separate pigz/zstd process when available), without extracting anything to disk. File objects
+    are only valid until the next member is yielded."""
+    command = get_decompressor_command(archive_path)
+    if command is None:
+        with tarfile.open(archive_path, "r|gz") as tar:
+            for tar_info in tar:
+                yield tar_info, tar.extractfile(tar_info) if tar_info.isfile() else None
+        return
+
+    with open(archive_path, 'rb') as fin:
+        proc = subprocess.Popen(command, stdin=fin, stdout=subprocess.PIPE)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                for tar_info in tar:
+                    yield tar_info, tar.extractfile(tar_info) if tar_info.isfile() else None
+        finally:
+            proc.stdout.close()
+            proc.wait()
+    if proc.returncode != 0:
+        raise Exception(f"Could not read archive {archive_path}: {command[0]} failed")
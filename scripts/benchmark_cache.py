@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import fnmatch
+import hashlib
+import pathlib
+import threading
+import contextlib
+from argparse import ArgumentParser
+
+from input_data import link_or_copy
+
+ENTRY_FILE_NAME = ".entry.json"
+# Held (flock) while an entry is looked up and, if missing, generated and added
+LOCK_FILE_SUFFIX = ".lock"
+# ioctl that clones a file on file systems with reflinks (btrfs, XFS, ...)
+FICLONE = 0x40049409
+# Leftovers of interrupted insertions/evictions older than this are removed
+STALE_TMP_DIR_AGE_IN_SECONDS = 24 * 3600
+
+
+def clone_file(source, destination):
+    # Copy-on-write clone where the file system supports it, hard link (or copy) otherwise
+    try:
+        with open(source, 'rb') as fin, open(destination, 'wb') as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+        return
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+    link_or_copy(source, destination)
+
+
+def clone_tree(source_dir, destination_dir, exclude=()):
+    for root, dirs, files in os.walk(source_dir):
+        target_dir = os.path.join(destination_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+                clone_file(os.path.join(root, name), os.path.join(target_dir, name))
+
+
+def get_tree_size(path, shared_dir=None):
+    # Allocated size (sparse input files take next to nothing), except for files that are hard links to the
+    # files of shared_dir (e.g., input files linked from the input data cache, which has its own bound)
+    shared_files = set()
+    if shared_dir and os.path.isdir(shared_dir):
+        shared_files = {(stat.st_dev, stat.st_ino) for stat in (entry.stat() for entry in os.scandir(shared_dir)
+                                                                if entry.is_file(follow_symlinks=False))}
+    size_in_bytes = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            stat = os.lstat(os.path.join(root, name))
+            if (stat.st_dev, stat.st_ino) not in shared_files:
+                size_in_bytes += stat.st_blocks * 512
+    return size_in_bytes
+
+
+class BenchmarkCache:
+    """Size-bounded cache of generated work dirs (benchmark JSON, input data, pegasus-workflow.py), keyed by
+    a hash of the parameters they were generated from. Entries are evicted least recently used first.
+
+    Entries are cloned into work dirs (and work dirs into entries) with copy-on-write clones where the file
+    system supports them, and hard links otherwise: neither the generated files nor the entries are modified
+    in place. Files linked from shared_dir (the input data cache) do not count toward the size of entries.
+
+    Concurrent runs (threads or processes) that need the same entry generate it once: see locked()."""
+
+    def __init__(self, cache_dir, max_size_in_bytes, shared_dir=None):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_in_bytes = max_size_in_bytes
+        self.shared_dir = shared_dir
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(**parameters):
+        return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+    @contextlib.contextmanager
+    def locked(self, key):
+        """Excludes other users of the same key (get, then generate and put if not cached) until exited.
+        flock() locks belong to open files: each call opens the lock file, so that other threads of this
+        process wait as well as other processes."""
+        with open(self.cache_dir.joinpath(key + LOCK_FILE_SUFFIX), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def get(self, key, work_dir):
+        """Clones the entry into work_dir, and returns the path of its benchmark JSON there (None if not cached)."""
+        entry_dir = self.cache_dir.joinpath(key)
+        with self.lock:
+            try:
+                with open(entry_dir.joinpath(ENTRY_FILE_NAME)) as f:
+                    entry = json.load(f)
+                # Most recently used
+                os.utime(entry_dir.joinpath(ENTRY_FILE_NAME))
+                clone_tree(entry_dir, work_dir, exclude=[ENTRY_FILE_NAME])
+            except FileNotFoundError:
+                # Not cached, or evicted by another process while being cloned
+                for path in work_dir.iterdir():
+                    if path.is_dir():
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                return None
+        return work_dir.joinpath(entry["benchmark_file"])
+
+    def put(self, key, work_dir, benchmark_path, parameters, exclude=()):
+        """Adds the contents of a freshly generated work dir (except files matching exclude)."""
+        tmp_dir = self.cache_dir.joinpath(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        clone_tree(work_dir, tmp_dir, exclude)
+        size_in_bytes = get_tree_size(tmp_dir, self.shared_dir)
+        if size_in_bytes > self.max_size_in_bytes:
+            shutil.rmtree(tmp_dir)
+            return
+        with open(tmp_dir.joinpath(ENTRY_FILE_NAME), 'w') as f:
+            json.dump({"parameters": parameters,
+                       "benchmark_file": os.path.relpath(benchmark_path, work_dir),
+                       "sizeInBytes": size_in_bytes}, f)
+        with self.lock:
+            try:
+                os.rename(tmp_dir, self.cache_dir.joinpath(key))
+            except OSError:
+                # Already cached (e.g., by another process)
+                shutil.rmtree(tmp_dir)
+            self.evict()
+
+    def get_entries(self):
+        """Returns (last use time, size, path, parameters) of each entry, least recently used first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir():
+                continue
+            if entry.name.endswith(".tmp"):
+                if time.time() - entry.stat().st_mtime > STALE_TMP_DIR_AGE_IN_SECONDS:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                continue
+            try:
+                entry_file_path = os.path.join(entry.path, ENTRY_FILE_NAME)
+                with open(entry_file_path) as f:
+                    info = json.load(f)
+                entries.append((os.stat(entry_file_path).st_mtime, info["sizeInBytes"], entry.path,
+                                info["parameters"]))
+            except (OSError, ValueError, KeyError):
+                continue
+        return sorted(entries)
+
+    @staticmethod
+    def remove(path):
+        # Moved aside first, so that the entry disappears at once
+        evicted_path = f"{path}.{os.getpid()}.evicted.tmp"
+        os.rename(path, evicted_path)
+        shutil.rmtree(evicted_path, ignore_errors=True)
+
+    def evict(self):
+        entries = self.get_entries()
+        total_size_in_bytes = sum(size for _, size, _, _ in entries)
+        for _, size, path, _ in entries:
+            if total_size_in_bytes <= self.max_size_in_bytes:
+                break
+            self.remove(path)
+            total_size_in_bytes -= size
+
+
+def main():
+    parser = ArgumentParser(description="List (or clear) the entries of a benchmark cache")
+    parser.add_argument("cache_dir", help="<benchmark cache dir>")
+    parser.add_argument("--clear", action='store_true', help="<remove all entries>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if not os.path.isdir(parsed_args.cache_dir):
+        sys.stderr.write("Error: cache directory '" + parsed_args.cache_dir + "' does not exist\n")
+        sys.exit(1)
+
+    cache = BenchmarkCache(parsed_args.cache_dir, 0)
+    if parsed_args.clear:
+        for _, _, path, _ in cache.get_entries():
+            cache.remove(path)
+        return
+    total_size_in_bytes = 0
+    for last_used, size, path, parameters in reversed(cache.get_entries()):
+        total_size_in_bytes += size
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))}  {size / 1e6:>10.1f}MB  "
+              f"{parameters['workflow']}-{parameters['num_tasks']}-{parameters['cpu_work']}-"
+              f"{parameters['cpu_fraction']}-{parameters['data_footprint']}")
+    print(f"Total: {total_size_in_bytes / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import shutil
+import pathlib
+import threading
+from argparse import ArgumentParser
+
+JOURNAL_FILE_NAME = ".campaign-journal.jsonl"
+# Archives and results are written here, and only moved into the output dir once complete
+PARTIAL_DIR_NAME = ".partial"
+
+# States of an experiment, in order ("discarded": interrupted, and cleaned up so that it runs again)
+experiment_states = ["planned", "generated", "submitted", "completed", "archived", "parsed", "discarded"]
+
+
+def fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def commit_file(tmp_path, path):
+    """Moves a fully written file into place, so that path is either absent or complete, even after a crash."""
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+class CampaignJournal:
+    """Write-ahead log of the state of the experiments of an output dir: each state change is appended
+    (and synced to disk) before the next step starts, so that a restarted campaign knows exactly how far
+    each experiment went."""
+
+    def __init__(self, output_dir):
+        self.output_dir = pathlib.Path(output_dir)
+        self.path = self.output_dir.joinpath(JOURNAL_FILE_NAME)
+        self.partial_dir = self.output_dir.joinpath(PARTIAL_DIR_NAME)
+        self.lock = threading.Lock()
+        self.entries = {}
+        # Whether the last record was cut short by a crash (the next one then starts on a new line, rather
+        # than being appended to it)
+        self.partial_last_line = False
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                content = f.read()
+            self.partial_last_line = not content.endswith(b"\n") and len(content) > 0
+            for line in content.splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Record cut short by a crash
+                    continue
+                self.entries.setdefault(entry["prefix"], {}).update(entry)
+
+    def record(self, prefix, state, **info):
+        entry = {"prefix": prefix, "state": state, "time": time.time(), **info}
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(("\n" if self.partial_last_line else "") + json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.partial_last_line = False
+            self.entries.setdefault(prefix, {}).update(entry)
+
+    def get_state(self, prefix):
+        return self.entries.get(prefix, {}).get("state")
+
+    def get(self, prefix):
+        """Returns everything recorded about an experiment (latest value of each field)."""
+        return self.entries.get(prefix, {})
+
+    def get_unfinished(self):
+        return [entry for entry in self.entries.values() if entry["state"] not in ["parsed", "discarded"]]
+
+    def get_partial_path(self, file_name):
+        self.partial_dir.mkdir(exist_ok=True)
+        return self.partial_dir.joinpath(file_name)
+
+    def clear_partial_files(self):
+        shutil.rmtree(self.partial_dir, ignore_errors=True)
+
+
+def main():
+    parser = ArgumentParser(description="Show the state of the experiments of an output dir")
+    parser.add_argument("output_dir", help="<output dir>")
+    parser.add_argument("-a", "--all", action='store_true', help="<also list finished experiments>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if not os.path.isdir(parsed_args.output_dir):
+        sys.stderr.write("Error: output directory '" + parsed_args.output_dir + "' does not exist\n")
+        sys.exit(1)
+
+    journal = CampaignJournal(parsed_args.output_dir)
+    counts = {state: 0 for state in experiment_states}
+    for prefix, entry in sorted(journal.entries.items()):
+        counts[entry["state"]] += 1
+        if parsed_args.all or entry["state"] not in ["parsed", "discarded"]:
+            print(f"{prefix:<60}{entry['state']:<12}{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))}")
+    print(", ".join(f"{count} {state}" for state, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
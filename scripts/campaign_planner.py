@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import os
+import math
+
+from results_catalog import ResultsCatalog
+from adaptive_trials import read_makespan
+
+# Number of earlier results an estimate is interpolated from
+NUM_NEIGHBORS = 3
+
+
+def get_features(num_tasks, cpu_work, cpu_fraction, data_footprint, num_compute_nodes):
+    # Parameters span orders of magnitude, so distances between experiments are measured on a log scale
+    return (math.log1p(num_tasks), math.log1p(cpu_work), cpu_fraction, math.log1p(data_footprint),
+            math.log1p(num_compute_nodes))
+
+
+def load_history(output_dirs, workflow, architecture):
+    """Returns the (features, makespan) of the results of the workflow on the architecture found in the
+    output dirs (whatever their number of compute nodes)."""
+    history = []
+    for output_dir in output_dirs:
+        if not os.path.isdir(output_dir):
+            continue
+        for result in ResultsCatalog(output_dir).query(workflow=workflow, architecture=architecture):
+            try:
+                makespan = read_makespan(os.path.join(output_dir, result["file_name"]))
+            except (OSError, ValueError, KeyError):
+                continue
+            history.append((get_features(result["num_tasks"], result["cpu_work"], result["cpu_fraction"],
+                                         result["data_footprint"], result["num_compute_nodes"]), makespan))
+    return history
+
+
+def estimate_makespan(history, features, default):
+    """Inverse-distance weighted mean of the makespans of the nearest earlier results (default if none)."""
+    if not history:
+        return default
+    neighbors = sorted((math.dist(features, other_features), makespan) for other_features, makespan in history)
+    neighbors = neighbors[:NUM_NEIGHBORS]
+    if neighbors[0][0] == 0.0:
+        exact = [makespan for distance, makespan in neighbors if distance == 0.0]
+        return sum(exact) / len(exact)
+    weights = [1.0 / distance for distance, _ in neighbors]
+    return sum(weight * makespan for weight, (_, makespan) in zip(weights, neighbors)) / sum(weights)
+
+
+def get_farthest_point_order(columns, order):
+    # Appends the other cells to order, farthest from the picked ones first (see get_coverage_order)
+    import numpy as np
+    columns = [np.array(column, dtype=np.int64) for column in columns]
+
+    def get_squared_distances(index):
+        return sum(np.square(column - column[index]) for column in columns)
+
+    # Squared distance of each cell to the nearest picked one, updated as cells are picked (-1 once picked)
+    min_distances = np.full(len(columns[0]), np.iinfo(np.int64).max)
+    for picked in order:
+        np.minimum(min_distances, get_squared_distances(picked), out=min_distances)
+    min_distances[order] = -1
+    for _ in range(len(columns[0]) - len(order)):
+        # Ties go to the first cell in sweep order
+        farthest = int(np.argmax(min_distances))
+        order.append(farthest)
+        np.minimum(min_distances, get_squared_distances(farthest), out=min_distances)
+        min_distances[farthest] = -1
+    return order
+
+
+def get_farthest_point_order_without_numpy(columns, order):
+    # Same as get_farthest_point_order, in pure Python (e.g., on submit nodes without NumPy)
+    def get_squared_distance(index, other_index):
+        return sum((column[index] - column[other_index]) ** 2 for column in columns)
+
+    picked = set(order)
+    min_distances = {index: min((get_squared_distance(index, other_index) for other_index in order),
+                                default=math.inf)
+                     for index in range(len(columns[0])) if index not in picked}
+    while min_distances:
+        # Ties go to the first cell in sweep order
+        farthest = max(min_distances, key=lambda index: (min_distances[index], -index))
+        del min_distances[farthest]
+        order.append(farthest)
+        for index in min_distances:
+            min_distances[index] = min(min_distances[index], get_squared_distance(index, farthest))
+    return order
+
+
+def get_coverage_order(cells):
+    """Returns the cells (tuples of parameter values) ordered so that any prefix covers the parameter space
+    as evenly as possible: the corners of the grid first, then, repeatedly, the cell farthest from the cells
+    already picked (on each parameter's grid, scaled to [0, 1])."""
+    if not cells:
+        return []
+    dimensions = range(len(cells[0]))
+    grids = [sorted(set(cell[d] for cell in cells)) for d in dimensions]
+    grid_positions = [{value: position for position, value in enumerate(grid)} for grid in grids]
+    # Integer coordinates (grids scaled to [0, scale] rather than [0, 1]), so that distances are exact
+    # and ties are broken the same way everywhere. Kept one column per parameter, which is faster to
+    # compute distances from than rows of cells
+    scale = math.lcm(*[max(1, len(grid) - 1) for grid in grids])
+    steps = [scale // max(1, len(grid) - 1) for grid in grids]
+    columns = [[grid_positions[d][cell[d]] * steps[d] for cell in cells] for d in dimensions]
+
+    corners = [index for index in range(len(cells)) if all(column[index] in (0, scale) for column in columns)]
+    try:
+        order = get_farthest_point_order(columns, corners)
+    except ImportError:
+        order = get_farthest_point_order_without_numpy(columns, corners)
+    return [cells[index] for index in order]
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import shlex
+import hashlib
+import pathlib
+import subprocess
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from results_catalog import parse_result_file_name
+from phase_timing import PHASES_FILE_SUFFIX
+
+# Each host gets a single SSH connection, shared by all the commands (status, rsync, checksums) sent to it
+SSH_COMMAND = "ssh -o ControlMaster=auto -o ControlPath=~/.ssh/wfbench-collect-%r@%h:%p -o ControlPersist=120 " \
+              "-o BatchMode=yes"
+# (patterns of the files to collect, patterns of the files among them not to collect), by command: result
+# .json's do not include the .phases.json files that come with them
+RESULT_FILE_PATTERNS = {"json": (["*.json"], ["*" + PHASES_FILE_SUFFIX]),
+                        "phases": (["*" + PHASES_FILE_SUFFIX], []),
+                        "archives": (["*.tar.gz", "*.tar.zst"], []),
+                        "all": (["*.json", "*.tar.gz", "*.tar.zst"], [])}
+RUNNING_MARKER = "#running"
+
+
+def run_remote(config, host, command, stdin=None):
+    proc = subprocess.run(shlex.split(config["ssh_command"]) + [config["user"] + "@" + host, command],
+                          input=stdin, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise Exception(f"{host}: '{command}' failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def get_host_status(config, host):
+    """Returns the result files (name -> size) on a host and whether experiments are running there,
+    using a single remote command."""
+    patterns = " -o ".join(f"-name '{pattern}'" for pattern in RESULT_FILE_PATTERNS["all"][0])
+    output = run_remote(config, host,
+                        f"cd {shlex.quote(config['remote_dir'])} 2>/dev/null && "
+                        f"find . -maxdepth 1 -type f \\( {patterns} \\) -printf '%f %s\\n'; "
+                        f"echo '{RUNNING_MARKER}' $(pgrep -fc '[r]un_all_experiments' || true)")
+    files = {}
+    running = False
+    for line in output.splitlines():
+        name, _, value = line.rpartition(" ")
+        if name == RUNNING_MARKER:
+            running = int(value) > 0
+        elif name:
+            files[name] = int(value)
+
+    status = {"host": host, "files": files, "running": running, "local_dir": None}
+    for name in sorted(files):
+        fields = parse_result_file_name(name)
+        if fields:
+            status["local_dir"] = pathlib.Path(config["local_dir"]).joinpath(
+                f"{fields['architecture']}-{fields['num_compute_nodes']}-compute-nodes")
+            break
+    return status
+
+
+def get_missing_files(status, patterns):
+    # Files that are not in the local directory yet, or only partially (e.g., interrupted transfer)
+    included_patterns, excluded_patterns = patterns
+    missing = []
+    for name, size in sorted(status["files"].items()):
+        if not any(pathlib.PurePath(name).match(pattern) for pattern in included_patterns) or \
+                any(pathlib.PurePath(name).match(pattern) for pattern in excluded_patterns):
+            continue
+        local_path = status["local_dir"].joinpath(name)
+        if not local_path.exists() or local_path.stat().st_size != size:
+            missing.append(name)
+    return missing
+
+
+def get_file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def collect_from_host(config, status, patterns):
+    """Transfers the missing result files of a host with a single rsync, then checks them against
+    their remote SHA-256 (files that do not match are removed, so that the next run fetches them again).
+    Returns the #s of transferred and corrupted files."""
+    missing = get_missing_files(status, patterns)
+    if not missing:
+        return 0, 0
+    status["local_dir"].mkdir(parents=True, exist_ok=True)
+    file_list = "".join(name + "\n" for name in missing)
+    proc = subprocess.run(["rsync", "--times", "--partial", "--files-from=-", "-e", config["ssh_command"],
+                           config["user"] + "@" + status["host"] + ":" + config["remote_dir"] + "/",
+                           str(status["local_dir"]) + "/"],
+                          input=file_list, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise Exception(f"{status['host']}: rsync failed: {proc.stderr.strip()}")
+
+    remote_digests = {}
+    output = run_remote(config, status["host"],
+                        f"cd {shlex.quote(config['remote_dir'])} && xargs -d '\\n' sha256sum --", stdin=file_list)
+    for line in output.splitlines():
+        digest, _, name = line.partition("  ")
+        remote_digests[name] = digest
+    num_corrupted = 0
+    for name in missing:
+        local_path = status["local_dir"].joinpath(name)
+        if get_file_digest(local_path) != remote_digests.get(name):
+            sys.stderr.write(f"{status['host']}: checksum mismatch for {name}. [REMOVED]\n")
+            os.remove(local_path)
+            num_corrupted += 1
+    return len(missing) - num_corrupted, num_corrupted
+
+
+def push_to_host(config, status):
+    """Copies the local result files of a host's testbed (but not the archives or phase files) back to the host."""
+    if not status["local_dir"].is_dir():
+        return
+    proc = subprocess.run(["rsync", "--times", "-r", "--exclude", "*.tar.gz", "--exclude", "*.tar.zst",
+                           "--exclude", "*" + PHASES_FILE_SUFFIX,
+                           "-e", config["ssh_command"], str(status["local_dir"]) + "/",
+                           config["user"] + "@" + status["host"] + ":" + config["remote_dir"] + "/"],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise Exception(f"{status['host']}: rsync failed: {proc.stderr.strip()}")
+
+
+def count_local_files(status):
+    if status["local_dir"] is None or not status["local_dir"].is_dir():
+        return 0
+    return sum(1 for entry in os.scandir(status["local_dir"]) if parse_result_file_name(entry.name))
+
+
+def print_status(statuses):
+    for status in statuses:
+        if "error" in status:
+            print(f"  - {status['host'] + ': ':<19}{status['error']}")
+            continue
+        if status["local_dir"] is None:
+            architecture, num_compute_nodes = "?", "?"
+        else:
+            architecture, num_compute_nodes = status["local_dir"].name.split("-")[:2]
+        num_remote_files = sum(1 for name in status["files"] if parse_result_file_name(name))
+        print(f"  - {status['host'] + ': ':<19}{architecture:<11}  {num_compute_nodes} compute nodes "
+              f"({num_remote_files} remote files, {count_local_files(status)} local files, "
+              f"*{'RUNNING' if status['running'] else 'NOT RUNNING'}*)")
+
+
+def main():
+    parser = ArgumentParser(description="Collect result files from the submit nodes of several testbeds")
+    parser.add_argument("command", choices=["status"] + list(RESULT_FILE_PATTERNS.keys()) + ["push"],
+                        help="<status: print what each host has | json: fetch missing result .json's | "
+                             "phases: fetch missing .phases.json's | archives: fetch missing "
+                             ".tar.gz's/.tar.zst's | all: fetch all of them | push: copy local result .json's "
+                             "back TO hosts>")
+    parser.add_argument("hosts", nargs='+', help="<submit node IP/host name>")
+    parser.add_argument("--user", default="cc", help="<remote user>")
+    parser.add_argument("--remote_dir", default="/home/cc/tracing_output", help="<remote output dir>")
+    parser.add_argument("--local_dir", default=".",
+                        help="<dir under which <arch>-<#nodes>-compute-nodes dirs are kept>")
+    parser.add_argument("--ssh_command", default=SSH_COMMAND,
+                        help="<command used to run commands on hosts (also passed to rsync -e)>")
+    parser.add_argument("-j", "--num_concurrent_hosts", type=int, default=16,
+                        help="<# of hosts handled concurrently>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if parsed_args.num_concurrent_hosts < 1:
+        sys.stderr.write("Error: invalid -j/--num_concurrent_hosts value\n")
+        sys.exit(1)
+    if not os.path.isdir(parsed_args.local_dir):
+        sys.stderr.write("Error: local directory '" + parsed_args.local_dir + "' does not exist\n")
+        sys.exit(1)
+    pathlib.Path(os.path.expanduser("~/.ssh")).mkdir(mode=0o700, exist_ok=True)
+
+    config = {"user": parsed_args.user,
+              "remote_dir": parsed_args.remote_dir,
+              "local_dir": parsed_args.local_dir,
+              "ssh_command": parsed_args.ssh_command}
+
+    def get_status(host):
+        try:
+            return get_host_status(config, host)
+        except Exception as e:
+            return {"host": host, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=parsed_args.num_concurrent_hosts) as executor:
+        statuses = list(executor.map(get_status, parsed_args.hosts))
+        print_status(statuses)
+        if parsed_args.command == "status":
+            sys.exit(1 if any("error" in status for status in statuses) else 0)
+
+        # Hosts without any result file have nothing to collect (and no local dir)
+        reachable = [status for status in statuses if "error" not in status]
+        if parsed_args.command == "push":
+            futures = {status["host"]: executor.submit(push_to_host, config, status)
+                       for status in reachable if status["local_dir"] is not None}
+        else:
+            futures = {status["host"]: executor.submit(collect_from_host, config, status,
+                                                       RESULT_FILE_PATTERNS[parsed_args.command])
+                       for status in reachable if status["local_dir"] is not None}
+        num_failures = len(statuses) - len(reachable)
+        for host, future in futures.items():
+            try:
+                if parsed_args.command == "push":
+                    future.result()
+                    print(f"{host}: pushed")
+                    continue
+                num_transferred, num_corrupted = future.result()
+                print(f"{host}: {num_transferred} files transferred" +
+                      (f", {num_corrupted} corrupted" if num_corrupted else ""))
+                num_failures += 1 if num_corrupted else 0
+            except Exception as e:
+                sys.stderr.write(f"{e}\n")
+                num_failures += 1
+
+    if num_failures:
+        sys.stderr.write(f"Error: collection failed or was incomplete for {num_failures} host(s)\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import shutil
+import threading
+import pathlib
+
+CHUNK_SIZE_IN_BYTES = 4 * 1024 * 1024
+input_data_modes = ["random", "sparse", "fallocate"]
+
+
+def get_random_chunk_generator(seed):
+    # NumPy's PCG64 raw output is several times faster than os.urandom or random.randbytes,
+    # which are used when NumPy is not installed (random.randbytes requires Python 3.9)
+    try:
+        import numpy as np
+    except ImportError:
+        rng = random.Random(seed)
+        return rng.randbytes if hasattr(rng, "randbytes") else os.urandom
+    bit_generator = np.random.PCG64(seed)
+    return lambda chunk_size: bit_generator.random_raw((chunk_size + 7) // 8).view(np.uint8)[:chunk_size]
+
+
+def write_random_file(path, size_in_bytes, seed=0):
+    # Incompressible contents, generated (and written) one chunk at a time
+    with open(path, 'wb') as fout:
+        if size_in_bytes <= 0:
+            return
+        get_random_chunk = get_random_chunk_generator(seed)
+        remaining = size_in_bytes
+        while remaining > 0:
+            chunk_size = min(CHUNK_SIZE_IN_BYTES, remaining)
+            fout.write(get_random_chunk(chunk_size))
+            remaining -= chunk_size
+
+
+def write_sparse_file(path, size_in_bytes):
+    # Zero-filled file that does not use any disk block
+    with open(path, 'wb') as fout:
+        fout.truncate(size_in_bytes)
+
+
+def write_fallocated_file(path, size_in_bytes):
+    # Zero-filled file whose disk blocks are allocated up-front, without writing them
+    with open(path, 'wb') as fout:
+        if size_in_bytes > 0:
+            try:
+                os.posix_fallocate(fout.fileno(), 0, size_in_bytes)
+            except OSError:
+                fout.truncate(size_in_bytes)
+
+
+def link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        # e.g., cache and work dir on different file systems (copyfile uses
+        # copy_file_range/sendfile, which reflink-capable file systems can clone)
+        shutil.copyfile(source, destination)
+
+
+def evict_input_files(cache_dir, max_size_in_bytes):
+    # Least recently used first (cached files are touched on each use)
+    files = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.startswith("random-") and entry.name.endswith(".bin"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_blocks * 512, entry.path))
+    total_size_in_bytes = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total_size_in_bytes <= max_size_in_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size_in_bytes -= size
+
+
+def materialize_input_file(path, size_in_bytes, mode="random", cache_dir=None, cache_max_size_in_bytes=None):
+    """Creates the input file at path, with size_in_bytes bytes of random data (mode="random"),
+    or of zeros (mode="sparse" or "fallocate") for runs in which contents do not matter.
+
+    Random files are generated once per size in cache_dir, if any, and then hard-linked
+    (or copied) into place, so that trials do not pay for generating them again. The least
+    recently used ones are removed once the cache holds more than cache_max_size_in_bytes."""
+    if mode == "sparse":
+        write_sparse_file(path, size_in_bytes)
+    elif mode == "fallocate":
+        write_fallocated_file(path, size_in_bytes)
+    elif mode == "random":
+        if not cache_dir or (cache_max_size_in_bytes is not None and size_in_bytes > cache_max_size_in_bytes):
+            write_random_file(path, size_in_bytes)
+            return
+        cache_dir = pathlib.Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cached_path = cache_dir.joinpath(f"random-{size_in_bytes}.bin")
+        try:
+            # Most recently used
+            os.utime(cached_path)
+            link_or_copy(cached_path, path)
+            return
+        except FileNotFoundError:
+            # Not cached, or evicted in the meantime
+            pass
+        # Write aside and rename, so that concurrent runs never link a partial file
+        tmp_path = cache_dir.joinpath(f"random-{size_in_bytes}.bin.{os.getpid()}.{threading.get_ident()}.tmp")
+        write_random_file(tmp_path, size_in_bytes)
+        os.replace(tmp_path, cached_path)
+        link_or_copy(cached_path, path)
+        if cache_max_size_in_bytes is not None:
+            evict_input_files(cache_dir, cache_max_size_in_bytes)
+    else:
+        raise Exception(f"Unknown input data mode {mode}")
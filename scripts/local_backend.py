@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import shlex
+import socket
+import getpass
+import pathlib
+import platform
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from input_data import link_or_copy
+from pegasus_yaml import get_pegasus_argument
+
+# Stand-in for the Pegasus submit dir (work/cc/pegasus/.../run0001)
+RUN_DIR_PATH = "local/run0001"
+# Where tasks run, with their input and output files (not archived, unlike the run dir)
+SCRATCH_DIR_PATH = "local-scratch"
+TASKS_FILE_NAME = "local-tasks.json"
+
+
+def get_task_command(task):
+    # Same arguments as the Pegasus job, split the way HTCondor splits them
+    arguments = " ".join(get_pegasus_argument(argument) for argument in task["command"]["arguments"])
+    return [task["command"]["program"]] + shlex.split(arguments)
+
+
+def run_task(task, run_dir, scratch_dir, env):
+    start = time.time()
+    with open(run_dir.joinpath(task["name"] + ".out"), 'w') as fout, \
+            open(run_dir.joinpath(task["name"] + ".err"), 'w') as ferr:
+        proc = subprocess.Popen(get_task_command(task), cwd=scratch_dir, stdout=fout, stderr=ferr, env=env)
+        # wait4() rather than wait(), for the resource usage of the task (and of the processes it waited for)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    end = time.time()
+    return {"name": task["name"],
+            "start": start,
+            "end": end,
+            "exitCode": proc.returncode,
+            "cpuTimeInSeconds": rusage.ru_utime + rusage.ru_stime,
+            "maxRssInKB": rusage.ru_maxrss}
+
+
+def get_run_dir(work_dir):
+    # The run dir is renamed after the run (<prefix>-<timestamp>) before being archived: a run that was
+    # interrupted after that is found under its new name
+    run_dirs = [path for path in work_dir.joinpath(RUN_DIR_PATH).parent.glob("*") if path.is_dir()]
+    return run_dirs[0] if len(run_dirs) == 1 else None
+
+
+def run_local_workflow(work_dir, benchmark_path, cpu_benchmark_dir, num_cores):
+    """Runs the tasks of a benchmark on this machine, num_cores at a time, each as soon as its parents have
+    completed (tasks whose parents failed do not run, as with DAGMan). Task logs and resource usage are
+    written to the run dir (see build_instance). Returns the times of run-workflow.sh that apply, and raises
+    if any task failed or did not run."""
+    times = {"start": time.time()}
+    with open(benchmark_path) as f:
+        tasks = {task["name"]: task for task in json.load(f)["workflow"]["tasks"]}
+
+    # Tasks all run in a scratch dir, which holds the input files and cpu-benchmark, as a Pegasus shared
+    # scratch dir would. The run dir, which gets archived, only holds logs
+    run_dir = work_dir.joinpath(RUN_DIR_PATH)
+    run_dir.mkdir(parents=True)
+    scratch_dir = work_dir.joinpath(SCRATCH_DIR_PATH)
+    scratch_dir.mkdir()
+    for path in list(work_dir.glob("*.txt")) + list(work_dir.glob("data/*")):
+        link_or_copy(path, scratch_dir.joinpath(path.name))
+    link_or_copy(pathlib.Path(cpu_benchmark_dir).joinpath("cpu-benchmark"), scratch_dir.joinpath("cpu-benchmark"))
+    env = dict(os.environ, PATH="/usr/bin:/bin:.")
+
+    num_pending_parents = {name: len(task["parents"]) for name, task in tasks.items()}
+    records = []
+    with ThreadPoolExecutor(max_workers=num_cores) as executor:
+        times["dagman_started"] = time.time()
+        running = {executor.submit(run_task, task, run_dir, scratch_dir, env): name
+                   for name, task in tasks.items() if not task["parents"]}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                record = future.result()
+                records.append(record)
+                if record["exitCode"] != 0:
+                    continue
+                for child in tasks[name]["children"]:
+                    num_pending_parents[child] -= 1
+                    if num_pending_parents[child] == 0:
+                        running[executor.submit(run_task, tasks[child], run_dir, scratch_dir, env)] = child
+    times["dag_finished"] = time.time()
+
+    exit_status = 0 if len(records) == len(tasks) and all(record["exitCode"] == 0 for record in records) else 1
+    with open(run_dir.joinpath(TASKS_FILE_NAME), 'w') as f:
+        json.dump({"hostName": socket.gethostname(), "numCores": num_cores, "exitStatus": exit_status,
+                   "tasks": records}, f, indent=4)
+    times["completed"] = time.time()
+    times["dagman_exit_status"] = exit_status
+    if exit_status != 0:
+        num_failed = sum(1 for record in records if record["exitCode"] != 0)
+        raise Exception(f"{num_failed} task(s) failed, {len(tasks) - len(records)} did not run")
+    return times
+
+
+def build_instance(run_dir, benchmark_path, name):
+    """Returns the WfCommons instance (same shape as PegasusLogsParser's) of a local run."""
+    with open(benchmark_path) as f:
+        benchmark = json.load(f)
+    with open(run_dir.joinpath(TASKS_FILE_NAME)) as f:
+        run = json.load(f)
+    return make_instance(benchmark, run, name)
+
+
+def make_instance(benchmark, run, name):
+    # From the benchmark JSON and the contents of the run's TASKS_FILE_NAME
+    tasks = benchmark["workflow"]["tasks"]
+    files = {}
+    for task in tasks:
+        for file in task["files"]:
+            files[file["name"]] = file["sizeInBytes"]
+    specification_tasks = [{"name": task["name"],
+                            "id": task["name"],
+                            "parents": task["parents"],
+                            "children": task["children"],
+                            "inputFiles": [file["name"] for file in task["files"] if file["link"] == "input"],
+                            "outputFiles": [file["name"] for file in task["files"] if file["link"] == "output"]}
+                           for task in tasks]
+
+    commands = {task["name"]: task["command"] for task in tasks}
+    cores = {task["name"]: task.get("cores", 1) for task in tasks}
+    execution_tasks = []
+    for record in run["tasks"]:
+        runtime = record["end"] - record["start"]
+        execution_tasks.append({"id": record["name"],
+                                "runtimeInSeconds": runtime,
+                                "executedAt": datetime.fromtimestamp(record["start"]).astimezone()
+                                .strftime("%Y%m%dT%H%M%S%z"),
+                                "command": commands[record["name"]],
+                                "coreCount": cores[record["name"]],
+                                "avgCPU": record["cpuTimeInSeconds"] * 100 / runtime if runtime > 0 else 0,
+                                "memoryInBytes": record["maxRssInKB"] * 1024,
+                                "exitCode": record["exitCode"],
+                                "machines": [run["hostName"]]})
+    start = min((record["start"] for record in run["tasks"]), default=0)
+    end = max((record["end"] for record in run["tasks"]), default=0)
+
+    return {
+        "name": name,
+        "description": "Trace of a local run of a WfCommons benchmark (local backend of run_experiments.py)",
+        "createdAt": str(datetime.utcnow().isoformat()),
+        "schemaVersion": "1.5",
+        "author": {
+            "name": str(getpass.getuser()),
+            "email": "support@wfcommons.org"
+        },
+        "wms": {
+            "name": "local",
+            "version": "1.0"
+        },
+        "workflow": {
+            "specification": {
+                "tasks": specification_tasks,
+                "files": [{"id": file_name, "sizeInBytes": size} for file_name, size in files.items()]
+            },
+            "execution": {
+                "makespanInSeconds": end - start,
+                "executedAt": datetime.fromtimestamp(start).astimezone().strftime("%Y%m%dT%H%M%S%z"),
+                "tasks": execution_tasks,
+                "machines": [{
+                    "nodeName": run["hostName"],
+                    "system": platform.system().lower(),
+                    "architecture": platform.machine(),
+                    "release": platform.release(),
+                    "cpu": {"coreCount": os.cpu_count()}
+                }]
+            }
+        }
+    }
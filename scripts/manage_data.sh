@@ -4,31 +4,11 @@ set -e
 
 IPs="129.114.108.220 129.114.109.104 129.114.109.38 129.114.109.82 129.114.109.189 129.114.108.237 129.114.109.219 129.114.109.41 129.114.109.111"
 
-declare -A IP_DIR_MAP
+# All nodes are queried (and copied from) concurrently, over one SSH connection per node
+COLLECT="python3 $(dirname "$0")/collect_data.py"
 
 echo "These IPs below are hardcoded into the script:"
-for IP in $IPs; do
-	NUMFILEFOUND=$(ssh cc@"$IP" ls 'tracing_output/*.json' | wc -l)
-	FILEFOUND=$(ssh cc@"$IP" ls 'tracing_output/*.json' | head -1)
-	ACTIVE=$(ssh cc@$IP ps auxww | grep run_all_ex | wc -l)
-	ARCHITECTURE=$(echo "$FILEFOUND" | sed 's/[^-]*-[^-]*-[^-]*-[^-]*-[^-]*-\([^-]*\)-.*/\1/')
-	NUM_COMPUTE_NODES=$(echo "$FILEFOUND" | sed 's/[^-]*-[^-]*-[^-]*-[^-]*-[^-]*-[^-]*-\([^-]*\)-.*/\1/')
-	ACTIVE_STRING=""
-	if [ "$ACTIVE" -eq "1" ]; then
-	  ACTIVE_STRING="RUNNING"
-	else
-	  ACTIVE_STRING="NOT RUNNING"
-	fi
-	DIRNAME="./$ARCHITECTURE-$NUM_COMPUTE_NODES-compute-nodes"
-	NUMLOCALFILEFOUND=$(find "$DIRNAME" -name '*.json' | wc -l)
-	printf '  - %-*s' 19 "$IP: "
-	printf '%-*s' 11 "$ARCHITECTURE"
-	echo "  $NUM_COMPUTE_NODES compute nodes ($NUMFILEFOUND remote files, $NUMLOCALFILEFOUND local files, *$ACTIVE_STRING*)"
-	IP_DIR_MAP["$IP"]="$DIRNAME"
-	if [ ! -d "$DIRNAME" ]; then
-  	  mkdir "$DIRNAME"
-	fi
-done
+$COLLECT status $IPs || true
 
 
 echo ""
@@ -40,9 +20,16 @@ then
 fi
 
 declare -A OPERATION_MAP
-OPERATION_MAP["1"]="Rsync all .json's FROM IPs"
-OPERATION_MAP["2"]="Rsync all .tar.gz's FROM IPs"
-OPERATION_MAP["3"]="Rsync all .json's and .tar.gz's FROM IPs"
+OPERATION_MAP["1"]="Copy missing result .json's FROM IPs"
+OPERATION_MAP["2"]="Copy missing .tar.gz's/.tar.zst's FROM IPs"
+OPERATION_MAP["3"]="Copy missing .json's (including .phases.json's) and .tar.gz's/.tar.zst's FROM IPs"
+OPERATION_MAP["4"]="Copy all result .json's TO IPs"
+
+declare -A COMMAND_MAP
+COMMAND_MAP["1"]="json"
+COMMAND_MAP["2"]="archives"
+COMMAND_MAP["3"]="all"
+COMMAND_MAP["4"]="push"
 
 NUM_OPS=${#OPERATION_MAP[@]}
 
@@ -63,17 +50,16 @@ while true; do
   else
     # The input is invalid, print an error message and try again
     echo ""
-    echo "Error: Input must be a number between 1 and 4"
+    echo "Error: Input must be a number between 1 and $NUM_OPS"
   fi
 done
 
 
-SELECTED_IPs=$IPs
-
-echo "About to do: ${OPERATION_MAP[$SELECTED_OPERATION]} for the following:"
-for IP in $SELECTED_IPs; do
-  echo "  - $IP (${IP_DIR_MAP[$IP]})"
-done
+if [ "$SELECTED_OPERATION" = "4" ]; then
+  echo "About to do: ${OPERATION_MAP[$SELECTED_OPERATION]} (from ./<arch>-<#nodes>-compute-nodes/)"
+else
+  echo "About to do: ${OPERATION_MAP[$SELECTED_OPERATION]} (into ./<arch>-<#nodes>-compute-nodes/, checksums verified)"
+fi
 
 echo ""
 read -p "Are you sure? [y/n] " -n 1 -r
@@ -84,24 +70,4 @@ then
 fi
 
 # Do the work
-for IP in $SELECTED_IPs; do
-  case $SELECTED_OPERATION in
-    "1")
-      rsync --times -vr --exclude '*.tar.gz' cc@"$IP":/home/cc/tracing_output/ ./"${IP_DIR_MAP[$IP]}"/
-      ;;
-    "2")
-      rsync --times -vr --exclude '*.json' cc@"$IP":/home/cc/tracing_output/ ./"${IP_DIR_MAP[$IP]}"/
-      ;;
-    "3")
-      rsync --times -vr cc@"$IP":/home/cc/tracing_output/ ./"${IP_DIR_MAP[$IP]}"/
-      ;;
-    "4")
-      rsync --times -vr --exclude '*.tar.gz' ./"${IP_DIR_MAP[$IP]}"/ cc@"$IP":/home/cc/tracing_output/
-      ;;
-    *)
-      echo "FATAL ERROR: UNKNOWN OPERATION"
-      ;;
-  esac
-done
-
-
+$COLLECT "${COMMAND_MAP[$SELECTED_OPERATION]}" $IPs
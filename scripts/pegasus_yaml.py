@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import json
+import shutil
+import getpass
+from datetime import datetime
+
+
+def quote(value):
+    # JSON strings are valid YAML double-quoted scalars
+    return json.dumps(str(value))
+
+
+def get_pegasus_argument(argument):
+    # Same quoting as PegasusTranslator (the --out dict must reach wfbench as a single JSON argument)
+    if "--out" not in argument:
+        return argument.replace("'", "\"")
+    return argument.replace("{", "\"{").replace("}", "}\"").replace("'", "\\\"").replace(": ", ":")
+
+
+def write_pegasus_workflow(benchmark_path, work_dir):
+    """Writes the Pegasus YAML workflow (with its replica and transformation catalogs) of a benchmark JSON
+    into work_dir, and returns its path.
+
+    The workflow is the one that PegasusTranslator's pegasus-workflow.py would write when run from work_dir
+    (same transformations, jobs, files and dependencies), without generating and running that script. This
+    only holds for synthetic benchmarks (one category, inputs of non-root tasks all produced by their parents):
+    run_experiments.py does not use it for WfBench-generated ones."""
+    with open(benchmark_path) as f:
+        benchmark = json.load(f)
+    tasks = benchmark["workflow"]["tasks"]
+    work_dir_path = str(work_dir.absolute())
+
+    output_files = {task["name"]: [file["name"] for file in task["files"] if file["link"] == "output"]
+                    for task in tasks}
+    # PegasusTranslator names transformations after task categories (which synthetic benchmarks do not set)
+    categories = {}
+    for task in tasks:
+        category = str(task.get("category"))
+        if category not in categories:
+            if shutil.which(task["command"]["program"]) is None:
+                raise Exception(f"Unable to find {task['command']['program']}")
+            categories[category] = task["command"]["program"]
+
+    yaml_path = work_dir.joinpath(f"{benchmark['name']}-benchmark-workflow.yml")
+    with open(yaml_path, 'w') as fout:
+        fout.write("x-pegasus:\n"
+                   "  apiLang: python\n"
+                   f"  createdBy: {quote(getpass.getuser())}\n"
+                   f"  createdOn: {quote(datetime.now().strftime('%m-%d-%y %H:%M:%S'))}\n"
+                   "pegasus: '5.0'\n"
+                   f"name: {quote(benchmark['name'])}\n")
+
+        fout.write("replicaCatalog:\n"
+                   "  replicas:\n" if any(not task["parents"] for task in tasks) else "")
+        for task in tasks:
+            if not task["parents"]:
+                for file in task["files"]:
+                    if file["link"] == "input":
+                        fout.write(f"  - lfn: {quote(file['name'])}\n"
+                                   "    pfns:\n"
+                                   "    - site: local\n"
+                                   f"      pfn: {quote('file://' + work_dir_path + '/data/' + file['name'])}\n")
+
+        fout.write("transformationCatalog:\n"
+                   "  transformations:\n"
+                   "  - name: cpu-benchmark\n"
+                   "    sites:\n"
+                   "    - name: local\n"
+                   f"      pfn: {quote(work_dir_path + '/cpu-benchmark')}\n"
+                   "      type: stageable\n")
+        for category, program in categories.items():
+            fout.write(f"  - name: {quote(category)}\n"
+                       "    requires:\n"
+                       "    - cpu-benchmark\n"
+                       "    sites:\n"
+                       "    - name: local\n"
+                       f"      pfn: {quote(program)}\n"
+                       "      type: stageable\n"
+                       "    profiles:\n"
+                       "      env:\n"
+                       "        PATH: /usr/bin:/bin:.\n"
+                       "      condor:\n"
+                       "        request_disk: '10'\n")
+
+        fout.write("jobs:\n")
+        for task in tasks:
+            fout.write("- type: job\n"
+                       f"  name: {quote(task.get('category'))}\n"
+                       f"  id: {quote(task['name'])}\n"
+                       "  arguments:\n")
+            for argument in task["command"]["arguments"]:
+                fout.write(f"  - {quote(get_pegasus_argument(argument))}\n")
+            # Root tasks read their input files, the others read all the outputs of their parents
+            if not task["parents"]:
+                input_files = [file["name"] for file in task["files"] if file["link"] == "input"]
+            else:
+                input_files = list(dict.fromkeys(name for parent in task["parents"] for name in output_files[parent]))
+            if input_files or output_files[task["name"]]:
+                fout.write("  uses:\n")
+            for name in input_files:
+                fout.write(f"  - lfn: {quote(name)}\n"
+                           "    type: input\n")
+            stage_out = "true" if not task["children"] else "false"
+            for name in output_files[task["name"]]:
+                fout.write(f"  - lfn: {quote(name)}\n"
+                           "    type: output\n"
+                           f"    stageOut: {stage_out}\n"
+                           f"    registerReplica: {stage_out}\n")
+
+        if any(task["children"] for task in tasks):
+            fout.write("jobDependencies:\n")
+        for task in tasks:
+            if task["children"]:
+                fout.write(f"- id: {quote(task['name'])}\n"
+                           "  children:\n")
+                for child in task["children"]:
+                    fout.write(f"  - {quote(child)}\n")
+    return yaml_path
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import resource
+import contextlib
+from argparse import ArgumentParser
+
+PHASES_FILE_SUFFIX = ".phases.json"
+
+# Phases of run-workflow.sh, as (name, start time, end time) of the times it records
+workflow_script_phases = [("yaml_generation", "start", "workflow_generated"),
+                          ("pegasus_plan", "plan_start", "submitted"),
+                          ("dagman_startup", "submitted", "dagman_started"),
+                          ("workflow_execution", "dagman_started", "dag_finished"),
+                          ("monitoring", "dag_finished", "completed")]
+
+
+def get_max_rss_so_far_in_kb():
+    # High-water marks of RSS (kB on Linux) of this process, and of its largest finished child process, since
+    # they started: not peaks of the current phase (e.g., the phases of concurrent runs, or of later runs,
+    # inherit them)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+
+class PhaseTimer:
+    """Records the (monotonic) start time and duration of the phases of an experiment. Each phase also
+    records the RSS high-water marks of run_experiments.py and of its largest finished child process when it
+    ended, which are process-wide: not what the phase itself used."""
+
+    def __init__(self):
+        self.phases = []
+
+    def add(self, name, start, end, parent=None):
+        max_rss_so_far_in_kb, children_max_rss_so_far_in_kb = get_max_rss_so_far_in_kb()
+        phase = {"name": name,
+                 "start": start,
+                 "durationInSeconds": end - start,
+                 "processMaxRssSoFarInKB": max_rss_so_far_in_kb,
+                 "childrenMaxRssSoFarInKB": children_max_rss_so_far_in_kb}
+        if parent:
+            # Part of another phase (and thus not counted in totals)
+            phase["parent"] = parent
+        self.phases.append(phase)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.monotonic())
+
+    def add_workflow_script_times(self, times, wall_clock_start, monotonic_start, parent):
+        # run-workflow.sh records wall-clock times: map them onto the monotonic clock
+        for name, start_key, end_key in workflow_script_phases:
+            if times.get(start_key) is not None and times.get(end_key) is not None:
+                self.add(name, times[start_key] - wall_clock_start + monotonic_start,
+                         times[end_key] - wall_clock_start + monotonic_start, parent)
+
+    def write(self, path, prefix):
+        with open(path, 'w') as f:
+            json.dump({"prefix": prefix, "phases": self.phases}, f, indent=4)
+
+
+def get_phases_path(result_path):
+    return str(result_path)[:-len(".json")] + PHASES_FILE_SUFFIX
+
+
+def summarize(output_dir):
+    """Returns per-phase statistics (#runs, total/mean/max duration, and the highest RSS high-water marks of
+    run_experiments.py and of its children at the end of the phase) over the phase files of an output dir, in
+    the order in which phases first appear."""
+    summary = {}
+    for entry in sorted(os.scandir(output_dir), key=lambda entry: entry.name):
+        if not entry.name.endswith(PHASES_FILE_SUFFIX):
+            continue
+        with open(entry.path) as f:
+            phases = json.load(f)["phases"]
+        for phase in phases:
+            stats = summary.setdefault(phase["name"], {"count": 0, "total": 0.0, "max": 0.0,
+                                                       "processMaxRssSoFarInKB": 0, "childrenMaxRssSoFarInKB": 0,
+                                                       "parent": phase.get("parent")})
+            stats["count"] += 1
+            stats["total"] += phase["durationInSeconds"]
+            stats["max"] = max(stats["max"], phase["durationInSeconds"])
+            # (Named maxRssInKB/childrenMaxRssInKB in earlier phase files)
+            stats["processMaxRssSoFarInKB"] = max(stats["processMaxRssSoFarInKB"],
+                                                  phase.get("processMaxRssSoFarInKB", phase.get("maxRssInKB", 0)))
+            stats["childrenMaxRssSoFarInKB"] = max(stats["childrenMaxRssSoFarInKB"],
+                                                   phase.get("childrenMaxRssSoFarInKB",
+                                                             phase.get("childrenMaxRssInKB", 0)))
+    return summary
+
+
+def main():
+    parser = ArgumentParser(description="Show where the time of the experiments of an output dir goes")
+    parser.add_argument("output_dir", help="<output dir>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if not os.path.isdir(parsed_args.output_dir):
+        sys.stderr.write("Error: output directory '" + parsed_args.output_dir + "' does not exist\n")
+        sys.exit(1)
+
+    summary = summarize(parsed_args.output_dir)
+    if not summary:
+        sys.stderr.write("Error: no " + PHASES_FILE_SUFFIX + " files in '" + parsed_args.output_dir + "'\n")
+        sys.exit(1)
+    total = sum(stats["total"] for stats in summary.values() if not stats["parent"])
+    print(f"{'phase':<20}{'#runs':>7}{'total (h)':>11}{'mean (s)':>10}{'max (s)':>10}{'share':>8}"
+          f"{'harness RSS so far (MB)':>25}{'children RSS so far (MB)':>26}")
+    for name, stats in summary.items():
+        name = "  " + name if stats["parent"] else name
+        # (No share when all top-level phases took no time)
+        share = f"{stats['total'] * 100 / total:>7.1f}%" if total else f"{'-':>8}"
+        print(f"{name:<20}{stats['count']:>7}{stats['total'] / 3600:>11.2f}{stats['total'] / stats['count']:>10.1f}"
+              f"{stats['max']:>10.1f}{share}{stats['processMaxRssSoFarInKB'] / 1024:>25.1f}"
+              f"{stats['childrenMaxRssSoFarInKB'] / 1024:>26.1f}")
+    print(f"{'total':<20}{'':>7}{total / 3600:>11.2f}")
+    print("(RSS: highest high-water mark of run_experiments.py, and of its largest finished child process, at the "
+          "end of the phase; process-wide, so not the memory used by the phase itself)")
+
+
+if __name__ == "__main__":
+    main()
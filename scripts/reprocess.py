@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import shutil
+import pathlib
+import tempfile
+import importlib.util
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import local_backend
+from archive import archive_formats, iter_archive_members
+from campaign_journal import commit_file
+from results_catalog import parse_result_file_name
+
+
+def get_result_name(archive_name):
+    for extension in archive_formats.values():
+        if archive_name.endswith(extension):
+            return archive_name[:-len(extension)] + ".json"
+    return None
+
+
+def get_parser_mtime():
+    # Results older than the code that parses archives (e.g., after upgrading WfCommons) are out of date.
+    # WfCommons is located without being imported
+    mtimes = [os.stat(local_backend.__file__).st_mtime]
+    spec = importlib.util.find_spec("wfcommons")
+    if spec and spec.submodule_search_locations:
+        for root, dirs, files in os.walk(os.path.join(spec.submodule_search_locations[0], "wfinstances")):
+            mtimes += [os.stat(os.path.join(root, name)).st_mtime for name in files if name.endswith(".py")]
+    return max(mtimes)
+
+
+def find_archives(paths):
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            archives += sorted(entry.path for entry in os.scandir(path)
+                               if entry.is_file() and parse_result_file_name(get_result_name(entry.name) or ""))
+        else:
+            archives.append(path)
+    return archives
+
+
+def reprocess_archive(archive_path, result_path, scratch_dir):
+    """Parses an archived run dir into result_path. Archive members are streamed: local backend runs are
+    parsed from memory, Pegasus submit dirs are written to a scratch dir (on a tmpfs, preferably) for
+    PegasusLogsParser, which reads a directory."""
+    start = time.monotonic()
+    with tempfile.TemporaryDirectory(dir=scratch_dir) as tmp_dir:
+        # Top-level JSON files (the benchmark, local backend task records) are kept in memory
+        top_level_json = {}
+        run_dir = None
+        for tar_info, f in iter_archive_members(archive_path):
+            parts = pathlib.PurePosixPath(tar_info.name).parts
+            if ".." in parts or pathlib.PurePosixPath(tar_info.name).is_absolute():
+                continue
+            if len(parts) == 2 and tar_info.isfile() and parts[1].endswith(".json"):
+                top_level_json[parts[1]] = f.read()
+                continue
+            path = pathlib.Path(tmp_dir).joinpath(*parts)
+            if tar_info.isdir():
+                path.mkdir(parents=True, exist_ok=True)
+                run_dir = run_dir or pathlib.Path(tmp_dir).joinpath(parts[0])
+            elif tar_info.isfile():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'wb') as fout:
+                    shutil.copyfileobj(f, fout)
+            elif tar_info.islnk():
+                # Deduplicated file (see archive.add_directory), whose first copy may be a top-level JSON
+                # file kept in memory
+                link_parts = pathlib.PurePosixPath(tar_info.linkname).parts
+                if ".." in link_parts or pathlib.PurePosixPath(tar_info.linkname).is_absolute():
+                    continue
+                if len(link_parts) == 2 and link_parts[1] in top_level_json:
+                    content = top_level_json[link_parts[1]]
+                else:
+                    content = None
+                    target_path = pathlib.Path(tmp_dir).joinpath(*link_parts)
+                if len(parts) == 2 and parts[1].endswith(".json"):
+                    top_level_json[parts[1]] = content if content is not None else target_path.read_bytes()
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if content is not None:
+                    path.write_bytes(content)
+                else:
+                    os.link(target_path, path)
+
+        # Written aside and moved into place, so that readers never see a partial result
+        partial_path = str(result_path) + ".tmp"
+        if local_backend.TASKS_FILE_NAME in top_level_json:
+            benchmarks = [content for name, content in top_level_json.items() if name != local_backend.TASKS_FILE_NAME]
+            if len(benchmarks) != 1:
+                raise Exception(f"Cannot find the benchmark JSON in {archive_path}")
+            instance = local_backend.make_instance(json.loads(benchmarks[0]),
+                                                   json.loads(top_level_json[local_backend.TASKS_FILE_NAME]),
+                                                   os.path.basename(result_path))
+            with open(partial_path, 'w') as f:
+                json.dump(instance, f, indent=4)
+        else:
+            if run_dir is None:
+                raise Exception(f"{archive_path} is empty")
+            for name, content in top_level_json.items():
+                run_dir.joinpath(name).write_bytes(content)
+            from wfcommons.wfinstances import PegasusLogsParser
+            parser = PegasusLogsParser(submit_dir=run_dir, ignore_auxiliary=False)
+            parser.build_workflow(os.path.basename(result_path)).write_json(partial_path)
+        commit_file(partial_path, result_path)
+    return time.monotonic() - start
+
+
+def main():
+    parser = ArgumentParser(description="Parse archived runs (.tar.gz/.tar.zst) into result JSON files again, "
+                                        "e.g., after WfCommons' log parser has improved")
+    parser.add_argument("archives", nargs='+', help="<archive, or directory of archives>")
+    parser.add_argument("-o", "--output_dir", help="<directory to write results to> (default: next to archives)")
+    parser.add_argument("-j", "--num_workers", type=int, default=os.cpu_count(),
+                        help="<# of archives processed concurrently>")
+    parser.add_argument("--scratch_dir", default="/dev/shm" if os.path.isdir("/dev/shm") else None,
+                        help="<directory in which Pegasus submit dirs are unpacked for parsing> (default: /dev/shm)")
+    parser.add_argument("-f", "--force", action='store_true',
+                        help="<also reprocess archives whose result is up to date>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if parsed_args.num_workers < 1:
+        sys.stderr.write("Error: invalid -j/--num_workers value\n")
+        sys.exit(1)
+    if parsed_args.output_dir and not os.path.isdir(parsed_args.output_dir):
+        sys.stderr.write("Error: output directory '" + parsed_args.output_dir + "' does not exist\n")
+        sys.exit(1)
+    for path in parsed_args.archives:
+        if not os.path.exists(path) or (os.path.isfile(path) and get_result_name(os.path.basename(path)) is None):
+            sys.stderr.write("Error: '" + path + "' is not an archive or a directory\n")
+            sys.exit(1)
+
+    # Results are up to date if newer than both their archive and the parsers
+    parser_mtime = get_parser_mtime()
+    jobs = []
+    num_up_to_date = 0
+    for archive_path in find_archives(parsed_args.archives):
+        result_path = os.path.join(parsed_args.output_dir or os.path.dirname(archive_path),
+                                   get_result_name(os.path.basename(archive_path)))
+        if not parsed_args.force and os.path.exists(result_path) and \
+                os.stat(result_path).st_mtime >= max(os.stat(archive_path).st_mtime, parser_mtime):
+            num_up_to_date += 1
+            continue
+        jobs.append((archive_path, result_path))
+
+    start = time.monotonic()
+    num_failures = 0
+    with ProcessPoolExecutor(max_workers=parsed_args.num_workers) as executor:
+        futures = {executor.submit(reprocess_archive, archive_path, result_path, parsed_args.scratch_dir): archive_path
+                   for archive_path, result_path in jobs}
+        for future in as_completed(futures):
+            try:
+                seconds = future.result()
+                sys.stderr.write(f"{os.path.basename(futures[future])}: reprocessed in {seconds:.1f}s\n")
+            except Exception as e:
+                sys.stderr.write(f"{os.path.basename(futures[future])}: FAILED: {e}\n")
+                num_failures += 1
+
+    sys.stderr.write(f"{len(jobs) - num_failures} archives reprocessed, {num_up_to_date} up to date, "
+                     f"{num_failures} failed in {time.monotonic() - start:.1f}s\n")
+    if num_failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
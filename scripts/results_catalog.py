@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import sqlite3
+import functools
+import contextlib
+import pathlib
+from argparse import ArgumentParser
+
+# The catalog (and SQLite's rollback journal) lives in its own directory, so that writing to it does not
+# change the mtime of the output directory
+CATALOG_DIR_NAME = ".results-catalog"
+CATALOG_FILE_NAME = "catalog.sqlite"
+# Where earlier versions kept the catalog
+LEGACY_CATALOG_FILE_NAME = ".results-catalog.sqlite"
+
+# Parameters encoded in result file names:
+#   <workflow>-<num_tasks>-<cpu_work>-<cpu_fraction>-<data_footprint>-<architecture>-<num_compute_nodes>-<trial>-<timestamp>.json
+result_fields = [("workflow", str),
+                 ("num_tasks", int),
+                 ("cpu_work", int),
+                 ("cpu_fraction", float),
+                 ("data_footprint", int),
+                 ("architecture", str),
+                 ("num_compute_nodes", int),
+                 ("trial", int),
+                 ("timestamp", int)]
+result_field_names = [name for name, _ in result_fields]
+
+
+def parse_result_file_name(file_name):
+    """Returns the parameters encoded in a result file name, or None if it is not one."""
+    if not file_name.endswith(".json"):
+        return None
+    parts = file_name[:-len(".json")].split("-")
+    if len(parts) != len(result_fields):
+        return None
+    try:
+        return {name: field_type(part) for (name, field_type), part in zip(result_fields, parts)}
+    except ValueError:
+        return None
+
+
+def recovering(method):
+    # The catalog is only an index of the output directory: if it gets corrupted (e.g., by a crash of
+    # the machine), it is moved aside and rebuilt, and the operation is tried again
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except sqlite3.DatabaseError as e:
+            # Subclasses (OperationalError, IntegrityError, ...) are not about the file's contents
+            if type(e) is not sqlite3.DatabaseError:
+                raise
+            sys.stderr.write(f"Results catalog {self.path} is corrupt ({e}): rebuilding it\n")
+            for path in [self.path, pathlib.Path(str(self.path) + "-journal")]:
+                if path.exists():
+                    os.replace(path, str(path) + ".corrupt")
+            self._create()
+            self._sync(force=True)
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ResultsCatalog:
+    """Index of the result files of an output directory, keyed by experiment parameters.
+
+    The catalog lives in a directory of the output directory, and is brought up to date with
+    a single directory scan whenever the output directory has changed since it was last synced."""
+
+    @recovering
+    def __init__(self, output_dir):
+        self.output_dir = pathlib.Path(output_dir)
+        self.path = self.output_dir.joinpath(CATALOG_DIR_NAME, CATALOG_FILE_NAME)
+        if self.output_dir.joinpath(LEGACY_CATALOG_FILE_NAME).exists():
+            os.remove(self.output_dir.joinpath(LEGACY_CATALOG_FILE_NAME))
+        self._create()
+        self._sync()
+
+    def _create(self):
+        self.path.parent.mkdir(exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "workflow TEXT, num_tasks INTEGER, cpu_work INTEGER, cpu_fraction REAL, "
+                         "data_footprint INTEGER, architecture TEXT, num_compute_nodes INTEGER, trial INTEGER, "
+                         "timestamp INTEGER, file_name TEXT PRIMARY KEY)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_key ON results ("
+                         "workflow, num_tasks, cpu_work, cpu_fraction, data_footprint, architecture, "
+                         "num_compute_nodes, trial)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation, so that the catalog can be used from any thread.
+        # The rollback journal is the default, on-disk one, so that a crash never corrupts the catalog
+        conn = sqlite3.connect(str(self.path), timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @recovering
+    def sync(self, force=False):
+        """Indexes new result files and forgets deleted ones, if the directory has changed."""
+        self._sync(force)
+
+    def _sync(self, force=False):
+        dir_mtime = str(os.stat(self.output_dir).st_mtime_ns)
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'dir_mtime'").fetchone()
+            if not force and row and row[0] == dir_mtime:
+                return
+            file_names = set(entry.name for entry in os.scandir(self.output_dir) if entry.is_file())
+            known_file_names = set(name for (name,) in conn.execute("SELECT file_name FROM results"))
+            for file_name in known_file_names - file_names:
+                conn.execute("DELETE FROM results WHERE file_name = ?", (file_name,))
+            for file_name in file_names - known_file_names:
+                self._insert(conn, file_name)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('dir_mtime', ?)", (dir_mtime,))
+
+    @recovering
+    def rebuild(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+        self._sync(force=True)
+
+    @staticmethod
+    def _insert(conn, file_name):
+        fields = parse_result_file_name(file_name)
+        if fields is None:
+            return False
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     [fields[name] for name in result_field_names] + [file_name])
+        return True
+
+    @recovering
+    def add(self, result_path):
+        """Records a result file that was just written to the output directory."""
+        with self._connect() as conn:
+            self._insert(conn, pathlib.Path(result_path).name)
+
+    @recovering
+    def query(self, **filters):
+        """Returns the result files (as dicts of their parameters plus 'file_name') matching the filters."""
+        for name in filters:
+            if name not in result_field_names:
+                raise Exception(f"Unknown result field {name}")
+        where = " AND ".join(f"{name} = ?" for name in filters)
+        with self._connect() as conn:
+            rows = conn.execute("SELECT " + ", ".join(result_field_names + ["file_name"]) + " FROM results" +
+                                (" WHERE " + where if where else "") + " ORDER BY file_name",
+                                list(filters.values())).fetchall()
+        return [dict(zip(result_field_names + ["file_name"], row)) for row in rows]
+
+    @recovering
+    def distinct(self, field, **filters):
+        """Returns the sorted distinct values of a field among the result files matching the filters."""
+        if field not in result_field_names:
+            raise Exception(f"Unknown result field {field}")
+        where = " AND ".join(f"{name} = ?" for name in filters)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT DISTINCT {field} FROM results" + (" WHERE " + where if where else "") +
+                                f" ORDER BY {field}", list(filters.values())).fetchall()
+        return [value for (value,) in rows]
+
+
+def main():
+    parser = ArgumentParser(description="Manage the results catalog of an output directory")
+    parser.add_argument("command", choices=["rebuild", "list"],
+                        help="<rebuild: re-index all result files | list: print the indexed result files>")
+    parser.add_argument("output_dir", help="<output dir>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+
+    if not os.path.isdir(parsed_args.output_dir):
+        sys.stderr.write("Error: output directory '" + parsed_args.output_dir + "' does not exist\n")
+        sys.exit(1)
+
+    catalog = ResultsCatalog(parsed_args.output_dir)
+    if parsed_args.command == "rebuild":
+        catalog.rebuild()
+        print(f"Indexed {len(catalog.query())} result files")
+    else:
+        for result in catalog.query():
+            print(result["file_name"])
+
+
+if __name__ == "__main__":
+    main()
@@ -5,27 +5,118 @@ if [[ $# -ne 2 ]] ; then
     exit 1
 fi
 
-# reorganize work dir
+now() {
+  date +%s.%N
+}
+
+# Blocks until something changes in the given directory (or for at most a few
+# seconds); falls back to a short sleep when inotify-tools is not installed
+wait_for_change() {
+  if command -v inotifywait > /dev/null ; then
+    inotifywait -qq -t 5 -e modify,create,delete,moved_to "$1" 2> /dev/null
+  else
+    sleep 1
+  fi
+}
+
+# Whether the DAGMan job is still in the HTCondor queue (assumed to be when unknown)
+condor_job_exists() {
+  [[ -z $CLUSTER ]] && return 0
+  STATUS=$(condor_q "$CLUSTER" -af JobStatus 2> /dev/null) || return 0
+  # Not in the queue anymore, or removed
+  [[ -n $STATUS && $STATUS != 3 ]]
+}
+
+# Whether pegasus-dagman is still running, from its .pid file (which is left behind if it crashes)
+dagman_running() {
+  PID=$(cat "$RUN_DIR"/*.pid 2> /dev/null) && [[ -n $PID ]] || return 1
+  PID_SEEN=1
+  ps -p "$PID" > /dev/null 2>&1
+}
+
+# Gives up on the workflow: removes it from the queue and exits non-zero, so that the run is recorded as failed
+fail() {
+  echo "Error: $1" >&2
+  [[ -n $CLUSTER ]] && condor_rm "$CLUSTER" > /dev/null 2>&1
+  exit 1
+}
+
+# Time limits (in seconds) for DAGMan to start, and for the workflow to complete
+DAGMAN_START_TIMEOUT=${DAGMAN_START_TIMEOUT:-600}
+WORKFLOW_TIMEOUT=${WORKFLOW_TIMEOUT:-86400}
+
+START=$(now)
+
+# reorganize work dir (input files may already be in data/)
 cd "$1" || exit
-mkdir data
-mv *.txt data
+mkdir -p data
+ls *.txt > /dev/null 2>&1 && mv *.txt data
 cp "$2"/cpu-benchmark .
 
-# generate pegasus YAML workflow
-export PYTHONPATH=$PYTHONPATH:/usr/lib/python3.6/dist-packages
-python3 pegasus-workflow.py
+# generate pegasus YAML workflow (unless run_experiments.py wrote it directly)
+if ! ls *.yml > /dev/null 2>&1 ; then
+  export PYTHONPATH=$PYTHONPATH:/usr/lib/python3.6/dist-packages
+  python3 pegasus-workflow.py
+fi
+WORKFLOW_GENERATED=$(now)
 
-pegasus-plan --dir work --cleanup none --output-site local --submit `ls *.yml`
-sleep 30
+PLAN_START=$(now)
+pegasus-plan --dir work --cleanup none --output-site local --submit `ls *.yml` > pegasus-plan.log 2>&1
+PLAN_STATUS=$?
+cat pegasus-plan.log
+[[ $PLAN_STATUS -eq 0 ]] || exit 1
+SUBMITTED=$(now)
+# Cluster of the DAGMan job, from condor_submit's output
+CLUSTER=$(grep -o "submitted to cluster [0-9]*" pegasus-plan.log | tail -1 | grep -o "[0-9]*$")
 
-PID_FILE=`ls work/cc/pegasus/*/run0001/*.pid`
+# Wait for DAGMan to start logging
+DEADLINE=$(( $(date +%s) + DAGMAN_START_TIMEOUT ))
+until DAGMAN_OUT=`ls work/*/pegasus/*/run0001/*.dag.dagman.out 2> /dev/null` && [[ -n $DAGMAN_OUT ]]
+do
+  condor_job_exists || fail "the DAGMan job left the queue before DAGMan started"
+  [[ $(date +%s) -lt $DEADLINE ]] || fail "DAGMan did not start within ${DAGMAN_START_TIMEOUT}s"
+  sleep 0.5
+done
+DAGMAN_STARTED=$(now)
+RUN_DIR=$(dirname "$DAGMAN_OUT")
 
 echo "Waiting for workflow execution to complete..."
 
-while [[ -f $PID_FILE ]]
+# DAGMan writes its termination record as the last line of its log
+DEADLINE=$(( $(date +%s) + WORKFLOW_TIMEOUT ))
+until grep -q "EXITING WITH STATUS" "$DAGMAN_OUT"
 do
-  sleep 20
+  if ! condor_job_exists || ! { dagman_running || [[ -z $PID_SEEN ]] ; } ; then
+    # Unless the record was written in the meantime
+    grep -q "EXITING WITH STATUS" "$DAGMAN_OUT" && break
+    fail "DAGMan exited without its termination record"
+  fi
+  [[ $(date +%s) -lt $DEADLINE ]] || fail "the workflow did not complete within ${WORKFLOW_TIMEOUT}s"
+  wait_for_change "$RUN_DIR"
 done
+DAG_FINISHED=$(now)
 
-echo "Workflow execution completed."
+# pegasus-dagman removes its .pid file once monitoring is over
+while dagman_running
+do
+  [[ $(date +%s) -lt $DEADLINE ]] || fail "workflow monitoring did not complete within ${WORKFLOW_TIMEOUT}s"
+  wait_for_change "$RUN_DIR"
+done
+COMPLETED=$(now)
+
+DAGMAN_STATUS=$(grep "EXITING WITH STATUS" "$DAGMAN_OUT" | tail -1 | sed 's/.*EXITING WITH STATUS \([0-9-]*\).*/\1/')
 
+cat > run-workflow-times.json << EOT
+{
+    "start": $START,
+    "workflow_generated": $WORKFLOW_GENERATED,
+    "plan_start": $PLAN_START,
+    "submitted": $SUBMITTED,
+    "dagman_started": $DAGMAN_STARTED,
+    "dag_finished": $DAG_FINISHED,
+    "completed": $COMPLETED,
+    "dagman_exit_status": ${DAGMAN_STATUS:-null}
+}
+EOT
+
+echo "Workflow execution completed."
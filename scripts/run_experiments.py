@@ -1,35 +1,57 @@
 #!/usr/bin/env python3
 
 import subprocess
-import tarfile
 import os
-import glob
 import time
 import sys
 import shutil
-from datetime import datetime
-import getpass
 import json
-import math
 import pathlib
+import tempfile
+import functools
+import math
+import contextlib
+import importlib.metadata
 from argparse import ArgumentParser
-
-from wfcommons import SeismologyRecipe, MontageRecipe, GenomeRecipe, SoykbRecipe, CyclesRecipe, EpigenomicsRecipe, \
-    BwaRecipe
-from wfcommons.wfbench import WorkflowBenchmark
-from wfcommons.wfbench.translator import PegasusTranslator
-from wfcommons.wfinstances import PegasusLogsParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from synthetic_workflows import synthetic_workflow_generators, synthetic_workflow_min_sizes, \
+    shaped_synthetic_workflows
+from input_data import materialize_input_file, input_data_modes
+from archive import create_archive, archive_formats
+from results_catalog import ResultsCatalog, parse_result_file_name, result_field_names
+from adaptive_trials import get_relative_ci, read_makespan, pick_next_trial
+from pegasus_yaml import write_pegasus_workflow
+from phase_timing import PhaseTimer, get_phases_path
+from campaign_planner import get_features, load_history, estimate_makespan, get_coverage_order
+from campaign_journal import CampaignJournal, commit_file
+from benchmark_cache import BenchmarkCache
+import local_backend
+from work_dirs import WorkDirManager
 
 architectures = ["haswell", "skylake", "cascadelake", "icelake"]
-workflow_recipe_map = {"seismology": SeismologyRecipe,
-                       "montage": MontageRecipe,
-                       "genome": GenomeRecipe,
-                       "soykb": SoykbRecipe,
-                       "cycles": CyclesRecipe,
-                       "epigenomics": EpigenomicsRecipe,
-                       "bwa": BwaRecipe,
+#LOCK_FILES_FOLDER = pathlib.Path("/var/lib/condor/execute")
+LOCK_FILES_FOLDER = pathlib.Path("/tmp/")
+
+# WfCommons recipes by class name: importing WfCommons takes seconds, so it is only
+# imported by the stages that need it (see get_recipe)
+workflow_recipe_map = {"seismology": "SeismologyRecipe",
+                       "montage": "MontageRecipe",
+                       "genome": "GenomeRecipe",
+                       "soykb": "SoykbRecipe",
+                       "cycles": "CyclesRecipe",
+                       "epigenomics": "EpigenomicsRecipe",
+                       "bwa": "BwaRecipe",
                        "chain": None,
-                       "forkjoin": None}
+                       "forkjoin": None,
+                       "layered": None,
+                       "tree": None,
+                       "mapreduce": None}
+
+
+def get_recipe(workflow):
+    import wfcommons
+    return getattr(wfcommons, workflow_recipe_map[workflow])
 
 
 def parse_arguments(args):
@@ -80,12 +102,148 @@ def parse_arguments(args):
                        type=int,
                        nargs='+',
                        action='extend',
-                       help="<#tasks in workflow> (only for chain/forkjoin workflows)")
+                       help="<#tasks in workflow> (only for synthetic workflows)")
 
     parser.add_argument("-p", "--print_workflow_sizes",
                         action='store_true',
                         help="<print the actual workflow sizes>")
 
+    parser.add_argument("--compact_json",
+                        action='store_true',
+                        help="<write synthetic benchmark JSON without indentation>")
+
+    parser.add_argument("--dag_width", type=int,
+                        help="<#tasks per layer (layered), #map tasks per stage (mapreduce), or fan-out (tree)> "
+                             "(only for " + "/".join(shaped_synthetic_workflows) + " workflows, default: "
+                             "sqrt(#tasks), 2 for trees)")
+
+    parser.add_argument("--dag_depth", type=int,
+                        help="<#layers (layered), #stages (mapreduce), or #fan-out levels (tree), instead of "
+                             "--dag_width> (only for " + "/".join(shaped_synthetic_workflows) + " workflows)")
+
+    parser.add_argument("--edge_density", type=float,
+                        help="<probability of an edge between tasks of consecutive layers/stages> (default: "
+                             "2 parents per task on average) (only for layered/mapreduce workflows: trees "
+                             "have no random edges)")
+
+    parser.add_argument("--dag_seed", type=int, default=0,
+                        help="<random seed, so that all trials run the same DAG> (only for "
+                             "layered/mapreduce workflows)")
+
+    parser.add_argument("--input_data", choices=input_data_modes, default="random",
+                        help="<contents of the input files of synthetic workflows: random data, or zeros "
+                             "in sparse or fallocated files for runs in which contents do not matter>")
+
+    parser.add_argument("--input_data_cache",
+                        default=str(pathlib.Path.home()) + "/.cache/wfbench-input-data",
+                        help="<directory in which random input files are generated once and linked from "
+                             "(empty to disable)>")
+
+    parser.add_argument("--input_data_cache_size", type=float, default=10,
+                        help="<size of the input data cache in GB (least recently used files are removed)>")
+
+    parser.add_argument("--benchmark_cache",
+                        default=str(pathlib.Path.home()) + "/.cache/wfbench-benchmarks",
+                        help="<directory in which generated benchmarks are cached, so that the trials of a "
+                             "cell run the same benchmark without generating it again (empty to disable)>")
+
+    parser.add_argument("--benchmark_cache_size", type=float, default=20,
+                        help="<size of the benchmark cache in GB (least recently used benchmarks are evicted)>")
+
+    parser.add_argument("--archive_format", choices=archive_formats.keys(), default="gz",
+                        help="<compression of the per-run archive of the Pegasus submit dir>")
+
+    parser.add_argument("--archive_level", type=int,
+                        help="<compression level> (default: the compressor's)")
+
+    parser.add_argument("--archive_threads", type=int, default=os.cpu_count(),
+                        help="<# of compression threads> (needs pigz for gz archives)")
+
+    parser.add_argument("--archive_exclude", action='append', default=[],
+                        help="<file name pattern not to archive> (can be repeated)")
+
+    parser.add_argument("--archive_dedupe",
+                        action='store_true',
+                        help="<store files (of 64 KiB or more) with identical contents only once per archive; "
+                             "files that are the same in every run are still stored in each run's archive, see "
+                             "--archive_exclude>")
+
+    parser.add_argument("--pegasus_workflow", choices=["translator", "direct"], default="translator",
+                        help="<translator: generate the Pegasus workflow with WfCommons' PegasusTranslator | direct: "
+                             "write the same Pegasus YAML workflow right away, skipping the generated script (only "
+                             "for non-WfBench-generated workflows)>")
+
+    parser.add_argument("--backend", choices=["pegasus", "local"], default="pegasus",
+                        help="<pegasus: run workflows with Pegasus/HTCondor | local: run their tasks on this "
+                             "machine, in dependency order (e.g., calibration runs, testing without a cluster)>")
+
+    parser.add_argument("--local_cores", type=int, default=os.cpu_count(),
+                        help="<# of tasks run at once by the local backend> (runs are not pipelined with this "
+                             "backend, so that only these tasks use the cores)")
+
+    parser.add_argument("--size_cache",
+                        default=str(pathlib.Path.home()) + "/.wfbench-workflow-sizes.json",
+                        help="<file in which actual workflow sizes are cached across runs>")
+
+    parser.add_argument("-j", "--num_concurrent_runs", type=int, default=1,
+                        help="<# of workflows to run concurrently on the pool>")
+
+    parser.add_argument("--work_dir",
+                        default=str(pathlib.Path.home()) + "/wfbench-workflow",
+                        help="<directory under which each run gets its own work dir>")
+
+    parser.add_argument("--work_dir_tmpfs",
+                        help="<directory on a tmpfs (e.g., /dev/shm/wfbench-workflow) under which runs with small "
+                             "data footprints get their work dir instead>")
+
+    parser.add_argument("--tmpfs_max_footprint", type=int, default=100000000,
+                        help="<largest data footprint (in bytes) of the runs whose work dir goes on the tmpfs>")
+
+    parser.add_argument("--num_postprocessing_workers", type=int, default=2,
+                        help="<# of background workers archiving/parsing finished runs>")
+
+    parser.add_argument("--adaptive",
+                        action='store_true',
+                        help="<stop repeating a cell once its mean makespan is known precisely enough, and "
+                             "spend the saved trials (up to #trials per cell overall) on the noisiest cells; each "
+                             "trial is picked once the previous ones are parsed, so runs are not pipelined>")
+
+    parser.add_argument("--ci_target", type=float, default=0.05,
+                        help="<relative half-width of the confidence interval of a cell's mean makespan "
+                             "below which the cell is not repeated> (only with --adaptive)")
+
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="<confidence level of the intervals> (only with --adaptive)")
+
+    parser.add_argument("--min_trials", type=int, default=2,
+                        help="<# of trials of every cell> (only with --adaptive)")
+
+    parser.add_argument("--max_trials", type=int,
+                        help="<max # of trials of a cell> (only with --adaptive, default: 3 x #trials)")
+
+    parser.add_argument("--order", choices=["sweep", "coverage"], default="sweep",
+                        help="<sweep: each parameter in ascending order | coverage: one trial of every cell, "
+                             "corners of the parameter space first and then spreading out, before the next trials>")
+
+    parser.add_argument("--time_budget", type=float,
+                        help="<wall-clock budget in hours (e.g., until the lease expires): experiments that are "
+                             "not estimated to complete within it are skipped>")
+
+    parser.add_argument("--history_dir", action='append', default=[],
+                        help="<output dir of earlier runs (e.g., on other #s of compute nodes) to estimate "
+                             "runtimes from, besides the output dir> (can be repeated)")
+
+    parser.add_argument("--default_makespan", type=float, default=600,
+                        help="<makespan in seconds assumed when there are no earlier results>")
+
+    parser.add_argument("--run_overhead", type=float, default=120,
+                        help="<time in seconds spent per run besides the makespan (generation, planning, "
+                             "archiving)>")
+
+    parser.add_argument("--print_plan",
+                        action='store_true',
+                        help="<print the experiments that would run, with their estimated runtimes>")
+
     parsed_args = parser.parse_args(args[1:])
 
     # Architecture
@@ -153,10 +311,100 @@ def parse_arguments(args):
         if workflow_recipe_map[workflow_values[0]] is not None:
             sys.stderr.write("Error: Cannot use -s/--workflow_size_factor with a WfBench-generated workflow\n")
             sys.exit(1)
-        if workflow_values[0] == "forkjoin":
-            if min(workflow_size_values) < 3:
-                sys.stderr.write("Error: Cannot use create a forkjoin workflow with less than 4 tasks\n")
-                sys.exit(1)
+        min_size = synthetic_workflow_min_sizes[workflow_values[0]]
+        if min(workflow_size_values) < min_size:
+            sys.stderr.write(f"Error: Cannot create a {workflow_values[0]} workflow with less than {min_size} tasks\n")
+            sys.exit(1)
+
+    # DAG shape
+    if parsed_args.dag_width is not None and parsed_args.dag_width < 1:
+        sys.stderr.write("Error: invalid --dag_width value\n")
+        sys.exit(1)
+    if parsed_args.dag_depth is not None and parsed_args.dag_depth < 1:
+        sys.stderr.write("Error: invalid --dag_depth value\n")
+        sys.exit(1)
+    if parsed_args.dag_width is not None and parsed_args.dag_depth is not None:
+        sys.stderr.write("Error: Cannot use both --dag_width and --dag_depth (the #tasks is set with -S)\n")
+        sys.exit(1)
+    if workflow_values[0] == "tree" and ((parsed_args.dag_width is not None and parsed_args.dag_width < 2) or
+                                         (parsed_args.dag_depth is not None and parsed_args.dag_depth < 2)):
+        sys.stderr.write("Error: A tree workflow needs a --dag_width (fan-out) or --dag_depth of at least 2\n")
+        sys.exit(1)
+    if parsed_args.edge_density is not None and (parsed_args.edge_density < 0.0 or parsed_args.edge_density > 1.0):
+        sys.stderr.write("Error: invalid --edge_density value\n")
+        sys.exit(1)
+    shape_parameters = {}
+    if workflow_values[0] in shaped_synthetic_workflows:
+        shape_parameters = {"width": parsed_args.dag_width,
+                            "depth": parsed_args.dag_depth,
+                            "edge_density": parsed_args.edge_density,
+                            "seed": parsed_args.dag_seed}
+
+    # The direct YAML writer only reproduces PegasusTranslator's output for the synthetic workflows
+    if parsed_args.pegasus_workflow == "direct" and workflow_recipe_map[workflow_values[0]] is not None:
+        sys.stderr.write("Error: Cannot use --pegasus_workflow direct with a WfBench-generated workflow\n")
+        sys.exit(1)
+
+    # Num concurrent runs
+    if parsed_args.num_concurrent_runs < 1:
+        sys.stderr.write("Error: invalid -j/--num_concurrent_runs value\n")
+        sys.exit(1)
+
+    if parsed_args.local_cores < 1:
+        sys.stderr.write("Error: invalid --local_cores value\n")
+        sys.exit(1)
+
+    if parsed_args.input_data_cache_size <= 0:
+        sys.stderr.write("Error: invalid --input_data_cache_size value\n")
+        sys.exit(1)
+
+    if parsed_args.benchmark_cache_size <= 0:
+        sys.stderr.write("Error: invalid --benchmark_cache_size value\n")
+        sys.exit(1)
+
+    # Num postprocessing workers
+    if parsed_args.num_postprocessing_workers < 1:
+        sys.stderr.write("Error: invalid --num_postprocessing_workers value\n")
+        sys.exit(1)
+
+    # Archive
+    if parsed_args.archive_threads < 1:
+        sys.stderr.write("Error: invalid --archive_threads value\n")
+        sys.exit(1)
+    archive_options = {"archive_format": parsed_args.archive_format,
+                       "level": parsed_args.archive_level,
+                       "threads": parsed_args.archive_threads,
+                       "exclude": parsed_args.archive_exclude,
+                       "dedupe": parsed_args.archive_dedupe}
+
+    # Adaptive trials
+    if parsed_args.min_trials < 2:
+        sys.stderr.write("Error: invalid --min_trials value (at least 2 trials are needed to estimate a "
+                         "confidence interval)\n")
+        sys.exit(1)
+    max_trials = parsed_args.max_trials if parsed_args.max_trials is not None else 3 * num_trials_values[0]
+    if parsed_args.adaptive and parsed_args.min_trials > num_trials_values[0]:
+        sys.stderr.write("Error: invalid --min_trials value (higher than -t/--num_trials, the average # of "
+                         "trials per cell)\n")
+        sys.exit(1)
+    if max_trials < parsed_args.min_trials:
+        sys.stderr.write("Error: invalid --max_trials value (lower than --min_trials)\n")
+        sys.exit(1)
+    if (parsed_args.confidence <= 0.0) or (parsed_args.confidence >= 1.0):
+        sys.stderr.write("Error: invalid --confidence value\n")
+        sys.exit(1)
+    if parsed_args.ci_target <= 0.0:
+        sys.stderr.write("Error: invalid --ci_target value\n")
+        sys.exit(1)
+
+    # Planning
+    if parsed_args.time_budget is not None and parsed_args.time_budget <= 0:
+        sys.stderr.write("Error: invalid --time_budget value\n")
+        sys.exit(1)
+    if parsed_args.adaptive and (parsed_args.order != "sweep" or parsed_args.time_budget is not None or
+                                 parsed_args.print_plan):
+        sys.stderr.write("Error: Cannot use --order, --time_budget or --print_plan with --adaptive\n")
+        sys.exit(1)
 
     # Print workflow sizes
     print_workflow_sizes_value = parsed_args.print_workflow_sizes
@@ -172,362 +420,186 @@ def parse_arguments(args):
               "data_footprint": data_footprint_values,
               "workflow_size_factor": workflow_size_factor_values,
               "workflow_size": workflow_size_values,
-              "print_workflow_sizes": print_workflow_sizes_value}
+              "print_workflow_sizes": print_workflow_sizes_value,
+              "size_cache": parsed_args.size_cache,
+              "compact_json": parsed_args.compact_json,
+              "shape_parameters": shape_parameters,
+              "input_data": parsed_args.input_data,
+              "input_data_cache": parsed_args.input_data_cache,
+              "input_data_cache_size": parsed_args.input_data_cache_size,
+              "benchmark_cache_dir": parsed_args.benchmark_cache,
+              "benchmark_cache_size": parsed_args.benchmark_cache_size,
+              "archive_options": archive_options,
+              "pegasus_workflow": parsed_args.pegasus_workflow,
+              "backend": parsed_args.backend,
+              "local_cores": parsed_args.local_cores,
+              "num_concurrent_runs": parsed_args.num_concurrent_runs,
+              "work_dir": parsed_args.work_dir,
+              "work_dir_tmpfs": parsed_args.work_dir_tmpfs,
+              "tmpfs_max_footprint": parsed_args.tmpfs_max_footprint,
+              "num_postprocessing_workers": parsed_args.num_postprocessing_workers,
+              "adaptive": parsed_args.adaptive,
+              "ci_target": parsed_args.ci_target,
+              "confidence": parsed_args.confidence,
+              "min_trials": parsed_args.min_trials,
+              "max_trials": max_trials,
+              "order": parsed_args.order,
+              "time_budget": parsed_args.time_budget,
+              "history_dirs": parsed_args.history_dir,
+              "default_makespan": parsed_args.default_makespan,
+              "run_overhead": parsed_args.run_overhead,
+              "print_plan": parsed_args.print_plan}
     return config
 
 
-def get_min_workflow_size(workflow):
-    recipe = workflow_recipe_map[workflow]
-    for s in range(0, 1000):
-        benchmark = WorkflowBenchmark(recipe=recipe, num_tasks=s)
+def load_workflow_size_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_workflow_size_cache(cache_path, cache):
+    tmp_path = str(cache_path) + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps(cache, indent=4, sort_keys=True))
+    os.replace(tmp_path, cache_path)
+
+
+def get_wfcommons_version():
+    # Recipes change across WfCommons versions, and so do the sizes they generate. The version is read
+    # from the package metadata, as importing WfCommons takes seconds
+    try:
+        return importlib.metadata.version("wfcommons")
+    except importlib.metadata.PackageNotFoundError:
+        import wfcommons
+        return getattr(wfcommons, "__version__", "unknown")
+
+
+def get_benchmark_num_tasks(recipe, num_tasks):
+    # Returns the actual number of tasks of the generated benchmark, or None if the
+    # recipe cannot generate a benchmark with that many tasks
+    from wfcommons.wfbench import WorkflowBenchmark
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        benchmark = WorkflowBenchmark(recipe=recipe, num_tasks=num_tasks)
         try:
-            path = benchmark.create_benchmark(pathlib.Path("/tmp/"),
+            path = benchmark.create_benchmark(pathlib.Path(tmp_dir),
                                               cpu_work=0,
                                               data=0,
                                               percent_cpu=1.0)
-            return s
         except Exception:
-            pass
+            return None
+        with open(path, 'r') as f:
+            return len(json.load(f)["workflow"]["tasks"])
+
+
+def get_min_workflow_size(workflow, cache, version):
+    key = workflow + ":" + version + ":min"
+    if key in cache:
+        return cache[key]
 
+    recipe = get_recipe(workflow)
 
-def compute_workflow_sizes(workflow, size_factors):
-    recipe = workflow_recipe_map[workflow]
-    min_size = get_min_workflow_size(workflow)
+    # Recipes accept any size above their minimum, so double the upper bound
+    # until a benchmark can be generated, and then bisect
+    low, high = -1, 1
+    while get_benchmark_num_tasks(recipe, high) is None:
+        if high >= 1000:
+            raise Exception(f"Cannot determine the minimum size of the {workflow} workflow")
+        low, high = high, min(high * 2, 1000)
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        if get_benchmark_num_tasks(recipe, middle) is None:
+            low = middle
+        else:
+            high = middle
+
+    cache[key] = high
+    return high
+
+
+def compute_workflow_sizes(workflow, size_factors, cache_path):
+    cache = load_workflow_size_cache(cache_path)
+    version = get_wfcommons_version()
+    min_size = get_min_workflow_size(workflow, cache, version)
     sizes = {}
     for factor in size_factors:
         desired_size = int(min_size * factor)
-        benchmark = WorkflowBenchmark(recipe=recipe, num_tasks=desired_size)
-        path = benchmark.create_benchmark(pathlib.Path("/tmp/"),
-                                          cpu_work=0,
-                                          data=0,
-                                          percent_cpu=1.0)
-        with open(path, 'r') as f:
-            data = json.load(f)
-            sizes[desired_size] = len(data["workflow"]["tasks"])
-
+        key = workflow + ":" + version + ":" + str(desired_size)
+        if key in cache:
+            sizes[desired_size] = cache[key]
+            continue
+        sizes[desired_size] = get_benchmark_num_tasks(get_recipe(workflow), desired_size)
+        # Failed generations are tried again next time
+        if sizes[desired_size] is not None:
+            cache[key] = sizes[desired_size]
+
+    save_workflow_size_cache(cache_path, cache)
     return sizes
 
 
-def create_chain_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir):
-    def get_arguments(task_index):
-        arguments = [
-            "chain_" + str(i).zfill(8),
-            "--percent-cpu " + str(cpu_fraction),
-            "--cpu-work " + str(cpu_work),
-            "--path-lock " + str(lock_files_folder) + "/cores.txt.lock",
-            "--path-cores " + str(lock_files_folder) + "/cores.txt",
-            "--out {'chain_" + str(task_index).zfill(8) + "_output.txt': " +
-            str(file_size_in_bytes) + "}"
-        ]
-
-        if task_index == 1:
-            arguments.append("chain_" + str(task_index).zfill(8) + "_input.txt")
-        else:
-            arguments.append("chain_" + str(task_index - 1).zfill(8) + "_output.txt")
-
-        return arguments
-
-    # method to get task parents
-    def get_parents(task_index):
-        parents = []
-        if task_index > 1:
-            parents.append("chain_" + str(task_index - 1).zfill(8))
-        return parents
-
-    # method to get task children
-    def get_children(task_index):
-        children = []
-        if task_index < desired_num_tasks:
-            children.append("chain_" + str(task_index + 1).zfill(8))
-        return children
-
-    # method to get task files
-    def get_files(task_index):
-        files = []
-
-        if task_index == 1:
-            files.append({
-                "link": "input",
-                "name": "chain_" + str(task_index).zfill(8) + "_input.txt",
-                "sizeInBytes": file_size_in_bytes
-            })
-        else:
-            files.append({
-                "link": "input",
-                "name": "chain_" + str(task_index - 1).zfill(8) + "_output.txt",
-                "sizeInBytes": file_size_in_bytes
-            })
-
-        files.append({
-            "link": "output",
-            "name": "chain_" + str(task_index).zfill(8) + "_output.txt",
-            "sizeInBytes": file_size_in_bytes
-        })
-
-        return files
-
-    # create workflow
-    file_size_in_bytes = math.ceil(data_footprint / (desired_num_tasks + 1))
-
-    workflow_json = {
-        "name": "Chain-Benchmark",
-        "description": "Instance generated with WfCommons - https://wfcommons.org",
-        "createdAt": str(datetime.utcnow().isoformat()),
-        "schemaVersion": "1.4",
-        "author": {
-            "name": str(getpass.getuser()),
-            "email": "support@wfcommons.org"
-        },
-        "wms": {
-            "name": "WfCommons",
-            "version": "0.9-dev",
-            "url": "https://docs.wfcommons.org/en/v0.9-dev/"
-        },
-        "workflow": {
-            "executedAt": str(datetime.now().astimezone().strftime("%Y%m%dT%H%M%S%z")),
-            "makespanInSeconds": 0,
-            "tasks": []
-        }
-    }
-
-    # create num_tasks tasks
-    for i in range(1, desired_num_tasks + 1):
-        # create task
-        task = {
-            "name": "chain_" + str(i).zfill(8),
-            "id": str(i).zfill(8),
-            "type": "compute",
-            "command": {
-                "program": str(pathlib.Path.home()) + "/wfcommons/bin/wfbench",
-                "arguments": get_arguments(i)
-            },
-            "parents": get_parents(i),
-            "children": get_children(i),
-            "files": get_files(i),
-            "cores": 1
-        }
-
-        # add task to workflow
-        workflow_json["workflow"]["tasks"].append(task)
-
-    file_name = f"chain-benchmark-{desired_num_tasks}.json"
-    with open(str(work_dir.absolute()) + "/" + file_name, 'w') as f:
-        f.write(json.dumps(workflow_json, indent=4))
-
-    # Create input dir and file
-    input_dir = work_dir.joinpath("data")
-    input_dir.mkdir()
-    with open(input_dir.joinpath("chain_00000001_input.txt"), 'wb') as fout:
-        fout.write(os.urandom(file_size_in_bytes))
-
-    return pathlib.Path(str(work_dir.absolute()) + "/" + file_name)
-
-
-def create_forkjoin_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir):
-    ###
-    # Creates a forkjoin workflow
-    #      1
-    #     /|\
-    #    / | \
-    #   2  3  ...
-    #    \ | /
-    #     \|/
-    #      N
-    ##
-
-    # method to get task arguments
-    def get_arguments(task_index):
-        arguments = [
-            "forkjoin_" + str(task_index).zfill(8),
-            "--percent-cpu " + str(cpu_fraction),
-            "--cpu-work " + str(cpu_work),
-            "--path-lock " + str(lock_files_folder) + "/cores.txt.lock",
-            "--path-cores " + str(lock_files_folder) + "/cores.txt",
-            "--out {'forkjoin_" + str(task_index).zfill(8) + "_output.txt': " + str(
-                str(file_size_in_bytes)) + "}"
-        ]
-        if task_index == 1:
-            arguments.append("forkjoin_" + str(task_index).zfill(8) + "_input.txt")
-        elif task_index in range(2, desired_num_tasks):
-            arguments.append("forkjoin_" + str(1).zfill(8) + "_output.txt")
-        elif task_index == desired_num_tasks:
-            for j in range(2, desired_num_tasks):
-                arguments.append("forkjoin_" + str(j).zfill(8) + "_output.txt")
-
-        return arguments
-
-    # method to get task parents
-    def get_parents(task_index):
-        parents = []
-
-        if task_index == desired_num_tasks:
-            for j in range(2, desired_num_tasks):
-                parents.append("forkjoin_" + str(j).zfill(8))
-        elif task_index in range(2, desired_num_tasks):
-            parents.append("forkjoin_" + str(1).zfill(8))
-
-        return parents
-
-    # method to get task children
-    def get_children(task_index):
-        children = []
-
-        if task_index == 1:
-            for j in range(2, desired_num_tasks):
-                children.append("forkjoin_" + str(j).zfill(8))
-        elif task_index in range(2, desired_num_tasks):
-            children.append("forkjoin_" + str(desired_num_tasks).zfill(8))
-
-        return children
-
-    # method to get task files
-    def get_files(task_index):
-        files = []
-
-        if task_index == 1:
-            files.append({
-                "link": "input",
-                "name": "forkjoin_" + str(task_index).zfill(8) + "_input.txt",
-                "sizeInBytes": file_size_in_bytes
-            })
-        elif task_index in range(2, desired_num_tasks):
-            files.append({
-                "link": "input",
-                "name": "forkjoin_" + str(1).zfill(8) + "_output.txt",
-                "sizeInBytes": file_size_in_bytes
-            })
-        elif task_index == desired_num_tasks:
-            for j in range(2, desired_num_tasks):
-                files.append({
-                    "link": "input",
-                    "name": "forkjoin_" + str(j).zfill(8) + "_output.txt",
-                    "sizeInBytes": file_size_in_bytes
-                })
-
-        files.append({
-            "link": "output",
-            "name": "forkjoin_" + str(task_index).zfill(8) + "_output.txt",
-            "sizeInBytes": file_size_in_bytes
-        })
-
-        return files
-
-    # create workflow
-    if desired_num_tasks < 4:
-        raise Exception("Cannot create a forkjoin benchmark with fewer than 4 tasks")
-
-    file_size_in_bytes = math.ceil(data_footprint / (desired_num_tasks + 1))
-
-    workflow_json = {
-        "name": "Forkjoin-Benchmark",
-        "description": "Instance generated with WfCommons - https://wfcommons.org",
-        "createdAt": str(datetime.utcnow().isoformat()),
-        "schemaVersion": "1.3",
-        "author": {
-            "name": str(getpass.getuser()),
-            "email": "support@wfcommons.org"
-        },
-        "wms": {
-            "name": "WfCommons",
-            "version": "0.9-dev",
-            "url": "https://docs.wfcommons.org/en/v0.9-dev/"
-        },
-        "workflow": {
-            "executedAt": str(datetime.now().astimezone().strftime("%Y%m%dT%H%M%S%z")),
-            "makespanInSeconds": 0,
-            "tasks": []
-        }
-    }
-
-    # create num_tasks tasks
-    for i in range(1, desired_num_tasks + 1):
-        # create task
-        task = {
-            "name": "forkjoin_" + str(i).zfill(8),
-            "id": str(i).zfill(8),
-            "type": "compute",
-            "command": {
-                "program": str(pathlib.Path.home()) + "/wfcommons/bin/wfbench",
-                "arguments": get_arguments(i)
-            },
-            "parents": get_parents(i),
-            "children": get_children(i),
-            "files": get_files(i),
-            "cores": 1
-        }
-
-        # add task to workflow
-        workflow_json["workflow"]["tasks"].append(task)
-
-    # Create input dir and file
-    input_dir = work_dir.joinpath("data")
-    input_dir.mkdir()
-    with open(input_dir.joinpath("forkjoin_00000001_input.txt"), 'wb') as fout:
-        fout.write(os.urandom(file_size_in_bytes))
-
-    file_name = f"forkjoin-benchmark-{desired_num_tasks}.json"
-    with open(str(work_dir.absolute()) + "/" + file_name, 'w') as f:
-        f.write(json.dumps(workflow_json, indent=4))
-
-    return pathlib.Path(str(work_dir.absolute()) + "/" + file_name)
-
-
-def create_benchmark(work_dir, workflow, desired_num_tasks, cpu_fraction, cpu_work, data_footprint):
-    #lock_files_folder = pathlib.Path("/var/lib/condor/execute")
-    lock_files_folder = pathlib.Path("/tmp/")
+def create_lock_files(lock_files_folder):
+    # Creating the lock files (code copied from create_benchmark)
+    if lock_files_folder:
+        try:
+            lock_files_folder.mkdir(exist_ok=True, parents=True)
+            lock = lock_files_folder.joinpath("cores.txt.lock")
+            cores = lock_files_folder.joinpath("cores.txt")
+            # Only created if missing: the runs of other (concurrent) experiments may be using them
+            lock.touch()
+            cores.touch()
+        except (FileNotFoundError, OSError) as e:
+            sys.stderr.write(f"Could not find folder to create lock files: {lock_files_folder.resolve()}\n"
+                             f"You will need to create them manually: 'cores.txt.lock' and 'cores.txt'\n")
+
+
+def create_benchmark(work_dir, workflow, desired_num_tasks, cpu_fraction, cpu_work, data_footprint,
+                     compact_json=False, shape_parameters=None, input_data="random", input_data_cache=None,
+                     input_data_cache_size=None):
+    lock_files_folder = LOCK_FILES_FOLDER
     os.system(f"sudo chmod 777 {lock_files_folder}")
 
     if workflow_recipe_map[workflow]:
         # create benchmark
-        benchmark = WorkflowBenchmark(recipe=workflow_recipe_map[workflow], num_tasks=desired_num_tasks)
+        from wfcommons.wfbench import WorkflowBenchmark
+        benchmark = WorkflowBenchmark(recipe=get_recipe(workflow), num_tasks=desired_num_tasks)
         benchmark_path = benchmark.create_benchmark(save_dir=work_dir,
                                                     cpu_work=cpu_work,
                                                     data=int(data_footprint / (1000.0 * 1000.0)),
                                                     percent_cpu=cpu_fraction,
                                                     lock_files_folder=lock_files_folder)
     else:
-        # Creating the lock files (code copied from create_benchmark)
-        if lock_files_folder:
-            try:
-                lock_files_folder.mkdir(exist_ok=True, parents=True)
-                lock = lock_files_folder.joinpath("cores.txt.lock")
-                cores = lock_files_folder.joinpath("cores.txt")
-                with lock.open("w+"), cores.open("w+"):
-                    pass
-            except (FileNotFoundError, OSError) as e:
-                sys.stderr.write(f"Could not find folder to create lock files: {lock_files_folder.resolve()}\n"
-                                 f"You will need to create them manually: 'cores.txt.lock' and 'cores.txt'\n")
-
-        if workflow == "chain":
-            benchmark_path = create_chain_workflow(desired_num_tasks=desired_num_tasks,
-                                                   cpu_fraction=cpu_fraction,
-                                                   cpu_work=cpu_work,
-                                                   data_footprint=data_footprint,
-                                                   lock_files_folder=lock_files_folder,
-                                                   work_dir=work_dir)
-
-        elif workflow == "forkjoin":
-            benchmark_path = create_forkjoin_workflow(desired_num_tasks=desired_num_tasks,
-                                                      cpu_fraction=cpu_fraction,
-                                                      cpu_work=cpu_work,
-                                                      data_footprint=data_footprint,
-                                                      lock_files_folder=lock_files_folder,
-                                                      work_dir=work_dir)
+        create_lock_files(lock_files_folder)
 
-        else:
+        if workflow not in synthetic_workflow_generators:
             raise Exception(f"Unknown workflow {workflow}")
 
-    return benchmark_path
-
+        generator = synthetic_workflow_generators[workflow]
+        input_file_writer = functools.partial(materialize_input_file,
+                                              mode=input_data,
+                                              cache_dir=input_data_cache,
+                                              cache_max_size_in_bytes=input_data_cache_size)
+        benchmark_path = generator(desired_num_tasks=desired_num_tasks,
+                                   cpu_fraction=cpu_fraction,
+                                   cpu_work=cpu_work,
+                                   data_footprint=data_footprint,
+                                   lock_files_folder=lock_files_folder,
+                                   work_dir=work_dir,
+                                   compact=compact_json,
+                                   input_file_writer=input_file_writer,
+                                   **(shape_parameters or {}))
 
-def create_work_dir(path):
-    shutil.rmtree(path, ignore_errors=True)
-    work_dir = pathlib.Path(path)
-    work_dir.mkdir()
-    return work_dir
+    return benchmark_path
 
 
-def create_pegasus_workflow(work_dir, json_file_path):
+def create_pegasus_workflow(work_dir, json_file_path, direct=False):
+    if direct:
+        # Writes the YAML workflow right away (run-workflow.sh then skips pegasus-workflow.py)
+        write_pegasus_workflow(json_file_path, work_dir)
+        return
+    from wfcommons.wfbench.translator import PegasusTranslator
     translator = PegasusTranslator(json_file_path)
     translator.translate(work_dir.joinpath("pegasus-workflow.py"))
 
@@ -535,13 +607,32 @@ def create_pegasus_workflow(work_dir, json_file_path):
 def run_pegasus_workflow(work_dir, cpu_benchmark_dir):
     proc = subprocess.Popen(["bash", "run-workflow.sh", str(work_dir.absolute()), cpu_benchmark_dir])
     proc.wait()
-
-
-def process_pegasus_workflow_execution(work_dir, benchmark_path, output_dir, tar_file_to_generate_prefix):
+    # e.g., pegasus-plan failed, or DAGMan did not start/complete in time
+    if proc.returncode != 0:
+        raise Exception(f"run-workflow.sh failed (exit code {proc.returncode})")
+
+    # Timestamps recorded by run-workflow.sh's completion watcher
+    try:
+        with open(work_dir.joinpath("run-workflow-times.json"), 'r') as f:
+            times = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    sys.stderr.write(f"Workflow ran for {times['dag_finished'] - times['submitted']:.1f}s "
+                     f"(+{times['completed'] - times['dag_finished']:.1f}s until monitoring completed)\n")
+    return times
+
+
+def process_pegasus_workflow_execution(work_dir, benchmark_path, output_dir, tar_file_to_generate_prefix,
+                                       archive_options=None, timer=None, journal=None, backend="pegasus"):
+    timer = timer or PhaseTimer()
+    journal = journal or CampaignJournal(output_dir)
     run_dir = None
-    for dagman_path in work_dir.joinpath("work/cc/pegasus").glob("**/*.dag.dagman.out"):
-        run_dir = dagman_path.parent
-        break
+    if backend == "local":
+        run_dir = local_backend.get_run_dir(work_dir)
+    else:
+        for dagman_path in work_dir.joinpath("work/cc/pegasus").glob("**/*.dag.dagman.out"):
+            run_dir = dagman_path.parent
+            break
 
     if not run_dir:
         raise Exception("process_pegasus_workflow_execution(): Couldn't find run dir")
@@ -554,17 +645,450 @@ def process_pegasus_workflow_execution(work_dir, benchmark_path, output_dir, tar
     # Putting benchmark workflow .json in there, just for kicks
     shutil.copy(str(benchmark_path.absolute()), str(renamed_dir.absolute()))
 
-    with tarfile.open(str(output_dir.joinpath(tar_file_to_generate_prefix + "-" + str(timestamp) + ".tar.gz")),
-                      "w:gz") as tar:
-        tar.add(renamed_dir, arcname=renamed_dir.name)
+    # Archives and results are written aside and moved into the output dir once complete, so that
+    # a crash never leaves a truncated one behind
+    with timer.phase("archiving"):
+        archive_path = create_archive(renamed_dir,
+                                      journal.get_partial_path(tar_file_to_generate_prefix + "-" + str(timestamp)),
+                                      **(archive_options or {}))
+        commit_file(archive_path, output_dir.joinpath(os.path.basename(archive_path)))
+    journal.record(tar_file_to_generate_prefix, "archived", archive_file=os.path.basename(archive_path))
+
+    with timer.phase("log_parsing"):
+        workflow_path = output_dir.joinpath(tar_file_to_generate_prefix + "-" + str(timestamp) + ".json")
+        partial_path = journal.get_partial_path(workflow_path.name)
+        if backend == "local":
+            instance = local_backend.build_instance(renamed_dir, benchmark_path, workflow_path.name)
+            with open(partial_path, 'w') as f:
+                json.dump(instance, f, indent=4)
+        else:
+            # Generate observed workflow
+            from wfcommons.wfinstances import PegasusLogsParser
+            parser = PegasusLogsParser(submit_dir=renamed_dir, ignore_auxiliary=False)
+            # generating the workflow instance object
+            workflow = parser.build_workflow(workflow_path.name)
+            # writing the workflow instance to a JSON file
+            workflow.write_json(partial_path)
+        commit_file(partial_path, workflow_path)
+
+    return workflow_path
+
+
+def get_experiment_prefix(config, desired_num_tasks, cpu_work, cpu_fraction, data_footprint, trial):
+    return config["workflow"] + f"-{desired_num_tasks}-{cpu_work}-{cpu_fraction}-{data_footprint}-" + \
+        config["architecture"] + "-" + str(config["num_compute_nodes"]) + f"-{trial}"
+
+
+def make_experiment(config, desired_num_tasks, cpu_work, cpu_fraction, data_footprint, trial):
+    return {"desired_num_tasks": desired_num_tasks,
+            "cpu_work": cpu_work,
+            "cpu_fraction": cpu_fraction,
+            "data_footprint": data_footprint,
+            "trial": trial,
+            "prefix": get_experiment_prefix(config, desired_num_tasks, cpu_work, cpu_fraction, data_footprint,
+                                            trial)}
+
+
+def get_cells(config):
+    # (desired #tasks, CPU work, CPU fraction, data footprint) combinations, in sweep order
+    for desired_num_tasks in sorted(config["workflow_size"].keys()):
+        for cpu_work in config["cpu_work"]:
+            for cpu_fraction in config["cpu_fraction"]:
+                for data_footprint in config["data_footprint"]:
+                    yield desired_num_tasks, cpu_work, cpu_fraction, data_footprint
+
+
+def is_too_large(desired_num_tasks, data_footprint):
+    return float(data_footprint) / float(desired_num_tasks) > 80*1000*1000
+
+
+def is_complete_result(config, file_name):
+    # Results committed by this harness are complete (see process_pegasus_workflow_execution). Others
+    # (written by an earlier version, or copied in) are checked once, and set aside if truncated
+    journal = config["journal"]
+    prefix = file_name[:-len(".json")].rsplit("-", 1)[0]
+    if journal.get(prefix).get("result_file") == file_name:
+        return True
+    path = os.path.join(config["output_dir"], file_name)
+    try:
+        read_makespan(path)
+    except (ValueError, KeyError, TypeError):
+        sys.stderr.write(f"File {file_name}: incomplete or corrupt. [RENAMED TO {file_name}.corrupt]\n")
+        os.replace(path, path + ".corrupt")
+        return False
+    journal.record(prefix, "parsed", result_file=file_name)
+    return True
+
+
+def get_experiments(config):
+    catalog = config["catalog"]
+    if config["order"] == "coverage":
+        # All cells once (spread over the parameter space), then all cells again, etc.
+        cells = get_coverage_order(list(get_cells(config)))
+        runs = [(cell, trial) for trial in range(0, config["num_trials"]) for cell in cells]
+    else:
+        runs = [(cell, trial) for cell in get_cells(config) for trial in range(0, config["num_trials"])]
+
+    for (desired_num_tasks, cpu_work, cpu_fraction, data_footprint), trial in runs:
+        tar_file_to_generate_prefix = get_experiment_prefix(config, desired_num_tasks, cpu_work, cpu_fraction,
+                                                            data_footprint, trial)
+
+        if any(is_complete_result(config, result["file_name"])
+               for result in catalog.query(workflow=config["workflow"],
+                                           num_tasks=desired_num_tasks,
+                                           cpu_work=cpu_work,
+                                           cpu_fraction=cpu_fraction,
+                                           data_footprint=data_footprint,
+                                           architecture=config["architecture"],
+                                           num_compute_nodes=config["num_compute_nodes"],
+                                           trial=trial)):
+            sys.stderr.write(f"File {tar_file_to_generate_prefix}: already exists. [SKIPPING]\n")
+            continue
+
+        if is_too_large(desired_num_tasks, data_footprint):
+            sys.stderr.write("File sizes will likely by above 80MB. [SKIPPING]\n")
+            continue
+
+        yield make_experiment(config, desired_num_tasks, cpu_work, cpu_fraction, data_footprint, trial)
+
+
+def estimate_runtimes(config, experiments):
+    # Adds each experiment's estimated runtime (estimated makespan plus per-run overhead),
+    # based on earlier results of the same workflow on the same architecture
+    history = load_history([config["output_dir"]] + config["history_dirs"], config["workflow"],
+                           config["architecture"])
+    for experiment in experiments:
+        features = get_features(experiment["desired_num_tasks"], experiment["cpu_work"],
+                                experiment["cpu_fraction"], experiment["data_footprint"],
+                                config["num_compute_nodes"])
+        experiment["estimated_runtime"] = estimate_makespan(history, features, config["default_makespan"]) + \
+            config["run_overhead"]
+    return experiments, len(history)
+
+
+def get_budgeted_experiments(config, experiments):
+    """Yields the experiments that can still complete within the time budget when their turn comes,
+    skipping the others (so that cheaper experiments further down the order can still run)."""
+    budget = config["time_budget"] * 3600
+    start = time.monotonic()
+    previous_runtime = 0
+    for experiment in experiments:
+        # Runs take turns when executed one at a time: the previous experiment is still running
+        elapsed = time.monotonic() - start + (previous_runtime if config["num_concurrent_runs"] == 1 else 0)
+        if elapsed + experiment["estimated_runtime"] > budget:
+            sys.stderr.write(f"Workflow {experiment['prefix']}: estimated to take "
+                             f"{experiment['estimated_runtime']:.0f}s, {max(0, budget - elapsed):.0f}s left in "
+                             f"the time budget. [SKIPPING]\n")
+            continue
+        previous_runtime = experiment["estimated_runtime"]
+        yield experiment
+
+
+def print_plan(config, experiments, num_history_results):
+    print(f"Runtimes estimated from {num_history_results} earlier results")
+    print("----------------------")
+    print("Estimated\tCumulative\tWorkflow")
+    print("runtime (s)\ttime (h)")
+    print("----------------------")
+    total = 0
+    budget = config["time_budget"] * 3600 if config["time_budget"] is not None else math.inf
+    num_selected = 0
+    for experiment in experiments:
+        if total + experiment["estimated_runtime"] / config["num_concurrent_runs"] > budget:
+            continue
+        total += experiment["estimated_runtime"] / config["num_concurrent_runs"]
+        num_selected += 1
+        print(f"{experiment['estimated_runtime']:.0f}\t\t{total / 3600:.2f}\t\t{experiment['prefix']}")
+    print("----------------------")
+    print(f"{num_selected} of {len(experiments)} workflows, {total / 3600:.2f}h")
+
+
+def get_adaptive_experiments(config):
+    """Yields experiments one at a time, deciding on each one from the makespans found in the output dir
+    at that point: cells stop once the confidence interval of their mean makespan is narrow enough, and the
+    trials they do not use go to the cells with the widest intervals (see adaptive_trials.pick_next_trial)."""
+    catalog = config["catalog"]
+    cells = []
+    for desired_num_tasks, cpu_work, cpu_fraction, data_footprint in get_cells(config):
+        if is_too_large(desired_num_tasks, data_footprint):
+            sys.stderr.write("File sizes will likely by above 80MB. [SKIPPING]\n")
+            continue
+        cells.append({"key": (desired_num_tasks, cpu_work, cpu_fraction, data_footprint),
+                      "issued_trials": set(), "done": False})
+    budget = config["num_trials"] * len(cells)
+    makespans = {}
+    num_issued = 0
+
+    while True:
+        # Trials (and their makespans) of each cell so far, from a single catalog query
+        results = {}
+        for result in catalog.query(workflow=config["workflow"], architecture=config["architecture"],
+                                    num_compute_nodes=config["num_compute_nodes"]):
+            key = (result["num_tasks"], result["cpu_work"], result["cpu_fraction"], result["data_footprint"])
+            results.setdefault(key, {})[result["trial"]] = result["file_name"]
+
+        num_trials = 0
+        for cell in cells:
+            cell_results = {trial: file_name for trial, file_name in results.get(cell["key"], {}).items()
+                            if file_name in makespans or is_complete_result(config, file_name)}
+            for file_name in cell_results.values():
+                if file_name not in makespans:
+                    makespans[file_name] = read_makespan(os.path.join(config["output_dir"], file_name))
+            cell["trials"] = set(cell_results.keys()) | cell["issued_trials"]
+            cell["makespans"] = [makespans[file_name] for file_name in cell_results.values()]
+            cell["num_trials"] = len(cell["trials"])
+            cell["num_pending"] = len(cell["issued_trials"] - set(cell_results.keys()))
+            cell["relative_ci"] = get_relative_ci(cell["makespans"], config["confidence"])
+            num_trials += cell["num_trials"]
+            if not cell["done"] and len(cell["makespans"]) >= config["min_trials"] and \
+                    cell["relative_ci"] <= config["ci_target"]:
+                cell["done"] = True
+                sys.stderr.write(f"Cell {get_experiment_prefix(config, *cell['key'], '*')}: converged after "
+                                 f"{len(cell['makespans'])} trials (relative CI={cell['relative_ci'] * 100:.1f}%)\n")
+
+        if num_trials >= budget:
+            break
+        cell = pick_next_trial(cells, config["ci_target"], config["min_trials"], config["max_trials"])
+        if cell is None:
+            break
+        trial = min(set(range(0, cell["num_trials"] + 1)) - cell["trials"])
+        cell["issued_trials"].add(trial)
+        num_issued += 1
+        yield make_experiment(config, *cell["key"], trial)
+
+    sys.stderr.write(f"Adaptive trials: ran {num_issued} trials, {num_trials} in total out of a budget of "
+                     f"{budget} ({config['num_trials']} per cell)\n")
+
+
+def get_benchmark_cache_key_parameters(config, experiment):
+    # Everything the generated work dir depends on
+    parameters = {"workflow": config["workflow"],
+                  "num_tasks": experiment["desired_num_tasks"],
+                  "cpu_work": experiment["cpu_work"],
+                  "cpu_fraction": experiment["cpu_fraction"],
+                  "data_footprint": experiment["data_footprint"],
+                  "lock_files_folder": str(LOCK_FILES_FOLDER),
+                  "compact_json": config["compact_json"],
+                  "shape_parameters": config["shape_parameters"],
+                  "input_data": config["input_data"],
+                  "pegasus_workflow": config["pegasus_workflow"] if config["backend"] == "pegasus" else None}
+    # WfBench-generated benchmarks, and the pegasus-workflow.py written by PegasusTranslator, change across WfCommons
+    # versions (the keys of the other benchmarks, which do not depend on WfCommons, stay the same)
+    if workflow_recipe_map[config["workflow"]] or parameters["pegasus_workflow"] == "translator":
+        parameters["wfcommons_version"] = get_wfcommons_version()
+    return parameters
+
+
+def discard_experiment(config, experiment, work_dir=None):
+    # A run that failed is cleaned up right away (resume_campaign only has to deal with crashes), so that it
+    # runs again in the next campaign
+    if work_dir:
+        config["work_dirs"].remove(work_dir)
+    config["journal"].record(experiment["prefix"], "discarded")
+
+
+def prepare_experiment(config, experiment):
+    sys.stderr.write(f"PREPARING WORKFLOW {experiment['prefix']}...\n")
+    config["journal"].record(experiment["prefix"], "planned", experiment=experiment)
+    timer = PhaseTimer()
+    work_dir = None
+    try:
+        with timer.phase("work_dir_creation"):
+            # Create a fresh working directory (one per run, so that runs can overlap)
+            work_dir = config["work_dirs"].create(experiment["prefix"], experiment["data_footprint"])
+
+        # Trials of a cell start from a clone of the benchmark generated for the first one (concurrent trials of a
+        # cell wait for it to be generated, see BenchmarkCache.locked)
+        benchmark_cache = config["benchmark_cache"]
+        cache_key_parameters = get_benchmark_cache_key_parameters(config, experiment)
+        cache_key = BenchmarkCache.get_key(**cache_key_parameters)
+        benchmark_path = None
+        with benchmark_cache.locked(cache_key) if benchmark_cache else contextlib.nullcontext():
+            if benchmark_cache:
+                start = time.monotonic()
+                benchmark_path = benchmark_cache.get(cache_key, work_dir)
+                if benchmark_path:
+                    create_lock_files(LOCK_FILES_FOLDER)
+                    timer.add("benchmark_cloning", start, time.monotonic())
+
+            if benchmark_path is None:
+                with timer.phase("benchmark_generation"):
+                    # Create the benchmark workflow
+                    benchmark_path = create_benchmark(work_dir, config["workflow"], experiment["desired_num_tasks"],
+                                                      experiment["cpu_fraction"], experiment["cpu_work"],
+                                                      experiment["data_footprint"], config["compact_json"],
+                                                      config["shape_parameters"], config["input_data"],
+                                                      config["input_data_cache"], config["input_data_cache_size"] * 1e9)
+
+                if config["backend"] == "pegasus":
+                    with timer.phase("pegasus_translation"):
+                        # Create Pegasus workflow
+                        create_pegasus_workflow(work_dir, benchmark_path, config["pegasus_workflow"] == "direct")
+
+                if benchmark_cache:
+                    with timer.phase("benchmark_caching"):
+                        # The YAML workflow of the direct mode holds work dir paths (pegasus-workflow.py does not)
+                        benchmark_cache.put(cache_key, work_dir, benchmark_path, cache_key_parameters,
+                                            exclude=["*.yml"])
+            elif config["backend"] == "pegasus" and config["pegasus_workflow"] == "direct":
+                with timer.phase("pegasus_translation"):
+                    create_pegasus_workflow(work_dir, benchmark_path, True)
+    except Exception:
+        discard_experiment(config, experiment, work_dir)
+        raise
+    config["journal"].record(experiment["prefix"], "generated", work_dir=str(work_dir),
+                             benchmark_path=str(benchmark_path))
+
+    return work_dir, benchmark_path, timer
+
+
+def execute_experiment(config, experiment, work_dir, benchmark_path, timer):
+    # Run the Pegasus workflow (or its tasks, locally), timing the phases of run-workflow.sh
+    sys.stderr.write(f"RUNNING WORKFLOW {experiment['prefix']}...\n")
+    config["journal"].record(experiment["prefix"], "submitted")
+    wall_clock_start, monotonic_start = time.time(), time.monotonic()
+    try:
+        if config["backend"] == "local":
+            times = local_backend.run_local_workflow(work_dir, benchmark_path, str(pathlib.Path.home()),
+                                                     config["local_cores"])
+        else:
+            # run-workflow.sh removes the workflow from the queue before failing
+            times = run_pegasus_workflow(work_dir, str(pathlib.Path.home()))
+    except Exception:
+        discard_experiment(config, experiment, work_dir)
+        raise
+    timer.add("run_workflow_script", monotonic_start, time.monotonic())
+    config["journal"].record(experiment["prefix"], "completed",
+                             dagman_exit_status=times.get("dagman_exit_status") if times else None)
+    if times:
+        timer.add_workflow_script_times(times, wall_clock_start, monotonic_start, "run_workflow_script")
+
+
+def finalize_experiment(config, experiment, work_dir, benchmark_path, timer):
+    # Process result
+    workflow_path = process_pegasus_workflow_execution(work_dir, benchmark_path, pathlib.Path(config["output_dir"]),
+                                                       experiment["prefix"], config["archive_options"], timer,
+                                                       config["journal"], config["backend"])
+    config["catalog"].add(workflow_path)
+
+    with timer.phase("work_dir_removal"):
+        # Remove working directory (in the background)
+        config["work_dirs"].remove(work_dir)
+    config["journal"].record(experiment["prefix"], "parsed", result_file=workflow_path.name)
+    phases_path = config["journal"].get_partial_path(os.path.basename(get_phases_path(workflow_path)))
+    timer.write(phases_path, experiment["prefix"])
+    commit_file(phases_path, get_phases_path(workflow_path))
+    sys.stderr.write(f"PROCESSED WORKFLOW {experiment['prefix']}\n")
+
+
+def run_experiment(config, experiment):
+    work_dir, benchmark_path, timer = prepare_experiment(config, experiment)
+    execute_experiment(config, experiment, work_dir, benchmark_path, timer)
+    finalize_experiment(config, experiment, work_dir, benchmark_path, timer)
+
+
+def resume_campaign(config):
+    """Brings the output dir back to a consistent state after an interrupted campaign, from the journal:
+    experiments whose workflow had completed are archived and parsed from their work dir, the others are
+    cleaned up (work dir, partially written files) so that they run again."""
+    journal = config["journal"]
+    journal.clear_partial_files()
+    catalog = config["catalog"]
+    for entry in journal.get_unfinished():
+        prefix = entry["prefix"]
+        work_dir = pathlib.Path(entry["work_dir"]) if "work_dir" in entry else None
+        # Interrupted right after its result was committed
+        fields = parse_result_file_name(prefix + "-0.json")
+        results = catalog.query(**{name: fields[name] for name in result_field_names if name != "timestamp"}) \
+            if fields else []
+        if results:
+            if work_dir:
+                config["work_dirs"].remove(work_dir)
+            journal.record(prefix, "parsed", result_file=results[-1]["file_name"])
+            continue
+
+        # An archive without a result is archived again (under a new timestamp) along with its result
+        for archive_path in pathlib.Path(config["output_dir"]).glob(prefix + "-*.tar.*"):
+            os.remove(archive_path)
+        if entry["state"] in ["completed", "archived"] and work_dir and work_dir.is_dir():
+            sys.stderr.write(f"Workflow {prefix}: interrupted after its execution. [RESUMING]\n")
+            try:
+                finalize_experiment(config, entry["experiment"], work_dir, pathlib.Path(entry["benchmark_path"]),
+                                    PhaseTimer())
+                continue
+            except Exception as e:
+                sys.stderr.write(f"WORKFLOW {prefix} FAILED: {e}\n")
+        sys.stderr.write(f"Workflow {prefix}: interrupted while {entry['state']}. [DISCARDED]\n")
+        if work_dir:
+            config["work_dirs"].remove(work_dir)
+        journal.record(prefix, "discarded")
+    journal.clear_partial_files()
+
+
+def run_experiment_pipeline(config, experiments):
+    # Only one workflow executes at a time, but the next one is prepared and the
+    # previous ones are archived/parsed in the background while it runs. As with
+    # run_concurrent_experiments, failed runs are reported and the sweep goes on
+    num_failures = 0
+    with ThreadPoolExecutor(max_workers=1) as preparer, \
+            ThreadPoolExecutor(max_workers=config["num_postprocessing_workers"]) as finalizer:
+        finalizations = {}
+        experiments = iter(experiments)
+        experiment = next(experiments, None)
+        next_preparation = preparer.submit(prepare_experiment, config, experiment) if experiment else None
+        while experiment is not None:
+            preparation = next_preparation
+            next_experiment = next(experiments, None)
+            if next_experiment is not None:
+                next_preparation = preparer.submit(prepare_experiment, config, next_experiment)
 
-    # Generate observed workflow
-    parser = PegasusLogsParser(submit_dir=renamed_dir, ignore_auxiliary=False)
-    # generating the workflow instance object
-    workflow = parser.build_workflow(tar_file_to_generate_prefix + "-" + str(timestamp) + ".json")
-    # writing the workflow instance to a JSON file
-    workflow_path = output_dir.joinpath(tar_file_to_generate_prefix + "-" + str(timestamp) + ".json")
-    workflow.write_json(workflow_path)
+            try:
+                work_dir, benchmark_path, timer = preparation.result()
+                execute_experiment(config, experiment, work_dir, benchmark_path, timer)
+                finalizations[finalizer.submit(finalize_experiment, config, experiment,
+                                               work_dir, benchmark_path, timer)] = experiment
+            except Exception as e:
+                num_failures += 1
+                sys.stderr.write(f"WORKFLOW {experiment['prefix']} FAILED: {e}\n")
+
+            # Report post-processing failures as soon as they are known (after the last run, wait for them)
+            for finalization in list(finalizations):
+                if next_experiment is None or finalization.done():
+                    try:
+                        finalization.result()
+                    except Exception as e:
+                        num_failures += 1
+                        sys.stderr.write(f"WORKFLOW {finalizations[finalization]['prefix']} FAILED: {e}\n")
+                    del finalizations[finalization]
+            experiment = next_experiment
+    return num_failures
+
+
+def run_concurrent_experiments(config, experiments):
+    # Runs are independent (own work dir, own Pegasus submit dir), so HTCondor
+    # can schedule the jobs of several workflows at once. Experiments are only
+    # taken from the iterator when a slot frees up, as they may depend on the
+    # results of the previous ones (adaptive trials)
+    num_failures = 0
+    experiments = iter(experiments)
+    with ThreadPoolExecutor(max_workers=config["num_concurrent_runs"]) as executor:
+        futures = {}
+        while True:
+            while len(futures) < config["num_concurrent_runs"]:
+                experiment = next(experiments, None)
+                if experiment is None:
+                    break
+                futures[executor.submit(run_experiment, config, experiment)] = experiment
+            if not futures:
+                break
+            future = next(as_completed(futures))
+            experiment = futures.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                num_failures += 1
+                sys.stderr.write(f"WORKFLOW {experiment['prefix']} FAILED: {e}\n")
+    return num_failures
 
 
 def main():
@@ -573,7 +1097,8 @@ def main():
 
     # Compute actual workflow sizes if only factors were provided
     if config["workflow_size_factor"] is not None:
-        config["workflow_size"] = compute_workflow_sizes(config["workflow"], config["workflow_size_factor"])
+        config["workflow_size"] = compute_workflow_sizes(config["workflow"], config["workflow_size_factor"],
+                                                         config["size_cache"])
     else:
         tmp = {}
         for x in config["workflow_size"]:
@@ -589,46 +1114,40 @@ def main():
             print(str(desired_size) + "\t\t" + str(config["workflow_size"][desired_size]))
         sys.exit(0)
 
-    for desired_num_tasks in sorted(config["workflow_size"].keys()):
-        for cpu_work in config["cpu_work"]:
-            for cpu_fraction in config["cpu_fraction"]:
-                for data_footprint in config["data_footprint"]:
-                    for trial in range(0, config["num_trials"]):
-                        # print(f"{desired_num_tasks}-{cpu_work}-{cpu_fraction}-{data_footprint}-{trial}")
-                        output_dir = pathlib.Path(config["output_dir"])
-                        tar_file_to_generate_prefix = config[
-                                                          "workflow"] + f"-{desired_num_tasks}-{cpu_work}-{cpu_fraction}-{data_footprint}-" + \
-                                                      config["architecture"] + "-" + str(
-                            config["num_compute_nodes"]) + f"-{trial}"
-
-                        if glob.glob(str(output_dir.absolute()) + "/" + tar_file_to_generate_prefix + "-*.json"):
-                            sys.stderr.write(f"File {tar_file_to_generate_prefix}: already exists. [SKIPPING]\n")
-                            continue
-
-                        if (float(data_footprint) / float(desired_num_tasks) > 80*1000*1000):
-                            sys.stderr.write("File sizes will likely by above 80MB. [SKIPPING]\n")
-                            continue
-
-                        sys.stderr.write(f"RUNNING WORKFLOW {tar_file_to_generate_prefix}...\n")
-                        # Create a fresh working directory
-                        work_dir = create_work_dir(str(pathlib.Path.home()) + "/wfbench-workflow")
-
-                        # Create the benchmark workflow
-                        benchmark_path = create_benchmark(work_dir, config["workflow"], desired_num_tasks,
-                                                          cpu_fraction, cpu_work, data_footprint)
-
-                        # Create Pegasus workflow
-                        create_pegasus_workflow(work_dir, benchmark_path)
-
-                        # Run the Pegasus workflow
-                        run_pegasus_workflow(work_dir, str(pathlib.Path.home()))
-
-                        # Process result
-                        process_pegasus_workflow_execution(work_dir, benchmark_path, output_dir,
-                                                           tar_file_to_generate_prefix)
-
-                        # Remove working directory
-                        shutil.rmtree(str(work_dir.absolute()), ignore_errors=True)
+    config["journal"] = CampaignJournal(config["output_dir"])
+    # Kept up to date by finalize_experiment() from then on
+    config["catalog"] = ResultsCatalog(config["output_dir"])
+    # Input files linked from the input data cache are bounded by --input_data_cache_size, not by this cache
+    config["benchmark_cache"] = BenchmarkCache(config["benchmark_cache_dir"], config["benchmark_cache_size"] * 1e9,
+                                               config["input_data_cache"]) if config["benchmark_cache_dir"] else None
+    config["work_dirs"] = WorkDirManager(config["work_dir"], config["work_dir_tmpfs"], config["tmpfs_max_footprint"])
+    if not config["print_plan"]:
+        resume_campaign(config)
+
+    if config["adaptive"]:
+        experiments = get_adaptive_experiments(config)
+    else:
+        experiments = get_experiments(config)
+        if config["time_budget"] is not None or config["print_plan"]:
+            experiments, num_history_results = estimate_runtimes(config, list(experiments))
+            if config["print_plan"]:
+                print_plan(config, experiments, num_history_results)
+                sys.exit(0)
+            experiments = get_budgeted_experiments(config, experiments)
+
+    try:
+        # Adaptive trials are picked from the results of the previous ones, which the pipeline would only
+        # parse after taking the next experiment: they run in turn instead. So do local backend runs, whose
+        # tasks would otherwise compete for the cores with the preparation and archiving of other runs
+        if config["num_concurrent_runs"] == 1 and not config["adaptive"] and config["backend"] != "local":
+            num_failures = run_experiment_pipeline(config, experiments)
+        else:
+            num_failures = run_concurrent_experiments(config, experiments)
+    finally:
+        config["work_dirs"].close()
+    if num_failures:
+        sys.stderr.write(f"Error: {num_failures} workflow(s) failed\n")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
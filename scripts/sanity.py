@@ -1,166 +1,280 @@
 #!/usr/bin/python3
-import glob
+import os
+import sys
 import json
+import pickle
+from argparse import ArgumentParser
 
+import numpy as np
+import pandas as pd
 
-def get_workflow_names():
-    files = glob.glob("*.json")
-    workflow_names = set()
-    for file in files:
-        workflow_names.add(file.split("-")[0])
-    workflow_names = list(workflow_names)
-    return sorted(workflow_names)
-
-
-def get_workflow_num_tasks(workflow_name):
-    files = glob.glob(workflow_name + "-*.json")
-    num_tasks = set()
-    for file in files:
-        num_tasks.add(int(file.split("-")[1]))
-    num_tasks = list(num_tasks)
-    return sorted(num_tasks)
-
-
-def get_all_others(workflow_name, num_tasks):
-    files = glob.glob(workflow_name + "-" + str(num_tasks) + "*.json")
-    cpu_works = set()
-    data_footprints = set()
-    architectures = set()
-    num_compute_nodes = set()
-    for file in files:
-        cpu_works.add(int(file.split("-")[2]))
-        data_footprints.add(int(file.split("-")[4]))
-        architectures.add(file.split("-")[5])
-        num_compute_nodes.add(int(file.split("-")[6]))
-    return sorted(list(cpu_works)), sorted(list(data_footprints)), sorted(list(architectures)), sorted(list(num_compute_nodes))
-
-
-def get_makespans(files):
-    makespans = []
-    for file in files:
-        makespans.append(json.load(open(file))["workflow"]["execution"]["makespanInSeconds"])
-    return makespans
-
-
-def mean(l):
-    return sum(l) / len(l)
-
-def process_workflow(workflow_name):
-    num_tasks = get_workflow_num_tasks(workflow_name)
-
-    print(workflow_name + ":")
-
-    do_compute_node_sanity = False
-    do_cpu_work_sanity = False
-    do_data_footprint_sanity = True
-
-    # Looking at CPU work sanity
-    if do_cpu_work_sanity:
-        num_sanity = 0
-        num_insanity = 0
-        for num_task in num_tasks:
-            cpu_works, data_footprints, architectures, num_compute_nodes = get_all_others(workflow_name, num_tasks)
-            for architecture in architectures:
-                # print(f"{workflow_name}:{num_task}:{architecture}")
-
-                for data_footprint in data_footprints:
-                    for num_nodes in num_compute_nodes:
-                        for i in range(0, len(cpu_works) - 1):
-                            files_curr = glob.glob(f"{workflow_name}-{num_task}-{cpu_works[i]}-0.6"
-                                                   f"-{data_footprint}-{architecture}-{num_nodes}-*.json")
-                            makespans_curr = sorted(get_makespans(files_curr))
-                            if not makespans_curr:
-                                continue
-                            try:
-                                files_next = glob.glob(f"{workflow_name}-{num_task}-{cpu_works[i + 1]}-0.6"
-                                                       f"-{data_footprint}-{architecture}-{num_nodes}-*.json")
-                            except:
-                                continue
-                            makespans_next = sorted(get_makespans(files_next))
-                            if not makespans_next:
-                                continue
-
-                            # print(f"{makespans_curr}  {makespans_next}")
-                            # if max(makespans_curr) > min(makespans_next):
-                            if mean(makespans_curr) > mean(makespans_next):
-                                num_insanity += 1
-                            else:
-                                num_sanity += 1
-        print(f"  CPU work sanity={num_sanity}  insanity={num_insanity}")
-
-    # Looking at data footprint sanity
-    if do_data_footprint_sanity:
-        num_sanity = 0
-        num_insanity = 0
-        for num_task in num_tasks:
-            cpu_works, data_footprints, architectures, num_compute_nodes = get_all_others(workflow_name, num_tasks)
-            for architecture in architectures:
-                # print(f"{workflow_name}:{num_task}:{architecture}")
-
-                for cpu_work in cpu_works:
-                    for num_nodes in num_compute_nodes:
-                        for i in range(0, len(data_footprints) - 1):
-                            files_curr = glob.glob(f"{workflow_name}-{num_task}-{cpu_work}-0.6"
-                                                   f"-{data_footprints[i]}-{architecture}-{num_nodes}-*.json")
-                            makespans_curr = sorted(get_makespans(files_curr))
-                            if not makespans_curr:
-                                continue
-                            try:
-                                files_next = glob.glob(f"{workflow_name}-{num_task}-{cpu_work}-0.6"
-                                                       f"-{data_footprints[i+1]}-{architecture}-{num_nodes}-*.json")
-                            except:
-                                continue
-                            makespans_next = sorted(get_makespans(files_next))
-                            if not makespans_next:
-                                continue
-
-                            # print(f"{makespans_curr}  {makespans_next}")
-                            # if max(makespans_curr) > min(makespans_next):
-                            if mean(makespans_curr) > mean(makespans_next):
-                                num_insanity += 1
-                            else:
-                                num_sanity += 1
-        print(f"  Data footprint sanity={num_sanity}  insanity={num_insanity}")
-
-    if do_compute_node_sanity:
-        # Looking at compute node sanity
-        num_sanity = 0
-        num_insanity = 0
-        for num_task in num_tasks:
-            cpu_works, data_footprints, architectures, num_compute_nodes = get_all_others(workflow_name, num_tasks)
-            for architecture in architectures:
-                # print(f"{workflow_name}:{num_task}:{architecture}")
-
-                for cpu_work in cpu_works:
-                    for data_footprint in data_footprints:
-                        for i in range(0, len(num_compute_nodes) - 1):
-                            files_curr = glob.glob(f"{workflow_name}-{num_task}-{cpu_work}-0.6"
-                                                   f"-{data_footprint}-{architecture}-{num_compute_nodes[i]}-*.json")
-                            makespans_curr = sorted(get_makespans(files_curr))
-                            if not makespans_curr:
-                                continue
-                            try:
-                                files_next = glob.glob(f"{workflow_name}-{num_task}-{cpu_work}-0.6"
-                                                       f"-{data_footprint}-{architecture}-{num_compute_nodes[i+1]}-*.json")
-                            except:
-                                continue
-                            makespans_next = sorted(get_makespans(files_next))
-                            if not makespans_next:
-                                continue
-
-                            # print(f"{makespans_curr}  {makespans_next}")
-                            # if min(makespans_curr) < max(makespans_next):
-                            if mean(makespans_curr) < mean(makespans_next):
-                                num_insanity += 1
-                            else:
-                                num_sanity += 1
-        print(f"  Compute node sanity={num_sanity}  insanity={num_insanity}")
+from results_catalog import ResultsCatalog, result_field_names
+
+CACHE_FILE_NAME = ".sanity-cache.pickle"
+CACHE_VERSION = 1
+
+# Maximum #values drawn at once when bootstrapping
+BOOTSTRAP_BLOCK_SIZE = 10 * 1000 * 1000
+
+# Parameters that define an experiment cell (i.e., all but the trial)
+cell_fields = ["workflow", "num_tasks", "cpu_work", "cpu_fraction", "data_footprint", "architecture",
+               "num_compute_nodes"]
+
+# (parameter, label, direction): makespans should not decrease (direction=1), or not
+# increase (direction=-1), when the parameter grows
+sanity_checks = [("cpu_work", "CPU work", 1),
+                 ("data_footprint", "Data footprint", 1),
+                 ("num_compute_nodes", "Compute node", -1)]
+
+
+def summarize_result_file(file):
+    # Returns the makespan and the per-task runtimes (by task id) of a result file
+    with open(file) as f:
+        workflow = json.load(f)["workflow"]
+    tasks = workflow.get("execution", {}).get("tasks") or workflow.get("tasks") or []
+    task_runtimes = {task.get("id", task.get("name")): task.get("runtimeInSeconds") for task in tasks}
+    return workflow["execution"]["makespanInSeconds"], task_runtimes
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+    return None
+
+
+def save_cache(cache_path, cache):
+    tmp_path = str(cache_path) + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+
+def load_results(output_dir, cached_results=None):
+    """Returns one row per result file (parameters, mtime, makespan, task runtimes), reading only the
+    files that are not in cached_results with the same mtime, and the set of (workflow, #tasks) whose
+    results changed since cached_results."""
+    catalog = ResultsCatalog(output_dir)
+    results = pd.DataFrame(catalog.query(), columns=result_field_names + ["file_name"])
+    mtimes = {entry.name: entry.stat().st_mtime_ns for entry in os.scandir(output_dir)}
+    results["mtime"] = [mtimes.get(file_name) for file_name in results["file_name"]]
+
+    if cached_results is None:
+        cached_results = pd.DataFrame(columns=list(results.columns) + ["makespan", "task_runtimes"])
+    cached = cached_results.set_index("file_name")
+    is_cached = results["file_name"].isin(cached.index)
+    is_cached[is_cached] = (cached.loc[results["file_name"][is_cached], "mtime"].values ==
+                            results["mtime"][is_cached].values)
+
+    summaries = cached.loc[results["file_name"][is_cached], ["makespan", "task_runtimes"]]
+    results.loc[is_cached, "makespan"] = summaries["makespan"].values
+    results.loc[is_cached, "task_runtimes"] = pd.Series(list(summaries["task_runtimes"]),
+                                                        index=results.index[is_cached], dtype=object)
+    for index in results.index[~is_cached]:
+        makespan, task_runtimes = summarize_result_file(os.path.join(output_dir, results.at[index, "file_name"]))
+        results.at[index, "makespan"] = makespan
+        results.at[index, "task_runtimes"] = task_runtimes
+    results["makespan"] = results["makespan"].astype(float)
+
+    # Results that were added, changed, or removed
+    removed = cached_results[~cached_results["file_name"].isin(results["file_name"])]
+    changed_scopes = set(zip(results["workflow"][~is_cached], results["num_tasks"][~is_cached])) | \
+        set(zip(removed["workflow"], removed["num_tasks"]))
+    return results, changed_scopes, int((~is_cached).sum())
+
+
+def get_cell_means(results):
+    return results.groupby(cell_fields)["makespan"].mean().reset_index()
+
+
+def get_adjacent_cells(cells, parameter):
+    """Returns the positions (in cells) of the pairs of cells that only differ by adjacent values of
+    parameter, among all the values used for the same workflow and #tasks."""
+    others = [field for field in cell_fields if field != parameter]
+    ranks = cells.groupby(["workflow", "num_tasks"])[parameter].rank(method="dense")
+    order = np.lexsort([cells[parameter].values] + [cells[field].values for field in reversed(others)])
+    sorted_cells = cells.iloc[order]
+    same_group = np.ones(len(order) - 1, dtype=bool) if len(order) else np.zeros(0, dtype=bool)
+    for field in others:
+        values = sorted_cells[field].values
+        same_group &= values[:-1] == values[1:]
+    sorted_ranks = ranks.values[order]
+    adjacent = same_group & (sorted_ranks[1:] - sorted_ranks[:-1] == 1)
+    return order[:-1][adjacent], order[1:][adjacent]
+
+
+def get_pairs(cells, parameter, direction):
+    """Compares the mean makespans of adjacent cells (see get_adjacent_cells) and returns one row per
+    pair compared, telling whether makespans go the wrong way."""
+    curr, succ = get_adjacent_cells(cells, parameter)
+    makespans = cells["makespan"].values
+    return pd.DataFrame({"workflow": cells["workflow"].values[curr],
+                         "num_tasks": cells["num_tasks"].values[curr],
+                         "insane": direction * (makespans[curr] - makespans[succ]) > 0})
+
+
+def get_cell_statistics(results, num_resamples, confidence, seed=0):
+    """Returns one row per cell with its #trials, mean makespan, standard deviation, and bootstrap
+    confidence interval of the mean, along with the (#cells x num_resamples) bootstrap means."""
+    cells = results.groupby(cell_fields)["makespan"].agg(num_trials="size", makespan="mean",
+                                                         std="std").reset_index()
+    # Trials of each cell, padded into a (#cells x max #trials) matrix
+    cell_index = results.groupby(cell_fields).ngroup().values
+    trial_index = results.groupby(cell_fields).cumcount().values
+    num_trials = cells["num_trials"].values
+    samples = np.zeros((len(cells), num_trials.max() if len(cells) else 0))
+    samples[cell_index, trial_index] = results["makespan"].values
+
+    # Cells are resampled all at once (by blocks, to bound memory usage): each resample
+    # draws #trials values among the cell's own trials
+    rng = np.random.default_rng(seed)
+    bootstrap_means = np.zeros((len(cells), num_resamples))
+    block_size = max(1, BOOTSTRAP_BLOCK_SIZE // (num_resamples * max(1, samples.shape[1])))
+    for start in range(0, len(cells), block_size):
+        block = slice(start, start + block_size)
+        block_num_trials = num_trials[block][:, None, None]
+        draws = (rng.random((len(block_num_trials), num_resamples, samples.shape[1])) * block_num_trials).astype(int)
+        valid = np.arange(samples.shape[1])[None, None, :] < block_num_trials
+        resampled = np.take_along_axis(samples[block][:, None, :], draws, axis=2)
+        bootstrap_means[block] = (resampled * valid).sum(axis=2) / num_trials[block][:, None]
+
+    alpha = (1.0 - confidence) / 2.0
+    cells["ci_low"], cells["ci_high"] = np.quantile(bootstrap_means, [alpha, 1.0 - alpha], axis=1)
+    cells["relative_ci"] = (cells["ci_high"] - cells["ci_low"]) / (2.0 * cells["makespan"])
+    return cells, bootstrap_means
+
+
+def get_pair_statistics(cells, bootstrap_means, parameter, direction, confidence):
+    """Returns one row per pair of adjacent cells with the wrong-way difference of their mean makespans
+    (positive when makespans go the wrong way), its bootstrap confidence interval, and its effect size
+    (Cohen's d); a pair is significantly non-monotonic when the whole interval is positive, and
+    inconclusive when makespans go the wrong way without being significantly so."""
+    curr, succ = get_adjacent_cells(cells, parameter)
+    alpha = (1.0 - confidence) / 2.0
+    differences = direction * (bootstrap_means[curr] - bootstrap_means[succ])
+    ci_low, ci_high = np.quantile(differences, [alpha, 1.0 - alpha], axis=1) if len(curr) else ([], [])
+    n_curr, n_succ = cells["num_trials"].values[curr], cells["num_trials"].values[succ]
+    pooled_variance = ((n_curr - 1) * cells["std"].values[curr] ** 2 + (n_succ - 1) * cells["std"].values[succ] ** 2) \
+        / np.maximum(n_curr + n_succ - 2, 1)
+    difference = direction * (cells["makespan"].values[curr] - cells["makespan"].values[succ])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effect_size = difference / np.sqrt(pooled_variance)
+    pairs = pd.DataFrame({"curr": curr, "succ": succ, "workflow": cells["workflow"].values[curr],
+                          "difference": difference, "ci_low": ci_low, "ci_high": ci_high,
+                          "effect_size": effect_size})
+    # A single trial says nothing about variance, so it can never make a difference significant
+    pairs["significant"] = (pairs["ci_low"] > 0) & (n_curr >= 2) & (n_succ >= 2)
+    pairs["inconclusive"] = (pairs["difference"] > 0) & ~pairs["significant"]
+    return pairs
+
+
+def describe_cell(cell, parameter=None):
+    description = f"{cell['workflow']}-{cell['num_tasks']}-{cell['cpu_work']}-{cell['cpu_fraction']}-" \
+                  f"{cell['data_footprint']}-{cell['architecture']}-{cell['num_compute_nodes']}"
+    return description if parameter is None else f"{parameter}={cell[parameter]} ({description})"
+
+
+def report_statistics(results, num_resamples, confidence, ci_target):
+    cells, bootstrap_means = get_cell_statistics(results, num_resamples, confidence)
+    pairs = {parameter: get_pair_statistics(cells, bootstrap_means, parameter, direction, confidence)
+             for parameter, _, direction in sanity_checks}
+
+    # Cells with too few trials or too wide an interval, and both cells of inconclusive pairs,
+    # would benefit from more trials
+    needs_trials = ((cells["num_trials"] < 2) | (cells["relative_ci"] > ci_target)).to_numpy(copy=True)
+    for parameter_pairs in pairs.values():
+        inconclusive = parameter_pairs[parameter_pairs["inconclusive"]]
+        needs_trials[inconclusive["curr"].values] = True
+        needs_trials[inconclusive["succ"].values] = True
+
+    for workflow_name in sorted(results["workflow"].unique()):
+        print(workflow_name + ":")
+        for parameter, label, _ in sanity_checks:
+            workflow_pairs = pairs[parameter][pairs[parameter]["workflow"] == workflow_name]
+            print(f"  {label}: {len(workflow_pairs)} pairs, "
+                  f"{int(workflow_pairs['significant'].sum())} significantly non-monotonic, "
+                  f"{int(workflow_pairs['inconclusive'].sum())} inconclusive")
+            for _, pair in workflow_pairs[workflow_pairs["significant"]].iterrows():
+                curr, succ = cells.iloc[pair["curr"]], cells.iloc[pair["succ"]]
+                print(f"    {describe_cell(curr, parameter)} -> {parameter}={succ[parameter]}: "
+                      f"{pair['difference']:+.2f}s [{pair['ci_low']:+.2f}, {pair['ci_high']:+.2f}], "
+                      f"d={pair['effect_size']:.2f}")
+
+        workflow_cells = cells[(cells["workflow"] == workflow_name).values & needs_trials]
+        print(f"  Cells needing more trials: {len(workflow_cells)}")
+        for _, cell in workflow_cells.iterrows():
+            print(f"    {describe_cell(cell)}: {cell['num_trials']} trials, "
+                  f"mean={cell['makespan']:.2f}s, relative CI={cell['relative_ci'] * 100:.1f}%")
+
+
+def count_pairs(pairs):
+    return pairs.groupby("workflow")["insane"].agg(num_insanity="sum", num_pairs="size")
+
+
+def in_scopes(frame, scopes):
+    return pd.Series([scope in scopes for scope in zip(frame["workflow"], frame["num_tasks"])],
+                     index=frame.index, dtype=bool)
 
 
 def main():
-    workflow_names = get_workflow_names()
-    for workflow_name in workflow_names:
-        process_workflow(workflow_name)
+    parser = ArgumentParser(description="Check that makespans evolve as expected with experiment parameters")
+    parser.add_argument("output_dir", nargs='?', default=".", help="<directory with the result files>")
+    parser.add_argument("-i", "--incremental",
+                        action='store_true',
+                        help="<only read new or changed result files, and only re-check the affected parameter "
+                             "groups, using the cache of the previous run>")
+    parser.add_argument("--cache", help="<cache file> (default: <output dir>/" + CACHE_FILE_NAME + ")")
+    parser.add_argument("-s", "--statistical",
+                        action='store_true',
+                        help="<compare cells using bootstrap confidence intervals instead of means only, and "
+                             "report the cells that need more trials>")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="<confidence level of the intervals>")
+    parser.add_argument("--num_resamples", type=int, default=2000,
+                        help="<# of bootstrap resamples>")
+    parser.add_argument("--ci_target", type=float, default=0.05,
+                        help="<relative half-width of the confidence interval of a cell's mean makespan "
+                             "above which the cell needs more trials>")
+    parsed_args = parser.parse_args(sys.argv[1:])
+    cache_path = parsed_args.cache or os.path.join(parsed_args.output_dir, CACHE_FILE_NAME)
+
+    cache = load_cache(cache_path) if parsed_args.incremental else None
+    results, changed_scopes, num_read = load_results(parsed_args.output_dir,
+                                                     cache["results"] if cache else None)
+    if parsed_args.incremental:
+        print(f"({num_read} new or changed result files)")
+
+    # Only the cells of the (workflow, #tasks) whose results changed need to be compared again
+    cells = get_cell_means(results)
+    pairs = {}
+    for parameter, _, direction in sanity_checks:
+        if cache:
+            cached_pairs = cache["pairs"][parameter]
+            new_pairs = get_pairs(cells[in_scopes(cells, changed_scopes)], parameter, direction)
+            pairs[parameter] = pd.concat([cached_pairs[~in_scopes(cached_pairs, changed_scopes)], new_pairs])
+        else:
+            pairs[parameter] = get_pairs(cells, parameter, direction)
+
+    if parsed_args.incremental:
+        save_cache(cache_path, {"version": CACHE_VERSION, "results": results, "pairs": pairs})
+
+    if parsed_args.statistical:
+        report_statistics(results, parsed_args.num_resamples, parsed_args.confidence, parsed_args.ci_target)
+        return
+
+    checks = [(label, count_pairs(pairs[parameter])) for parameter, label, _ in sanity_checks]
+    for workflow_name in sorted(results["workflow"].unique()):
+        print(workflow_name + ":")
+        for label, counts in checks:
+            num_pairs, num_insanity = 0, 0
+            if workflow_name in counts.index:
+                num_pairs = int(counts.loc[workflow_name, "num_pairs"])
+                num_insanity = int(counts.loc[workflow_name, "num_insanity"])
+            print(f"  {label} sanity={num_pairs - num_insanity}  insanity={num_insanity}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+
+import json
+import math
+import pathlib
+import getpass
+import random
+import collections
+from datetime import datetime
+
+from input_data import materialize_input_file
+
+# Expected # of random parents of a layered/mapreduce task when no edge density is given
+DEFAULT_NUM_RANDOM_PARENTS = 2
+
+
+def _encode(value, level, compact):
+    if compact:
+        return json.dumps(value, separators=(",", ":"))
+    # JSON strings never contain raw newlines, so nested values can be re-indented
+    return json.dumps(value, indent=4).replace("\n", "\n" + "    " * level)
+
+
+def write_workflow_json(path, workflow_json, tasks, compact=False):
+    """Writes workflow_json to path, streaming tasks (an iterable) as the workflow's task list.
+
+    The output is identical to json.dumps(workflow_json, indent=4) with the tasks in place, or
+    to a whitespace-free encoding if compact, but only one task is held in memory at a time."""
+    newline = "" if compact else "\n"
+    colon = ":" if compact else ": "
+
+    def indent(level):
+        return "" if compact else "    " * level
+
+    with open(path, 'w') as f:
+        f.write("{")
+        for key, value in workflow_json.items():
+            if key != "workflow":
+                f.write(newline + indent(1) + json.dumps(key) + colon + _encode(value, 1, compact) + ",")
+        f.write(newline + indent(1) + '"workflow"' + colon + "{")
+        for key, value in workflow_json["workflow"].items():
+            if key != "tasks":
+                f.write(newline + indent(2) + json.dumps(key) + colon + _encode(value, 2, compact) + ",")
+        f.write(newline + indent(2) + '"tasks"' + colon + "[")
+        first = True
+        for task in tasks:
+            f.write(("" if first else ",") + newline + indent(3) + _encode(task, 3, compact))
+            first = False
+        f.write((newline + indent(2) if not first else "") + "]")
+        f.write(newline + indent(1) + "}" + newline + "}")
+
+
+def create_chain_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir,
+                          compact=False, input_file_writer=None):
+    def get_arguments(task_index):
+        arguments = [
+            "chain_" + str(task_index).zfill(8),
+            "--percent-cpu " + str(cpu_fraction),
+            "--cpu-work " + str(cpu_work),
+            "--path-lock " + str(lock_files_folder) + "/cores.txt.lock",
+            "--path-cores " + str(lock_files_folder) + "/cores.txt",
+            "--out {'chain_" + str(task_index).zfill(8) + "_output.txt': " +
+            str(file_size_in_bytes) + "}"
+        ]
+
+        if task_index == 1:
+            arguments.append("chain_" + str(task_index).zfill(8) + "_input.txt")
+        else:
+            arguments.append("chain_" + str(task_index - 1).zfill(8) + "_output.txt")
+
+        return arguments
+
+    # method to get task parents
+    def get_parents(task_index):
+        parents = []
+        if task_index > 1:
+            parents.append("chain_" + str(task_index - 1).zfill(8))
+        return parents
+
+    # method to get task children
+    def get_children(task_index):
+        children = []
+        if task_index < desired_num_tasks:
+            children.append("chain_" + str(task_index + 1).zfill(8))
+        return children
+
+    # method to get task files
+    def get_files(task_index):
+        files = []
+
+        if task_index == 1:
+            files.append({
+                "link": "input",
+                "name": "chain_" + str(task_index).zfill(8) + "_input.txt",
+                "sizeInBytes": file_size_in_bytes
+            })
+        else:
+            files.append({
+                "link": "input",
+                "name": "chain_" + str(task_index - 1).zfill(8) + "_output.txt",
+                "sizeInBytes": file_size_in_bytes
+            })
+
+        files.append({
+            "link": "output",
+            "name": "chain_" + str(task_index).zfill(8) + "_output.txt",
+            "sizeInBytes": file_size_in_bytes
+        })
+
+        return files
+
+    # create workflow
+    file_size_in_bytes = math.ceil(data_footprint / (desired_num_tasks + 1))
+
+    workflow_json = {
+        "name": "Chain-Benchmark",
+        "description": "Instance generated with WfCommons - https://wfcommons.org",
+        "createdAt": str(datetime.utcnow().isoformat()),
+        "schemaVersion": "1.4",
+        "author": {
+            "name": str(getpass.getuser()),
+            "email": "support@wfcommons.org"
+        },
+        "wms": {
+            "name": "WfCommons",
+            "version": "0.9-dev",
+            "url": "https://docs.wfcommons.org/en/v0.9-dev/"
+        },
+        "workflow": {
+            "executedAt": str(datetime.now().astimezone().strftime("%Y%m%dT%H%M%S%z")),
+            "makespanInSeconds": 0
+        }
+    }
+
+    # create num_tasks tasks, one at a time
+    def get_tasks():
+        for i in range(1, desired_num_tasks + 1):
+            yield {
+                "name": "chain_" + str(i).zfill(8),
+                "id": str(i).zfill(8),
+                "type": "compute",
+                "command": {
+                    "program": str(pathlib.Path.home()) + "/wfcommons/bin/wfbench",
+                    "arguments": get_arguments(i)
+                },
+                "parents": get_parents(i),
+                "children": get_children(i),
+                "files": get_files(i),
+                "cores": 1
+            }
+
+    file_name = f"chain-benchmark-{desired_num_tasks}.json"
+    write_workflow_json(str(work_dir.absolute()) + "/" + file_name, workflow_json, get_tasks(), compact)
+
+    # Create input dir and file
+    input_dir = work_dir.joinpath("data")
+    input_dir.mkdir()
+    write_input_file = input_file_writer or materialize_input_file
+    write_input_file(input_dir.joinpath("chain_00000001_input.txt"), file_size_in_bytes)
+
+    return pathlib.Path(str(work_dir.absolute()) + "/" + file_name)
+
+
+def create_forkjoin_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir,
+                             compact=False, input_file_writer=None):
+    ###
+    # Creates a forkjoin workflow
+    #      1
+    #     /|\
+    #    / | \
+    #   2  3  ...
+    #    \ | /
+    #     \|/
+    #      N
+    ##
+
+    # create workflow
+    if desired_num_tasks < 4:
+        raise Exception("Cannot create a forkjoin benchmark with fewer than 4 tasks")
+
+    file_size_in_bytes = math.ceil(data_footprint / (desired_num_tasks + 1))
+
+    workflow_json = {
+        "name": "Forkjoin-Benchmark",
+        "description": "Instance generated with WfCommons - https://wfcommons.org",
+        "createdAt": str(datetime.utcnow().isoformat()),
+        "schemaVersion": "1.3",
+        "author": {
+            "name": str(getpass.getuser()),
+            "email": "support@wfcommons.org"
+        },
+        "wms": {
+            "name": "WfCommons",
+            "version": "0.9-dev",
+            "url": "https://docs.wfcommons.org/en/v0.9-dev/"
+        },
+        "workflow": {
+            "executedAt": str(datetime.now().astimezone().strftime("%Y%m%dT%H%M%S%z")),
+            "makespanInSeconds": 0
+        }
+    }
+
+    # Task names and file records are built once and shared by all the tasks that
+    # reference them, so that generation is linear in the number of tasks
+    ids = [str(i).zfill(8) for i in range(0, desired_num_tasks + 1)]
+    names = ["forkjoin_" + task_id for task_id in ids]
+    output_file_names = [name + "_output.txt" for name in names]
+    output_files = [{"link": "output", "name": file_name, "sizeInBytes": file_size_in_bytes}
+                    for file_name in output_file_names]
+    input_file_name = names[1] + "_input.txt"
+    program = str(pathlib.Path.home()) + "/wfcommons/bin/wfbench"
+    common_arguments = [
+        "--percent-cpu " + str(cpu_fraction),
+        "--cpu-work " + str(cpu_work),
+        "--path-lock " + str(lock_files_folder) + "/cores.txt.lock",
+        "--path-cores " + str(lock_files_folder) + "/cores.txt"
+    ]
+    fork_input = {"link": "input", "name": output_file_names[1], "sizeInBytes": file_size_in_bytes}
+    fork_names = names[2:desired_num_tasks]
+    fork_output_file_names = output_file_names[2:desired_num_tasks]
+    join_inputs = [{"link": "input", "name": file_name, "sizeInBytes": file_size_in_bytes}
+                   for file_name in fork_output_file_names]
+    join_name = [names[desired_num_tasks]]
+
+    def get_task(task_index, input_file_names, parents, children, input_files):
+        return {
+            "name": names[task_index],
+            "id": ids[task_index],
+            "type": "compute",
+            "command": {
+                "program": program,
+                "arguments": [names[task_index]] + common_arguments +
+                             ["--out {'" + output_file_names[task_index] + "': " + str(file_size_in_bytes) + "}"] +
+                             input_file_names
+            },
+            "parents": parents,
+            "children": children,
+            "files": input_files + [output_files[task_index]],
+            "cores": 1
+        }
+
+    # create num_tasks tasks, one at a time
+    def get_tasks():
+        yield get_task(1, [input_file_name], [], fork_names,
+                       [{"link": "input", "name": input_file_name, "sizeInBytes": file_size_in_bytes}])
+        for i in range(2, desired_num_tasks):
+            yield get_task(i, [output_file_names[1]], [names[1]], join_name, [fork_input])
+        yield get_task(desired_num_tasks, fork_output_file_names, fork_names, [], join_inputs)
+
+    # Create input dir and file
+    input_dir = work_dir.joinpath("data")
+    input_dir.mkdir()
+    write_input_file = input_file_writer or materialize_input_file
+    write_input_file(input_dir.joinpath("forkjoin_00000001_input.txt"), file_size_in_bytes)
+
+    file_name = f"forkjoin-benchmark-{desired_num_tasks}.json"
+    write_workflow_json(str(work_dir.absolute()) + "/" + file_name, workflow_json, get_tasks(), compact)
+
+    return pathlib.Path(str(work_dir.absolute()) + "/" + file_name)
+
+
+def get_layers(num_tasks, size, num_layers):
+    # Boundaries of consecutive layers/stages: of size tasks each (the last one takes what
+    # is left), or num_layers of them with sizes that differ by at most 1
+    if num_layers:
+        return [(i * num_tasks // num_layers + 1, (i + 1) * num_tasks // num_layers + 1)
+                for i in range(0, num_layers)]
+    return [(start, min(start + size, num_tasks + 1)) for start in range(1, num_tasks + 1, size)]
+
+
+def get_edge_density(edge_density, num_candidates):
+    # By default, tasks get DEFAULT_NUM_RANDOM_PARENTS parents on average, whatever the width: a fixed
+    # density would give Θ(#tasks * width) edges
+    if edge_density is None:
+        return min(1.0, DEFAULT_NUM_RANDOM_PARENTS / num_candidates)
+    return edge_density
+
+
+def get_random_parents(rng, candidates, edge_density):
+    # Each candidate with probability edge_density (and at least one of them)
+    if edge_density >= 1.0:
+        return list(candidates)
+    # Geometric skips, so that the cost is linear in the number of edges
+    parents = []
+    index = -1
+    while edge_density > 0.0:
+        index += 1 + int(math.log(1.0 - rng.random()) / math.log(1.0 - edge_density))
+        if index >= len(candidates):
+            break
+        parents.append(candidates[index])
+    if not parents:
+        parents.append(rng.choice(candidates))
+    return parents
+
+
+def get_layered_dag(num_tasks, width, edge_density, seed, depth=None):
+    ###
+    # Layers of (at most) width tasks, or depth layers; each task of a layer depends on
+    # each task of the previous layer with probability edge_density (and on at least one
+    # of them)
+    ##
+    rng = random.Random(seed)
+    parents = [[] for _ in range(0, num_tasks + 1)]
+    previous_layer = []
+    for layer_start, layer_end in get_layers(num_tasks, width, depth):
+        layer = list(range(layer_start, layer_end))
+        if previous_layer:
+            layer_edge_density = get_edge_density(edge_density, len(previous_layer))
+            for task in layer:
+                parents[task] = get_random_parents(rng, previous_layer, layer_edge_density)
+        previous_layer = layer
+    return parents
+
+
+def get_tree_shape(num_tasks, fan_out):
+    # Smallest fan-out tree (#tasks, #leaves) for which merging fan_out leaves at a time
+    # would reach num_tasks (bisected, as the total grows with the fan-out tree); the
+    # difference is absorbed by merging more leaves at a time
+    def get_num_leaves(num_fan_out_tasks):
+        return num_fan_out_tasks - (num_fan_out_tasks + fan_out - 2) // fan_out
+
+    low, high = 0, num_tasks
+    while high - low > 1:
+        middle = (low + high) // 2
+        if middle + (get_num_leaves(middle) + fan_out - 3) // (fan_out - 1) >= num_tasks:
+            high = middle
+        else:
+            low = middle
+    return high, get_num_leaves(high)
+
+
+def get_tree_depth(num_fan_out_tasks, fan_out):
+    # Levels of the fan-out tree
+    depth, num_level_tasks, last_task = 1, 1, 1
+    while last_task < num_fan_out_tasks:
+        num_level_tasks *= fan_out
+        last_task += num_level_tasks
+        depth += 1
+    return depth
+
+
+def get_tree_fan_out(num_tasks, depth):
+    # Smallest fan-out for which the fan-out tree has at most depth levels
+    for fan_out in range(2, num_tasks):
+        num_fan_out_tasks, num_leaves = get_tree_shape(num_tasks, fan_out)
+        if num_tasks - num_fan_out_tasks >= 1 and get_tree_depth(num_fan_out_tasks, fan_out) <= depth:
+            return fan_out
+    raise Exception(f"Cannot create a tree benchmark with {num_tasks} tasks and {depth} fan-out levels")
+
+
+def get_tree_dag(num_tasks, fan_out=2):
+    ###
+    # A fan-out tree (of fan_out children per task) whose leaves are merged back by
+    # a fan-in tree (of fan_out parents per task, or a few more)
+    #        1
+    #      /   \
+    #     2     3
+    #    / \   / \
+    #   4   5 6   7
+    #    \ /   \ /
+    #     8     9
+    #      \   /
+    #       10
+    ##
+    num_fan_out_tasks, num_leaves = get_tree_shape(num_tasks, fan_out)
+    num_merges = num_tasks - num_fan_out_tasks
+    if num_merges < 1:
+        raise Exception(f"Cannot create a tree benchmark with {num_tasks} tasks and a fan-out of {fan_out}")
+
+    parents = [[] for _ in range(0, num_tasks + 1)]
+    for task in range(2, num_fan_out_tasks + 1):
+        parents[task].append((task - 2) // fan_out + 1)
+
+    # Each merge takes (num_leaves - 1) / num_merges leaves more than it outputs (the first
+    # ones take the remainder)
+    frontier = collections.deque(range(num_fan_out_tasks - num_leaves + 1, num_fan_out_tasks + 1))
+    arity, num_larger_merges = divmod(num_leaves - 1, num_merges)
+    for task in range(num_fan_out_tasks + 1, num_tasks + 1):
+        num_merged = arity + 1 + (1 if num_larger_merges > 0 else 0)
+        num_larger_merges -= 1
+        parents[task] = [frontier.popleft() for _ in range(0, num_merged)]
+        frontier.append(task)
+    return parents
+
+
+def get_mapreduce_dag(num_tasks, width, edge_density, seed, depth=None):
+    ###
+    # Stages of width map tasks followed by width/2 reduce tasks (or depth stages, with
+    # twice as many map tasks as reduce tasks); each reduce task reads from each map task
+    # of its stage with probability edge_density (and from at least one of them), and
+    # the map tasks of the next stage each read the output of one reduce task of the
+    # previous stage
+    ##
+    rng = random.Random(seed)
+    parents = [[] for _ in range(0, num_tasks + 1)]
+    previous_reducers = []
+    for stage_start, stage_end in get_layers(num_tasks, width + max(1, width // 2), depth):
+        num_stage_tasks = stage_end - stage_start
+        if depth:
+            num_reducers = max(1, num_stage_tasks // 3)
+        else:
+            num_reducers = min(max(1, width // 2), num_stage_tasks // 2)
+        mappers = list(range(stage_start, stage_end - num_reducers))
+        reducers = list(range(stage_end - num_reducers, stage_end))
+        for i, mapper in enumerate(mappers):
+            if previous_reducers:
+                parents[mapper].append(previous_reducers[i % len(previous_reducers)])
+        stage_edge_density = get_edge_density(edge_density, len(mappers))
+        for reducer in reducers:
+            parents[reducer] = get_random_parents(rng, mappers, stage_edge_density)
+        previous_reducers = reducers
+    return parents
+
+
+def create_dag_workflow(kind, parents, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir,
+                        compact=False, input_file_writer=None):
+    # parents[i] lists the parents of task i (tasks are numbered from 1); each task
+    # writes one output file, read by all its children, and tasks without parents
+    # read an input file of their own
+    num_tasks = len(parents) - 1
+    children = [[] for _ in range(0, num_tasks + 1)]
+    for task in range(1, num_tasks + 1):
+        for parent in parents[task]:
+            children[parent].append(task)
+    roots = [task for task in range(1, num_tasks + 1) if not parents[task]]
+
+    file_size_in_bytes = math.ceil(data_footprint / (num_tasks + len(roots)))
+
+    ids = [str(i).zfill(8) for i in range(0, num_tasks + 1)]
+    names = [kind + "_" + task_id for task_id in ids]
+    output_file_names = [name + "_output.txt" for name in names]
+    output_files = [{"link": "output", "name": file_name, "sizeInBytes": file_size_in_bytes}
+                    for file_name in output_file_names]
+    input_files = [{"link": "input", "name": file_name, "sizeInBytes": file_size_in_bytes}
+                   for file_name in output_file_names]
+    program = str(pathlib.Path.home()) + "/wfcommons/bin/wfbench"
+    common_arguments = [
+        "--percent-cpu " + str(cpu_fraction),
+        "--cpu-work " + str(cpu_work),
+        "--path-lock " + str(lock_files_folder) + "/cores.txt.lock",
+        "--path-cores " + str(lock_files_folder) + "/cores.txt"
+    ]
+
+    workflow_json = {
+        "name": kind.capitalize() + "-Benchmark",
+        "description": "Instance generated with WfCommons - https://wfcommons.org",
+        "createdAt": str(datetime.utcnow().isoformat()),
+        "schemaVersion": "1.4",
+        "author": {
+            "name": str(getpass.getuser()),
+            "email": "support@wfcommons.org"
+        },
+        "wms": {
+            "name": "WfCommons",
+            "version": "0.9-dev",
+            "url": "https://docs.wfcommons.org/en/v0.9-dev/"
+        },
+        "workflow": {
+            "executedAt": str(datetime.now().astimezone().strftime("%Y%m%dT%H%M%S%z")),
+            "makespanInSeconds": 0
+        }
+    }
+
+    # create num_tasks tasks, one at a time
+    def get_tasks():
+        for i in range(1, num_tasks + 1):
+            if parents[i]:
+                input_file_names = [output_file_names[parent] for parent in parents[i]]
+                files = [input_files[parent] for parent in parents[i]]
+            else:
+                input_file_names = [names[i] + "_input.txt"]
+                files = [{"link": "input", "name": input_file_names[0], "sizeInBytes": file_size_in_bytes}]
+            yield {
+                "name": names[i],
+                "id": ids[i],
+                "type": "compute",
+                "command": {
+                    "program": program,
+                    "arguments": [names[i]] + common_arguments +
+                                 ["--out {'" + output_file_names[i] + "': " + str(file_size_in_bytes) + "}"] +
+                                 input_file_names
+                },
+                "parents": [names[parent] for parent in parents[i]],
+                "children": [names[child] for child in children[i]],
+                "files": files + [output_files[i]],
+                "cores": 1
+            }
+
+    file_name = f"{kind}-benchmark-{num_tasks}.json"
+    write_workflow_json(str(work_dir.absolute()) + "/" + file_name, workflow_json, get_tasks(), compact)
+
+    # Create input dir and files
+    input_dir = work_dir.joinpath("data")
+    input_dir.mkdir()
+    write_input_file = input_file_writer or materialize_input_file
+    for root in roots:
+        write_input_file(input_dir.joinpath(names[root] + "_input.txt"), file_size_in_bytes)
+
+    return pathlib.Path(str(work_dir.absolute()) + "/" + file_name)
+
+
+def create_layered_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir,
+                            compact=False, input_file_writer=None, width=None, depth=None, edge_density=None, seed=0):
+    if depth is not None and depth > desired_num_tasks:
+        raise Exception(f"Cannot create a layered benchmark with {depth} layers of {desired_num_tasks} tasks")
+    width = width or max(1, math.isqrt(desired_num_tasks))
+    return create_dag_workflow("layered", get_layered_dag(desired_num_tasks, width, edge_density, seed, depth),
+                               cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir, compact,
+                               input_file_writer)
+
+
+def create_tree_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir,
+                         compact=False, input_file_writer=None, width=None, depth=None, edge_density=None, seed=None):
+    # width is the fan-out of the tree, and depth its # of fan-out levels (trees have no random edges,
+    # so edge_density and seed do not apply)
+    if desired_num_tasks < 4:
+        raise Exception("Cannot create a tree benchmark with fewer than 4 tasks")
+    fan_out = width or (get_tree_fan_out(desired_num_tasks, depth) if depth else 2)
+    if fan_out < 2:
+        raise Exception("Cannot create a tree benchmark with a fan-out lower than 2")
+    return create_dag_workflow("tree", get_tree_dag(desired_num_tasks, fan_out),
+                               cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir, compact,
+                               input_file_writer)
+
+
+def create_mapreduce_workflow(desired_num_tasks, cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir,
+                              compact=False, input_file_writer=None, width=None, depth=None, edge_density=None,
+                              seed=0):
+    if desired_num_tasks < 2:
+        raise Exception("Cannot create a mapreduce benchmark with fewer than 2 tasks")
+    if depth is not None and 2 * depth > desired_num_tasks:
+        raise Exception(f"Cannot create a mapreduce benchmark with {depth} stages of {desired_num_tasks} tasks")
+    width = width or max(2, math.isqrt(desired_num_tasks))
+    return create_dag_workflow("mapreduce", get_mapreduce_dag(desired_num_tasks, width, edge_density, seed, depth),
+                               cpu_fraction, cpu_work, data_footprint, lock_files_folder, work_dir, compact,
+                               input_file_writer)
+
+
+# Synthetic workflow generators, by workflow name, with the minimum number of tasks
+# they support; the shaped ones also take width, depth, edge_density and seed arguments
+synthetic_workflow_generators = {"chain": create_chain_workflow,
+                                 "forkjoin": create_forkjoin_workflow,
+                                 "layered": create_layered_workflow,
+                                 "tree": create_tree_workflow,
+                                 "mapreduce": create_mapreduce_workflow}
+synthetic_workflow_min_sizes = {"chain": 1,
+                                "forkjoin": 4,
+                                "layered": 1,
+                                "tree": 4,
+                                "mapreduce": 2}
+shaped_synthetic_workflows = ["layered", "tree", "mapreduce"]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import queue
+import shutil
+import pathlib
+import itertools
+import threading
+
+TRASH_DIR_NAME = ".trash"
+
+
+class WorkDirManager:
+    """Creates and removes per-run work dirs without waiting for deletions: a work dir that goes away is
+    renamed into a trash dir at once (same file system), and deleted by a background thread.
+
+    Runs with small data footprints can get their work dir on a tmpfs (tmpfs_root), as long as it has
+    room for them."""
+
+    def __init__(self, root, tmpfs_root=None, tmpfs_max_footprint=0):
+        self.roots = [pathlib.Path(root)] + ([pathlib.Path(tmpfs_root)] if tmpfs_root else [])
+        self.tmpfs_root = pathlib.Path(tmpfs_root) if tmpfs_root else None
+        self.tmpfs_max_footprint = tmpfs_max_footprint
+        # Room promised to the tmpfs work dirs handed out so far, which may not be filled yet
+        self.tmpfs_reservations = {}
+        self.counter = itertools.count()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.num_deleted = 0
+        self.deletion_time = 0.0
+        self.max_deletion_time = 0.0
+        self.deleter = threading.Thread(target=self._delete_trash, daemon=True)
+        self.deleter.start()
+        # Leftovers of earlier runs (e.g., interrupted before their trash was deleted)
+        for root in self.roots:
+            trash_dir = root.joinpath(TRASH_DIR_NAME)
+            if trash_dir.is_dir():
+                for path in trash_dir.iterdir():
+                    self.queue.put(path)
+
+    def _delete_trash(self):
+        while True:
+            path = self.queue.get()
+            start = time.monotonic()
+            shutil.rmtree(path, ignore_errors=True)
+            duration = time.monotonic() - start
+            with self.lock:
+                self.num_deleted += 1
+                self.deletion_time += duration
+                self.max_deletion_time = max(self.max_deletion_time, duration)
+            self.queue.task_done()
+
+    def get_root(self, name, data_footprint):
+        # Work dirs hold the input data (plus intermediate and output files with the local backend): leave
+        # room for twice the footprint
+        if self.tmpfs_root is None or data_footprint > self.tmpfs_max_footprint:
+            return self.roots[0]
+        self.tmpfs_root.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            reserved = sum(self.tmpfs_reservations.values())
+            if shutil.disk_usage(self.tmpfs_root).free - reserved < 2 * data_footprint:
+                return self.roots[0]
+            # Reserved before the work dir exists, so that concurrent runs don't all claim the same room
+            self.tmpfs_reservations[self.tmpfs_root.joinpath(name)] = 2 * data_footprint
+        return self.tmpfs_root
+
+    def remove(self, path):
+        """Moves a work dir (if any) out of the way, and queues it for deletion."""
+        path = pathlib.Path(path)
+        with self.lock:
+            self.tmpfs_reservations.pop(path, None)
+        if not path.exists():
+            return
+        for root in self.roots:
+            if root.resolve() in path.resolve().parents:
+                trash_dir = root.joinpath(TRASH_DIR_NAME)
+                break
+        else:
+            trash_dir = path.parent.joinpath(TRASH_DIR_NAME)
+        trash_dir.mkdir(parents=True, exist_ok=True)
+        trash_path = trash_dir.joinpath(f"{path.name}.{os.getpid()}.{next(self.counter)}")
+        try:
+            path.rename(trash_path)
+        except OSError:
+            # e.g., a work dir that is not on the same file system as the trash dir
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        self.queue.put(trash_path)
+
+    def create(self, name, data_footprint=0):
+        """Returns a fresh, empty work dir for a run (any earlier one of the same name is removed)."""
+        for root in self.roots:
+            self.remove(root.joinpath(name))
+        work_dir = self.get_root(name, data_footprint).joinpath(name)
+        work_dir.mkdir(parents=True)
+        return work_dir
+
+    def close(self):
+        """Waits for the queued deletions, and reports how long deletions took."""
+        start = time.monotonic()
+        self.queue.join()
+        if self.num_deleted:
+            sys.stderr.write(f"Work dirs: {self.num_deleted} deleted in the background in "
+                             f"{self.deletion_time:.1f}s (max {self.max_deletion_time:.1f}s), "
+                             f"waited {time.monotonic() - start:.1f}s for the last ones\n")
@@ -9,6 +9,9 @@ ufw disable
 # install pip
 apt-get install -y python3-pip
 
+# install parallel compressors (for archiving runs)
+apt-get install -y pigz zstd
+
 # install HTCondor
 apt-get install -y curl
 curl -fsSL https://get.htcondor.org | sudo /bin/bash -s -- --no-dry-run --channel stable
@@ -74,7 +77,7 @@ cp wfcommons-schema.json /home/cc
 
 # Put relevant scripts in $HOME
 cd /home/cc
-scripts="run-workflow.sh run_experiments.py run_all_experiments.sh"
+scripts="run-workflow.sh run_experiments.py run_all_experiments.sh synthetic_workflows.py input_data.py archive.py results_catalog.py adaptive_trials.py campaign_planner.py pegasus_yaml.py phase_timing.py campaign_journal.py benchmark_cache.py local_backend.py work_dirs.py reprocess.py"
 for script in $scripts; do
 	cp pegasus_workflows_on_chameleon/scripts/$script .
 	chown cc:cc $script
@@ -0,0 +1,5 @@
+import sys
+import pathlib
+
+# The scripts are not a package: they import each other as top-level modules
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.joinpath("scripts")))
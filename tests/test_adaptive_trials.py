@@ -0,0 +1,30 @@
+import math
+
+import pytest
+
+from adaptive_trials import get_t_quantile, get_relative_ci, pick_next_trial
+
+
+def test_t_quantiles():
+    # From tables of Student's t distribution
+    for degrees_of_freedom, quantile in [(1, 12.706), (2, 4.303), (3, 3.182), (10, 2.228), (100, 1.984)]:
+        assert get_t_quantile(0.975, degrees_of_freedom) == pytest.approx(quantile, rel=0.01)
+    # Mean 10, standard error 1
+    assert get_relative_ci([9.0, 11.0], 0.95) == pytest.approx(12.706 / 10, rel=0.01)
+    assert get_relative_ci([10.0], 0.95) == math.inf
+
+
+def test_stop_after_min_trials_at_zero_variance():
+    cells = [{"key": key, "makespans": [], "num_trials": 0, "num_pending": 0, "relative_ci": math.inf}
+             for key in ["a", "b"]]
+    picked = []
+    while True:
+        cell = pick_next_trial(cells, ci_target=0.05, min_trials=3, max_trials=10)
+        if cell is None:
+            break
+        picked.append(cell["key"])
+        # Every trial of a cell has the same makespan
+        cell["makespans"].append(100.0)
+        cell["num_trials"] += 1
+        cell["relative_ci"] = get_relative_ci(cell["makespans"], 0.95)
+    assert picked == ["a", "a", "a", "b", "b", "b"]
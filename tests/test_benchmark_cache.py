@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import threading
+
+from benchmark_cache import BenchmarkCache
+
+
+def generate(work_dir):
+    time.sleep(0.1)
+    benchmark_path = work_dir.joinpath("benchmark.json")
+    benchmark_path.write_text(json.dumps({"name": "benchmark"}))
+    return benchmark_path
+
+
+def test_concurrent_trials_generate_once(tmp_path):
+    cache = BenchmarkCache(tmp_path.joinpath("cache"), 10 ** 9)
+    key = BenchmarkCache.get_key(workflow="chain", num_tasks=10)
+    generating_trials = []
+
+    def run_trial(trial):
+        work_dir = tmp_path.joinpath(f"work-{trial}")
+        work_dir.mkdir()
+        with cache.locked(key):
+            benchmark_path = cache.get(key, work_dir)
+            if benchmark_path is None:
+                generating_trials.append(trial)
+                benchmark_path = generate(work_dir)
+                cache.put(key, work_dir, benchmark_path, {"workflow": "chain"})
+        assert json.loads(benchmark_path.read_text()) == {"name": "benchmark"}
+
+    threads = [threading.Thread(target=run_trial, args=(trial,)) for trial in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(generating_trials) == 1
+    assert len(cache.get_entries()) == 1
+
+
+def test_shared_files_do_not_count(tmp_path):
+    shared_dir = tmp_path.joinpath("input-data")
+    shared_dir.mkdir()
+    shared_dir.joinpath("random-1000000.bin").write_bytes(os.urandom(1000000))
+    work_dir = tmp_path.joinpath("work")
+    work_dir.joinpath("data").mkdir(parents=True)
+    os.link(shared_dir.joinpath("random-1000000.bin"), work_dir.joinpath("data", "input.txt"))
+    benchmark_path = generate(work_dir)
+
+    cache = BenchmarkCache(tmp_path.joinpath("cache"), 10 ** 9, shared_dir)
+    cache.put("key", work_dir, benchmark_path, {"workflow": "chain"})
+    [(_, size_in_bytes, _, _)] = cache.get_entries()
+    assert size_in_bytes < 100000
+
+    unshared_cache = BenchmarkCache(tmp_path.joinpath("unshared-cache"), 10 ** 9)
+    unshared_cache.put("key", work_dir, benchmark_path, {"workflow": "chain"})
+    [(_, size_in_bytes, _, _)] = unshared_cache.get_entries()
+    assert size_in_bytes >= 1000000
+
+
+def test_key_depends_on_wfcommons_version(monkeypatch):
+    import run_experiments
+    experiment = {"desired_num_tasks": 100, "cpu_work": 100, "cpu_fraction": 0.5, "data_footprint": 0}
+    config = {"workflow": "genome", "compact_json": False, "shape_parameters": {}, "input_data": "random",
+              "backend": "pegasus", "pegasus_workflow": "translator"}
+
+    def get_key(version, **options):
+        monkeypatch.setattr(run_experiments, "get_wfcommons_version", lambda: version)
+        return BenchmarkCache.get_key(**run_experiments.get_benchmark_cache_key_parameters(dict(config, **options),
+                                                                                           experiment))
+
+    assert get_key("1.0") != get_key("1.1")
+    assert get_key("1.0", workflow="chain") != get_key("1.1", workflow="chain")
+    # Synthetic benchmarks without PegasusTranslator do not depend on WfCommons
+    assert get_key("1.0", workflow="chain", backend="local") == get_key("1.1", workflow="chain", backend="local")
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from campaign_journal import CampaignJournal
+
+
+def test_resume(tmp_path):
+    journal = CampaignJournal(tmp_path)
+    journal.record("a", "planned")
+    journal.record("a", "generated", work_dir="/tmp/a")
+    journal.record("b", "planned")
+
+    journal = CampaignJournal(tmp_path)
+    assert journal.get_state("a") == "generated"
+    assert journal.get("a")["work_dir"] == "/tmp/a"
+    assert [entry["prefix"] for entry in journal.get_unfinished()] == ["a", "b"]
+
+
+def test_crash_mid_write(tmp_path):
+    journal = CampaignJournal(tmp_path)
+    journal.record("a", "planned")
+    journal.record("a", "generated")
+    with open(journal.path, 'rb') as f:
+        content = f.read()
+    last_record_start = content.rindex(b"\n", 0, len(content) - 1) + 1
+
+    # The machine crashes after any number of bytes of the last record made it to disk
+    for size in range(last_record_start, len(content)):
+        output_dir = tmp_path.joinpath(str(size))
+        output_dir.mkdir()
+        journal_path = output_dir.joinpath(journal.path.name)
+        journal_path.write_bytes(content[:size])
+
+        journal = CampaignJournal(output_dir)
+        # (A record that only misses its newline is complete)
+        assert journal.get_state("a") == ("generated" if size == len(content) - 1 else "planned")
+        # The next records are not lost to (nor merged with) the partial one
+        journal.record("b", "planned")
+        journal.record("a", "discarded")
+        journal = CampaignJournal(output_dir)
+        assert journal.get_state("a") == "discarded"
+        assert journal.get_state("b") == "planned"
+        assert len(journal_path.read_bytes().splitlines()) == (3 if size == last_record_start else 4)
+
+
+def test_failed_runs_are_discarded(tmp_path, monkeypatch):
+    import run_experiments
+    from work_dirs import WorkDirManager
+
+    def create_benchmark(work_dir, workflow, *args):
+        if workflow == "broken":
+            raise Exception("Cannot generate")
+        benchmark_path = work_dir.joinpath("benchmark.json")
+        benchmark_path.write_text("{}")
+        return benchmark_path
+
+    def run_local_workflow(*args):
+        raise Exception("Killed")
+
+    monkeypatch.setattr(run_experiments, "create_benchmark", create_benchmark)
+    monkeypatch.setattr(run_experiments.local_backend, "run_local_workflow", run_local_workflow)
+    config = {"journal": CampaignJournal(tmp_path), "work_dirs": WorkDirManager(tmp_path.joinpath("work")),
+              "benchmark_cache": None, "backend": "local", "local_cores": 1, "compact_json": False,
+              "shape_parameters": {}, "input_data": "random", "input_data_cache": None, "input_data_cache_size": 1,
+              "pegasus_workflow": None}
+    for workflow in ["broken", "chain"]:
+        config["workflow"] = workflow
+        experiment = {"prefix": workflow + "-1", "desired_num_tasks": 1, "cpu_fraction": 0.5, "cpu_work": 100,
+                      "data_footprint": 0}
+        with pytest.raises(Exception):
+            run_experiments.run_experiment(config, experiment)
+        assert config["journal"].get_state(experiment["prefix"]) == "discarded"
+    config["work_dirs"].close()
+    assert [path.name for path in tmp_path.joinpath("work").iterdir()] == [".trash"]
+    assert not list(tmp_path.joinpath("work", ".trash").iterdir())
@@ -0,0 +1,39 @@
+import sys
+import itertools
+
+import pytest
+
+from campaign_planner import get_coverage_order
+
+
+@pytest.fixture(params=["numpy", "pure_python"])
+def numpy_or_not(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        # As on a submit node whose Python has no NumPy
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    return request.param
+
+
+def test_coverage_order_of_a_grid(numpy_or_not):
+    cells = list(itertools.product([1, 2, 3], [10, 100, 1000]))
+    order = get_coverage_order(cells)
+    assert sorted(order) == sorted(cells)
+    # Corners first, then the center (farthest from them), then the middles of the edges (ties in sweep order)
+    assert order == [(1, 10), (1, 1000), (3, 10), (3, 1000), (2, 100), (1, 100), (2, 10), (2, 1000), (3, 100)]
+
+
+def test_coverage_order_of_uneven_grids(numpy_or_not):
+    # Each parameter's grid is scaled to [0, 1], whatever its #values
+    order = get_coverage_order(list(itertools.product([1, 2, 3, 4, 5], ["a", "b"])))
+    assert order[:6] == [(1, "a"), (1, "b"), (5, "a"), (5, "b"), (3, "a"), (3, "b")]
+    assert get_coverage_order([]) == []
+
+
+def test_both_paths_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    cells = list(itertools.product([1, 2, 3, 4], [0.1, 0.5, 0.9], [0, 10, 100, 1000, 10000]))
+    order = get_coverage_order(cells)
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    assert get_coverage_order(cells) == order
@@ -0,0 +1,114 @@
+import sys
+import shutil
+import hashlib
+
+import pytest
+
+import collect_data
+
+RESULT_FILE_NAMES = ["blast-100-1000-0.6-1000000-x86_64-4-1-1700000000.json",
+                     "blast-100-1000-0.6-1000000-x86_64-4-1-1700000000.tar.gz"]
+
+# Stands in for ssh: drops the options and the host, and runs the command locally (as rsync -e would get it)
+FAKE_SSH = """#!/usr/bin/env python3
+import os
+import sys
+args = sys.argv[1:]
+while args[0].startswith("-"):
+    args = args[2:] if args[0] in ["-o", "-l", "-p"] else args[1:]
+os.execvp("bash", ["bash", "-c", " ".join(args[1:])])
+"""
+
+requires_rsync = pytest.mark.skipif(shutil.which("rsync") is None, reason="rsync is not installed")
+
+
+@pytest.fixture
+def config(tmp_path):
+    fake_ssh = tmp_path.joinpath("ssh")
+    fake_ssh.write_text(FAKE_SSH)
+    fake_ssh.chmod(0o755)
+    remote_dir = tmp_path.joinpath("remote")
+    remote_dir.mkdir()
+    for name in RESULT_FILE_NAMES:
+        remote_dir.joinpath(name).write_bytes(hashlib.sha256(name.encode()).digest() * 1000)
+    remote_dir.joinpath("notes.txt").write_text("not a result\n")
+    local_dir = tmp_path.joinpath("local")
+    local_dir.mkdir()
+    return {"user": "cc",
+            "remote_dir": str(remote_dir),
+            "local_dir": str(local_dir),
+            # Same options as the default command, so that the fake ssh sees what ssh would
+            "ssh_command": f"{fake_ssh} {collect_data.SSH_COMMAND.split(' ', 1)[1]}"}
+
+
+def run_main(config, command, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["collect_data.py", command, "localhost", "--user", config["user"],
+                                      "--remote_dir", config["remote_dir"], "--local_dir", config["local_dir"],
+                                      "--ssh_command", config["ssh_command"]])
+    try:
+        collect_data.main()
+    except SystemExit as e:
+        return e.code
+    return 0
+
+
+def test_host_status(config):
+    status = collect_data.get_host_status(config, "localhost")
+    assert status["files"] == {name: 32000 for name in RESULT_FILE_NAMES}
+    assert not status["running"]
+    assert status["local_dir"].name == "x86_64-4-compute-nodes"
+
+
+def test_unreachable_host(config):
+    config["ssh_command"] = "false"
+    with pytest.raises(Exception, match="localhost"):
+        collect_data.get_host_status(config, "localhost")
+
+
+def test_phase_files_are_not_results(tmp_path):
+    phases_file_name = RESULT_FILE_NAMES[0][:-len(".json")] + ".phases.json"
+    status = {"host": "localhost", "local_dir": tmp_path,
+              "files": {name: 100 for name in RESULT_FILE_NAMES + [phases_file_name]}}
+    assert collect_data.get_missing_files(status, collect_data.RESULT_FILE_PATTERNS["json"]) == [RESULT_FILE_NAMES[0]]
+    assert collect_data.get_missing_files(status, collect_data.RESULT_FILE_PATTERNS["phases"]) == [phases_file_name]
+    assert len(collect_data.get_missing_files(status, collect_data.RESULT_FILE_PATTERNS["all"])) == 3
+
+
+@requires_rsync
+def test_collect(config, tmp_path, monkeypatch):
+    assert run_main(config, "json", monkeypatch) == 0
+    collected_dir = tmp_path.joinpath("local", "x86_64-4-compute-nodes")
+    assert sorted(path.name for path in collected_dir.iterdir()) == [RESULT_FILE_NAMES[0]]
+    assert collected_dir.joinpath(RESULT_FILE_NAMES[0]).read_bytes() == \
+        tmp_path.joinpath("remote", RESULT_FILE_NAMES[0]).read_bytes()
+
+    # Only missing (or partially copied) files are transferred again
+    collected_dir.joinpath(RESULT_FILE_NAMES[0]).write_bytes(b"partial")
+    status = collect_data.get_host_status(config, "localhost")
+    assert collect_data.collect_from_host(config, status, collect_data.RESULT_FILE_PATTERNS["all"]) == (2, 0)
+    assert collect_data.collect_from_host(config, status, collect_data.RESULT_FILE_PATTERNS["all"]) == (0, 0)
+
+
+@requires_rsync
+def test_collect_checksum_mismatch(config, tmp_path):
+    status = collect_data.get_host_status(config, "localhost")
+    # The remote file changes between the transfer and the checksums
+    corrupting_ssh = tmp_path.joinpath("corrupting-ssh")
+    corrupting_ssh.write_text(f"#!/bin/sh\n"
+                              f"case \"$*\" in *sha256sum*) "
+                              f"echo corrupted >> {tmp_path.joinpath('remote', RESULT_FILE_NAMES[0])};; esac\n"
+                              f"exec {config['ssh_command']} \"$@\"\n")
+    corrupting_ssh.chmod(0o755)
+    config["ssh_command"] = str(corrupting_ssh)
+    assert collect_data.collect_from_host(config, status, collect_data.RESULT_FILE_PATTERNS["json"]) == (0, 1)
+    assert not status["local_dir"].joinpath(RESULT_FILE_NAMES[0]).exists()
+
+
+@requires_rsync
+def test_push(config, tmp_path, monkeypatch):
+    assert run_main(config, "all", monkeypatch) == 0
+    remote_path = tmp_path.joinpath("remote", RESULT_FILE_NAMES[0])
+    content = remote_path.read_bytes()
+    remote_path.unlink()
+    assert run_main(config, "push", monkeypatch) == 0
+    assert remote_path.read_bytes() == content
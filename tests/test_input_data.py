@@ -0,0 +1,19 @@
+import sys
+
+from input_data import CHUNK_SIZE_IN_BYTES, write_random_file
+
+
+def test_random_file_without_numpy(tmp_path, monkeypatch):
+    # As on a submit node whose Python has no NumPy
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    path = tmp_path.joinpath("input.txt")
+    write_random_file(path, CHUNK_SIZE_IN_BYTES + 10)
+    assert path.stat().st_size == CHUNK_SIZE_IN_BYTES + 10
+    write_random_file(path, 0)
+    assert path.stat().st_size == 0
+
+
+def test_random_file_is_seeded(tmp_path):
+    write_random_file(tmp_path.joinpath("1.txt"), 1000, seed=1)
+    write_random_file(tmp_path.joinpath("2.txt"), 1000, seed=1)
+    assert tmp_path.joinpath("1.txt").read_bytes() == tmp_path.joinpath("2.txt").read_bytes()
@@ -0,0 +1,85 @@
+import json
+import pathlib
+
+import pytest
+
+import local_backend
+from run_experiments import process_pegasus_workflow_execution
+
+
+def create_run(work_dir):
+    work_dir.mkdir(exist_ok=True)
+    benchmark_path = work_dir.joinpath("chain-benchmark-1.json")
+    benchmark_path.write_text(json.dumps({"name": "chain", "workflow": {"tasks": [
+        {"name": "task_00000001", "parents": [], "children": [], "files": [],
+         "command": {"program": "wfbench", "arguments": []}}]}}))
+    run_dir = work_dir.joinpath(local_backend.RUN_DIR_PATH)
+    run_dir.mkdir(parents=True)
+    run_dir.joinpath(local_backend.TASKS_FILE_NAME).write_text(json.dumps({
+        "hostName": "localhost", "numCores": 1, "exitStatus": 0,
+        "tasks": [{"name": "task_00000001", "start": 1700000000.0, "end": 1700000010.0, "exitCode": 0,
+                   "cpuTimeInSeconds": 10.0, "maxRssInKB": 1024}]}))
+    return benchmark_path, run_dir
+
+
+def test_get_run_dir(tmp_path):
+    assert local_backend.get_run_dir(tmp_path) is None
+    _, run_dir = create_run(tmp_path)
+    assert local_backend.get_run_dir(tmp_path) == run_dir
+    renamed_dir = run_dir.rename(run_dir.parent.joinpath("chain-1-100-0.5-0-haswell-1-1-1700000000"))
+    assert local_backend.get_run_dir(tmp_path) == renamed_dir
+
+
+def test_resume_after_rename(tmp_path):
+    work_dir = tmp_path.joinpath("work")
+    output_dir = tmp_path.joinpath("output")
+    output_dir.mkdir()
+    benchmark_path, run_dir = create_run(work_dir)
+    prefix = "chain-1-100-0.5-0-haswell-1-1"
+    # Interrupted after the run dir was renamed, before it was archived
+    run_dir.rename(run_dir.parent.joinpath(prefix + "-1700000000"))
+
+    workflow_path = process_pegasus_workflow_execution(work_dir, benchmark_path, output_dir, prefix,
+                                                       backend="local")
+    with open(workflow_path) as f:
+        instance = json.load(f)
+    assert [task["id"] for task in instance["workflow"]["execution"]["tasks"]] == ["task_00000001"]
+    assert len(list(pathlib.Path(output_dir).glob(prefix + "-*.tar.gz"))) == 1
+
+
+def create_chain(tmp_path, num_tasks):
+    # Stands in for wfbench: writes the task's output file, and fails for the task named by $FAIL_TASK
+    wfbench = tmp_path.joinpath("wfbench")
+    wfbench.write_text('#!/bin/sh\necho done > "$1_output.txt"\n[ "$1" != "$FAIL_TASK" ]\n')
+    wfbench.chmod(0o755)
+    tmp_path.joinpath("cpu-benchmark").write_text("")
+    work_dir = tmp_path.joinpath("work")
+    work_dir.joinpath("data").mkdir(parents=True)
+    work_dir.joinpath("data", "task_00000001_input.txt").write_text("input")
+    names = [f"task_{index:08d}" for index in range(1, num_tasks + 1)]
+    benchmark_path = work_dir.joinpath("chain-benchmark-4.json")
+    benchmark_path.write_text(json.dumps({"name": "chain", "workflow": {"tasks": [
+        {"name": name, "parents": names[index - 1:index] if index else [], "children": names[index + 1:index + 2],
+         "files": [], "command": {"program": str(wfbench), "arguments": [name]}}
+        for index, name in enumerate(names)]}}))
+    return work_dir, benchmark_path
+
+
+def test_run_dir_only_holds_logs(tmp_path):
+    work_dir, benchmark_path = create_chain(tmp_path, 4)
+    times = local_backend.run_local_workflow(work_dir, benchmark_path, str(tmp_path), 2)
+    assert times["dagman_exit_status"] == 0
+    run_dir = local_backend.get_run_dir(work_dir)
+    assert sorted(path.name for path in run_dir.iterdir()) == \
+        sorted([f"task_{index:08d}.{extension}" for index in range(1, 5) for extension in ["out", "err"]] +
+               [local_backend.TASKS_FILE_NAME])
+    assert work_dir.joinpath(local_backend.SCRATCH_DIR_PATH, "task_00000004_output.txt").exists()
+
+
+def test_failed_task(tmp_path, monkeypatch):
+    work_dir, benchmark_path = create_chain(tmp_path, 4)
+    monkeypatch.setenv("FAIL_TASK", "task_00000002")
+    with pytest.raises(Exception, match="1 task.* failed, 2 did not run"):
+        local_backend.run_local_workflow(work_dir, benchmark_path, str(tmp_path), 2)
+    with open(local_backend.get_run_dir(work_dir).joinpath(local_backend.TASKS_FILE_NAME)) as f:
+        assert json.load(f)["exitStatus"] == 1
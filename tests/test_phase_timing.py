@@ -0,0 +1,30 @@
+import json
+import sys
+
+import phase_timing
+from phase_timing import PhaseTimer, summarize
+
+
+def test_zero_durations(tmp_path, monkeypatch, capsys):
+    timer = PhaseTimer()
+    timer.add("work_dir_creation", 10.0, 10.0)
+    timer.add("pegasus_plan", 10.0, 12.0, parent="run_workflow_script")
+    timer.write(tmp_path.joinpath("chain-1-1700000000" + phase_timing.PHASES_FILE_SUFFIX), "chain-1")
+    assert summarize(tmp_path)["pegasus_plan"]["total"] == 2.0
+
+    monkeypatch.setattr(sys, "argv", ["phase_timing.py", str(tmp_path)])
+    phase_timing.main()
+    assert "work_dir_creation" in capsys.readouterr().out
+
+
+def test_rss_of_harness_and_children_are_kept_apart(tmp_path):
+    phases = [{"name": "benchmark_generation", "start": 0.0, "durationInSeconds": 1.0,
+               "processMaxRssSoFarInKB": 1000, "childrenMaxRssSoFarInKB": 5000},
+              # As in earlier phase files
+              {"name": "benchmark_generation", "start": 1.0, "durationInSeconds": 1.0,
+               "maxRssInKB": 2000, "childrenMaxRssInKB": 3000}]
+    with open(tmp_path.joinpath("chain-1-1700000000" + phase_timing.PHASES_FILE_SUFFIX), 'w') as f:
+        json.dump({"prefix": "chain-1", "phases": phases}, f)
+    stats = summarize(tmp_path)["benchmark_generation"]
+    assert stats["processMaxRssSoFarInKB"] == 2000
+    assert stats["childrenMaxRssSoFarInKB"] == 5000
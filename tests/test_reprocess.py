@@ -0,0 +1,27 @@
+import json
+
+import local_backend
+from archive import create_archive, DEDUPE_MIN_SIZE_IN_BYTES
+from reprocess import reprocess_archive
+
+
+def test_deduplicated_copy_of_top_level_json(tmp_path):
+    run_dir = tmp_path.joinpath("chain-1-100-0.5-0-haswell-1-1-1700000000")
+    run_dir.joinpath("inputs").mkdir(parents=True)
+    # Large enough to be deduplicated: the copy under inputs/ is archived as a link to the top-level file
+    benchmark = {"name": "chain", "description": "x" * DEDUPE_MIN_SIZE_IN_BYTES, "workflow": {"tasks": [
+        {"name": "task_00000001", "parents": [], "children": [], "files": [],
+         "command": {"program": "wfbench", "arguments": []}}]}}
+    run_dir.joinpath("chain-benchmark-1.json").write_text(json.dumps(benchmark))
+    run_dir.joinpath("inputs", "chain-benchmark-1.json").write_text(json.dumps(benchmark))
+    run_dir.joinpath(local_backend.TASKS_FILE_NAME).write_text(json.dumps({
+        "hostName": "localhost", "numCores": 1, "exitStatus": 0,
+        "tasks": [{"name": "task_00000001", "start": 1700000000.0, "end": 1700000010.0, "exitCode": 0,
+                   "cpuTimeInSeconds": 10.0, "maxRssInKB": 1024}]}))
+    archive_path = create_archive(run_dir, tmp_path.joinpath(run_dir.name), dedupe=True)
+
+    result_path = tmp_path.joinpath(run_dir.name + ".json")
+    reprocess_archive(archive_path, result_path, tmp_path)
+    with open(result_path) as f:
+        instance = json.load(f)
+    assert [task["id"] for task in instance["workflow"]["execution"]["tasks"]] == ["task_00000001"]
@@ -0,0 +1,62 @@
+import os
+import json
+
+import pytest
+
+# The analysis scripts need NumPy and pandas, which the submit node does not have
+pytest.importorskip("pandas")
+import pandas as pd  # noqa: E402
+
+from sanity import load_results, get_cell_statistics, get_pair_statistics  # noqa: E402
+
+
+def write_result(output_dir, file_name, makespan, mtime_ns):
+    path = output_dir.joinpath(file_name)
+    path.write_text(json.dumps({"workflow": {"execution": {"makespanInSeconds": makespan, "tasks": [
+        {"id": "00000001", "runtimeInSeconds": makespan}]}}}))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_changed_result_is_read_again(tmp_path):
+    write_result(tmp_path, "chain-10-100-0.5-0-haswell-1-0-1700000000.json", 10.0, 10 ** 18)
+    write_result(tmp_path, "forkjoin-10-100-0.5-0-haswell-1-0-1700000000.json", 20.0, 10 ** 18)
+    results, changed_scopes, num_read = load_results(tmp_path)
+    assert num_read == 2
+    assert changed_scopes == {("chain", 10), ("forkjoin", 10)}
+
+    # Only the file that changed (as told by its mtime) is read again, and only its scope is re-checked
+    write_result(tmp_path, "chain-10-100-0.5-0-haswell-1-0-1700000000.json", 30.0, 2 * 10 ** 18)
+    results, changed_scopes, num_read = load_results(tmp_path, results)
+    assert num_read == 1
+    assert changed_scopes == {("chain", 10)}
+    assert sorted(results["makespan"]) == [20.0, 30.0]
+    assert results.set_index("workflow").at["chain", "task_runtimes"] == {"00000001": 30.0}
+
+    # A result that is removed invalidates its scope
+    os.remove(tmp_path.joinpath("forkjoin-10-100-0.5-0-haswell-1-0-1700000000.json"))
+    results, changed_scopes, num_read = load_results(tmp_path, results)
+    assert num_read == 0
+    assert changed_scopes == {("forkjoin", 10)}
+    assert list(results["workflow"]) == ["chain"]
+
+
+def test_bootstrap_confidence_intervals():
+    cell = {"workflow": "chain", "num_tasks": 10, "cpu_fraction": 0.5, "data_footprint": 0,
+            "architecture": "haswell", "num_compute_nodes": 1}
+    results = pd.DataFrame([dict(cell, cpu_work=100, makespan=makespan) for makespan in [1.0, 2.0, 3.0, 4.0]] +
+                           [dict(cell, cpu_work=200, makespan=makespan) for makespan in [0.5, 0.5, 0.5]])
+    cells, bootstrap_means = get_cell_statistics(results, 2000, 0.95)
+
+    # Bootstrap means of 1, 2, 3, 4 are spread around 2.5 with a standard error of ~0.56
+    assert list(cells["num_trials"]) == [4, 3]
+    assert list(cells["makespan"]) == [2.5, 0.5]
+    assert 1.25 <= cells.at[0, "ci_low"] <= 1.75 and 3.25 <= cells.at[0, "ci_high"] <= 3.75
+    assert cells.at[0, "relative_ci"] == (cells.at[0, "ci_high"] - cells.at[0, "ci_low"]) / 5.0
+    # Without variance, the interval is the mean
+    assert (cells.at[1, "ci_low"], cells.at[1, "ci_high"], cells.at[1, "relative_ci"]) == (0.5, 0.5, 0.0)
+
+    # More CPU work, but a shorter makespan: significantly so
+    pairs = get_pair_statistics(cells, bootstrap_means, "cpu_work", 1, 0.95)
+    assert list(pairs["difference"]) == [2.0]
+    assert list(pairs["significant"]) == [True]
+    assert list(pairs["inconclusive"]) == [False]
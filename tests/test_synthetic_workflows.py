@@ -0,0 +1,59 @@
+import json
+import math
+import time
+
+import pytest
+
+from synthetic_workflows import DEFAULT_NUM_RANDOM_PARENTS, get_layered_dag, get_mapreduce_dag, \
+    synthetic_workflow_generators, write_workflow_json
+
+
+@pytest.mark.parametrize("kind", ["chain", "forkjoin", "layered"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_streamed_json_matches_json_dumps(tmp_path, kind, compact):
+    benchmark_path = synthetic_workflow_generators[kind](desired_num_tasks=10, cpu_fraction=0.5, cpu_work=100,
+                                                         data_footprint=1000, lock_files_folder=tmp_path,
+                                                         work_dir=tmp_path, compact=compact,
+                                                         input_file_writer=lambda path, size_in_bytes: None)
+    content = benchmark_path.read_text()
+    workflow_json = json.loads(content)
+    assert len(workflow_json["workflow"]["tasks"]) == 10
+    if compact:
+        assert content == json.dumps(workflow_json, separators=(",", ":"))
+    else:
+        assert content == json.dumps(workflow_json, indent=4)
+
+
+def test_streamed_json_without_tasks(tmp_path):
+    workflow_json = {"name": "Empty", "workflow": {"makespanInSeconds": 0}}
+    write_workflow_json(tmp_path.joinpath("empty.json"), workflow_json, iter([]))
+    workflow_json["workflow"]["tasks"] = []
+    assert tmp_path.joinpath("empty.json").read_text() == json.dumps(workflow_json, indent=4)
+
+
+def test_default_edge_density_is_linear():
+    # 10^5 tasks with the default width (sqrt(#tasks)) and edge density: about DEFAULT_NUM_RANDOM_PARENTS
+    # parents per task, built in well under a second
+    num_tasks = 100000
+    for get_dag in [get_layered_dag, get_mapreduce_dag]:
+        start = time.perf_counter()
+        parents = get_dag(num_tasks, math.isqrt(num_tasks), None, 0)
+        elapsed = time.perf_counter() - start
+        assert sum(len(task_parents) for task_parents in parents) < 1.5 * DEFAULT_NUM_RANDOM_PARENTS * num_tasks
+        assert elapsed < 1.0
+
+
+def test_edge_density():
+    parents = get_layered_dag(1000, 100, 1.0, 0)
+    assert parents[101] == list(range(1, 101))
+    parents = get_mapreduce_dag(1000, 100, 0.0, 0)
+    assert all(len(parents[task]) == 1 for task in range(1, 1001) if parents[task])
+
+
+@pytest.mark.parametrize("shape_argument", ["--dag_width", "--dag_depth"])
+def test_tree_needs_two_levels_and_children(tmp_path, capsys, shape_argument):
+    from run_experiments import parse_arguments
+    with pytest.raises(SystemExit):
+        parse_arguments(["run_experiments.py", "-a", "haswell", "-w", "tree", "-n", "1", "-t", "1", "-c", "100",
+                         "-f", "0.5", "-d", "1000", "-S", "20", "-o", str(tmp_path), shape_argument, "1"])
+    assert "at least 2" in capsys.readouterr().err
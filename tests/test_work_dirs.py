@@ -0,0 +1,30 @@
+import collections
+
+import work_dirs
+from work_dirs import WorkDirManager
+
+DiskUsage = collections.namedtuple("DiskUsage", ["total", "used", "free"])
+
+
+def test_tmpfs_room_is_reserved_until_removal(tmp_path, monkeypatch):
+    # Work dirs are empty when handed out: the tmpfs looks just as free after each one
+    monkeypatch.setattr(work_dirs.shutil, "disk_usage", lambda path: DiskUsage(1000, 0, 1000))
+    manager = WorkDirManager(tmp_path.joinpath("disk"), tmp_path.joinpath("tmpfs"), 400)
+
+    first = manager.create("run-1", 400)
+    second = manager.create("run-2", 400)
+    assert first.parent == tmp_path.joinpath("tmpfs")
+    assert second.parent == tmp_path.joinpath("disk")
+
+    manager.remove(first)
+    third = manager.create("run-3", 400)
+    assert third.parent == tmp_path.joinpath("tmpfs")
+    manager.close()
+
+
+def test_leftover_trash_is_deleted(tmp_path):
+    trash_path = tmp_path.joinpath(work_dirs.TRASH_DIR_NAME, "run-1.1234.0")
+    trash_path.joinpath("data").mkdir(parents=True)
+    manager = WorkDirManager(tmp_path)
+    manager.close()
+    assert not trash_path.exists()